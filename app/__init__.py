@@ -1,11 +1,13 @@
 from flask import Flask
 from flask_cors import CORS
 from config import Config
+from app.utils.json_provider import ProveedorJSON
 import os
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = ProveedorJSON(app)  # jsonify con orjson (Decimal y fechas nativos)
     
     # Obtener URL permitida (Localhost en dev, Vercel en prod)
     frontend_url = os.environ.get('FRONTEND_URL')
@@ -13,11 +15,19 @@ def create_app(config_class=Config):
     # Configuración CORS estricta pero dinámica
     CORS(app, 
          resources={r"/api/*": {"origins": [frontend_url]}},
-         supports_credentials=True) # OBLIGATORIO para cookies
-    from app.db import database
+         supports_credentials=True, # OBLIGATORIO para cookies
+         expose_headers=['X-Siguiente-Cursor', 'X-Perfil']) # Cursor de paginación / perfil generado
+    from app.db import database, mongo, auditoria, importacion
+    from app.utils.metricas import init_metricas
+    from app.utils.perfilador import init_perfilador
+    init_metricas(app)  # Antes que el resto: mide también lo que agregan sus hooks
+    init_perfilador(app)
     database.init_app(app)
+    mongo.init_mongo(app)
+    auditoria.init_auditoria(app)
+    importacion.init_importacion(app)
 
-    from app.routes import auth, dashboard, operaciones, calendario, lotes, pedidos, clientes, configuracion
+    from app.routes import auth, dashboard, operaciones, calendario, lotes, pedidos, clientes, configuracion, metricas
     
     app.register_blueprint(auth.bp)
     app.register_blueprint(dashboard.bp)
@@ -27,6 +37,7 @@ def create_app(config_class=Config):
     app.register_blueprint(pedidos.bp)
     app.register_blueprint(clientes.bp)
     app.register_blueprint(configuracion.bp)
+    app.register_blueprint(metricas.bp)
 
     @app.after_request
     def security_headers(response):
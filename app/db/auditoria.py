@@ -0,0 +1,286 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from bson import json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+from flask import current_app
+from app.db.mongo import get_mongo_client, get_circuito
+
+POLITICAS = ('respaldo', 'descartar_nuevos', 'descartar_antiguos', 'bloquear')
+
+class BufferAuditoria:
+    """
+    Cola en memoria para logs_auditoria (write-behind).
+
+    Las peticiones solo encolan; un hilo de fondo agrupa los eventos y los
+    inserta con insert_many cada `tam_lote` eventos o cada `intervalo_seg`.
+    Si Mongo no está disponible el lote se guarda en un archivo NDJSON local
+    que se reinserta en el siguiente volcado exitoso.
+
+    Política cuando la cola está llena:
+    - respaldo: el evento va directo al archivo local.
+    - descartar_nuevos: se pierde el evento nuevo.
+    - descartar_antiguos: se pierde el evento más viejo de la cola.
+    - bloquear: la petición espera hasta `espera_max_seg` y luego descarta.
+    """
+
+    def __init__(self, config, capacidad=10000, tam_lote=100, intervalo_seg=2.0,
+                 politica='respaldo', archivo_respaldo='auditoria_pendiente.ndjson', espera_max_seg=0.05):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política de auditoría inválida: {politica}")
+        self.config = config
+        self.capacidad = capacidad
+        self.tam_lote = tam_lote
+        self.intervalo_seg = intervalo_seg
+        self.politica = politica
+        self.archivo_respaldo = archivo_respaldo
+        self.espera_max_seg = espera_max_seg
+
+        self._lock_archivo = threading.Lock()
+        self._lock_stats = threading.Lock()
+        self._iniciar_proceso()
+
+    def _iniciar_proceso(self):
+        # Estado propio de cada proceso: tras un fork el hilo del padre no existe
+        self._pid = os.getpid()
+        self._cola = queue.Queue(maxsize=self.capacidad)
+        self._detener = threading.Event()
+        self._hilo = None
+        self._stats = {
+            'encolados': 0, 'insertados': 0, 'descartados': 0,
+            'respaldados': 0, 'reproducidos': 0, 'corruptos': 0, 'lotes': 0, 'errores': 0,
+        }
+        self._latencia_ultima = 0.0
+        self._latencia_total = 0.0
+        self._latencia_max = 0.0
+
+    def _asegurar_hilo(self):
+        if self._pid != os.getpid():
+            self._iniciar_proceso()
+        if self._hilo is None or not self._hilo.is_alive():
+            with self._lock_stats:
+                if self._hilo is None or not self._hilo.is_alive():
+                    self._detener.clear()
+                    self._hilo = threading.Thread(target=self._trabajar, name='auditoria-mongo', daemon=True)
+                    self._hilo.start()
+
+    def _contar(self, clave, n=1):
+        with self._lock_stats:
+            self._stats[clave] += n
+
+    # --- Lado de la petición ---
+
+    def encolar(self, documento):
+        """Agrega un evento sin esperar a Mongo. Devuelve False si se descartó."""
+        self._asegurar_hilo()
+        try:
+            if self.politica == 'bloquear':
+                self._cola.put(documento, timeout=self.espera_max_seg)
+            else:
+                self._cola.put_nowait(documento)
+            self._contar('encolados')
+            return True
+        except queue.Full:
+            pass
+
+        if self.politica == 'respaldo':
+            self._respaldar([documento])
+            return True
+        if self.politica == 'descartar_antiguos':
+            try:
+                self._cola.get_nowait()
+                self._contar('descartados')
+                self._cola.put_nowait(documento)
+                self._contar('encolados')
+                return True
+            except (queue.Empty, queue.Full):
+                pass
+        self._contar('descartados')
+        return False
+
+    # --- Hilo de fondo ---
+
+    def _trabajar(self):
+        while not self._detener.is_set():
+            lote = self._tomar_lote()
+            if lote:
+                self._volcar(lote)
+        # Vaciado final al apagar el worker
+        while True:
+            lote = self._tomar_lote(esperar=False)
+            if not lote:
+                break
+            self._volcar(lote)
+
+    def _tomar_lote(self, esperar=True):
+        lote = []
+        limite = time.monotonic() + self.intervalo_seg
+        while len(lote) < self.tam_lote:
+            restante = limite - time.monotonic()
+            try:
+                if esperar and restante > 0 and not self._detener.is_set():
+                    lote.append(self._cola.get(timeout=restante))
+                else:
+                    lote.append(self._cola.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _insertar(self, documentos):
+        coleccion = get_mongo_client(self.config)['algatrack_nosql'].logs_auditoria
+        try:
+            coleccion.insert_many(documentos, ordered=False)
+        except BulkWriteError as e:
+            # insert_many asigna _id antes de enviar: al reinsertar un lote que
+            # ya entró a medias, los duplicados (11000) no son un error real
+            if any(err.get('code') != 11000 for err in e.details.get('writeErrors', [])):
+                raise
+
+    def _volcar(self, lote):
+        circuito = get_circuito(self.config)
+        if not circuito.permite():
+            self._respaldar(lote)
+            return
+
+        inicio = time.perf_counter()
+        try:
+            self._insertar(lote)
+        except PyMongoError as e:
+            print(f"Mongo Error (auditoría): {e}")
+            circuito.registrar_fallo()
+            self._contar('errores')
+            self._respaldar(lote)
+            return
+
+        circuito.registrar_exito()
+        latencia = time.perf_counter() - inicio
+        with self._lock_stats:
+            self._stats['insertados'] += len(lote)
+            self._stats['lotes'] += 1
+            self._latencia_ultima = latencia
+            self._latencia_total += latencia
+            self._latencia_max = max(self._latencia_max, latencia)
+        self._reproducir_respaldo()
+
+    # --- Archivo de respaldo ---
+
+    def _respaldar(self, documentos, contar=True):
+        lineas = ''.join(json_util.dumps(d) + '\n' for d in documentos)
+        try:
+            with self._lock_archivo:
+                with open(self.archivo_respaldo, 'a', encoding='utf8') as f:
+                    f.write(lineas)
+            if contar:
+                self._contar('respaldados', len(documentos))
+        except OSError as e:
+            print(f"Error escribiendo respaldo de auditoría: {e}")
+            self._contar('descartados', len(documentos))
+
+    def _leer_respaldo(self, ruta):
+        """Documentos del archivo; las líneas ilegibles (p.ej. cortadas por un
+        corte de energía) se apartan en <archivo>.corrupto para revisarlas."""
+        documentos, corruptas = [], []
+        with open(ruta, encoding='utf8', errors='replace') as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                try:
+                    documentos.append(json_util.loads(linea))
+                except ValueError:  # json.JSONDecodeError y errores de tipos extendidos de bson
+                    corruptas.append(linea if linea.endswith('\n') else linea + '\n')
+        if corruptas:
+            print(f"Auditoría: {len(corruptas)} líneas ilegibles en el respaldo, apartadas en .corrupto")
+            self._contar('corruptos', len(corruptas))
+            try:
+                with open(f"{self.archivo_respaldo}.corrupto", 'a', encoding='utf8') as f:
+                    f.writelines(corruptas)
+            except OSError as e:
+                print(f"Error apartando líneas corruptas de auditoría: {e}")
+        return documentos
+
+    def _reproducir_respaldo(self):
+        if not os.path.exists(self.archivo_respaldo):
+            return
+        # Renombrar es atómico: otros workers siguen escribiendo en un archivo nuevo
+        en_curso = f"{self.archivo_respaldo}.{os.getpid()}.reproduciendo"
+        try:
+            with self._lock_archivo:
+                os.replace(self.archivo_respaldo, en_curso)
+        except OSError:
+            return
+
+        # Pase lo que pase, el archivo en curso no queda: lo no insertado
+        # vuelve al respaldo y lo ilegible a .corrupto
+        try:
+            documentos = self._leer_respaldo(en_curso)
+            for i in range(0, len(documentos), self.tam_lote):
+                parte = documentos[i:i + self.tam_lote]
+                try:
+                    self._insertar(parte)
+                    self._contar('reproducidos', len(parte))
+                except PyMongoError as e:
+                    print(f"Mongo Error (reproduciendo respaldo): {e}")
+                    get_circuito(self.config).registrar_fallo()
+                    self._respaldar(documentos[i:], contar=False)
+                    break
+        except OSError as e:
+            print(f"Error leyendo respaldo de auditoría: {e}")
+        finally:
+            try:
+                os.remove(en_curso)
+            except OSError:
+                pass
+
+    # --- Ciclo de vida y métricas ---
+
+    def detener(self, timeout=5.0):
+        """Vacía la cola (a Mongo o al respaldo) antes de que termine el proceso."""
+        if self._pid != os.getpid() or self._hilo is None:
+            return
+        self._detener.set()
+        self._hilo.join(timeout)
+
+    def estadisticas(self):
+        with self._lock_stats:
+            lotes = self._stats['lotes']
+            return dict(
+                self._stats,
+                en_cola=self._cola.qsize(),
+                capacidad=self.capacidad,
+                politica=self.politica,
+                latencia_ultima_ms=round(self._latencia_ultima * 1000, 2),
+                latencia_promedio_ms=round(self._latencia_total / lotes * 1000, 2) if lotes else 0.0,
+                latencia_max_ms=round(self._latencia_max * 1000, 2),
+                circuito=get_circuito(self.config).estado(),
+            )
+
+def get_buffer(app=None):
+    app = app or current_app._get_current_object()
+    return app.extensions['auditoria']
+
+def registrar_auditoria(documento):
+    """Encola un evento para logs_auditoria sin bloquear la petición."""
+    return get_buffer().encolar(documento)
+
+def init_auditoria(app):
+    app.config.setdefault('AUDITORIA_CAPACIDAD', 10000)
+    app.config.setdefault('AUDITORIA_TAM_LOTE', 100)
+    app.config.setdefault('AUDITORIA_INTERVALO_SEG', 2.0)
+    app.config.setdefault('AUDITORIA_POLITICA', 'respaldo')
+    app.config.setdefault('AUDITORIA_ESPERA_MAX_SEG', 0.05)
+    app.config.setdefault('AUDITORIA_ARCHIVO_RESPALDO', os.path.join(app.instance_path, 'auditoria_pendiente.ndjson'))
+
+    os.makedirs(os.path.dirname(app.config['AUDITORIA_ARCHIVO_RESPALDO']) or '.', exist_ok=True)
+    buffer = BufferAuditoria(
+        app.config,
+        capacidad=app.config['AUDITORIA_CAPACIDAD'],
+        tam_lote=app.config['AUDITORIA_TAM_LOTE'],
+        intervalo_seg=app.config['AUDITORIA_INTERVALO_SEG'],
+        politica=app.config['AUDITORIA_POLITICA'],
+        archivo_respaldo=app.config['AUDITORIA_ARCHIVO_RESPALDO'],
+        espera_max_seg=app.config['AUDITORIA_ESPERA_MAX_SEG']
+    )
+    app.extensions['auditoria'] = buffer
+    atexit.register(buffer.detener)
\ No newline at end of file
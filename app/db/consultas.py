@@ -0,0 +1,96 @@
+import re
+from psycopg2 import extensions, errors
+from flask import current_app
+
+# Consultas frecuentes como sentencias preparadas: cada conexión del pool hace
+# PREPARE la primera vez que ejecuta una y después solo EXECUTE, sin volver a
+# analizar ni planificar el SQL. Un PREPARE es de la sesión, no de la
+# transacción: sobrevive al rollback y sirve también dentro de transacciones.
+# Con POSTGRES_PREPARADAS desactivado (p.ej. detrás de pgbouncer en modo
+# transacción) o en cursores con nombre se ejecuta el SQL normal.
+
+# nombre -> (sql con %s, tipos de los parámetros para PREPARE)
+CONSULTAS = {
+    'versiones': (
+        "SELECT tabla, version FROM versiones_tabla WHERE tabla = ANY(%s)", ('text[]',)),
+    'rol_usuario': (
+        "SELECT rol, version_sesion FROM usuarios WHERE id = %s", ('integer',)),
+    'usuario_por_nombre': (
+        "SELECT * FROM usuarios WHERE usuario = %s", ('text',)),
+    'parametros_sistema': (
+        "SELECT clave, valor, unidad, descripcion, categoria FROM parametros_sistema ORDER BY categoria, clave", ()),
+    'configuracion_estacional': (
+        "SELECT * FROM configuracion_estacional ORDER BY id", ()),
+    'atp_oferta': ("""
+        SELECT CASE WHEN estado = 'cosechado' THEN NULL ELSE fecha_cosecha_estimada END AS fecha,
+               SUM(superficie) AS total
+        FROM lotes
+        WHERE estado = 'cosechado' OR (estado = 'activo' AND fecha_cosecha_estimada IS NOT NULL)
+        GROUP BY 1
+    """, ()),
+    'atp_demanda': ("""
+        SELECT fecha_entrega AS fecha, SUM(cantidad_ton) AS total
+        FROM pedidos
+        WHERE estado != 'cancelado'
+        GROUP BY 1
+    """, ()),
+}
+
+_MARCADOR = re.compile(r'%s')
+
+class ConexionPreparada(extensions.connection):
+    """Conexión que recuerda qué sentencias de CONSULTAS ya preparó."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.preparadas = set()
+        # Falló un EXECUTE dentro de una transacción: no se sabe qué quedó en
+        # la sesión hasta hacer DEALLOCATE ALL fuera de ella
+        self.desincronizada = False
+
+def _preparar(cursor, nombre):
+    sql, tipos = CONSULTAS[nombre]
+    numero = iter(range(1, len(tipos) + 1))
+    sql_posicional = _MARCADOR.sub(lambda _: f'${next(numero)}', sql)
+    tipos_sql = f" ({', '.join(tipos)})" if tipos else ''
+    cursor.execute(f"PREPARE {nombre}{tipos_sql} AS {sql_posicional}")
+    cursor.connection.preparadas.add(nombre)
+
+def _ejecutar_preparada(cursor, nombre, parametros):
+    if nombre not in cursor.connection.preparadas:
+        _preparar(cursor, nombre)
+    marcadores = f"({', '.join(['%s'] * len(parametros))})" if parametros else ''
+    cursor.execute(f"EXECUTE {nombre}{marcadores}", parametros or None)
+
+def _reiniciar(cursor):
+    conn = cursor.connection
+    cursor.execute("DEALLOCATE ALL")
+    conn.preparadas.clear()
+    conn.desincronizada = False
+
+def ejecutar(cursor, nombre, parametros=()):
+    """
+    Ejecuta la consulta registrada `nombre`; el resultado se lee del cursor como siempre.
+    Si la sesión perdió la sentencia (DISCARD, proxy) o el esquema cambió
+    ("cached plan must not change result type") se prepara de nuevo una vez.
+    Dentro de una transacción no se puede reintentar (quedó abortada): el
+    error sube y la conexión usa SQL normal hasta la próxima ejecución en
+    autocommit, que limpia la sesión.
+    """
+    conn = cursor.connection
+    if (cursor.name is not None or not isinstance(conn, ConexionPreparada)
+            or not current_app.config.get('POSTGRES_PREPARADAS', True)
+            or (conn.desincronizada and not conn.autocommit)):
+        cursor.execute(CONSULTAS[nombre][0], parametros or None)
+        return
+    if conn.desincronizada:
+        _reiniciar(cursor)
+    try:
+        _ejecutar_preparada(cursor, nombre, parametros)
+    except (errors.InvalidSqlStatementName, errors.FeatureNotSupported):
+        conn.preparadas.clear()
+        if not conn.autocommit:
+            conn.desincronizada = True
+            raise
+        _reiniciar(cursor)
+        _ejecutar_preparada(cursor, nombre, parametros)
@@ -1,21 +1,92 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import threading
+from contextlib import contextmanager
 from flask import current_app, g
 import click
+from psycopg2 import extensions
+from app.db.pool import PoolConexiones
+from app.db.instrumentacion import CursorInstrumentado, init_instrumentacion
+from app.db.consultas import ConexionPreparada
+
+_pool_lock = threading.Lock()
+
+def get_pool(app=None):
+    """Pool del proceso (uno por app), creado en el primer uso."""
+    app = app or current_app._get_current_object()
+    pool = app.extensions.get('pg_pool')
+    if pool is None:
+        with _pool_lock:
+            pool = app.extensions.get('pg_pool')
+            if pool is None:
+                pool = PoolConexiones(
+                    app.config['POSTGRES_URI'],
+                    minimo=app.config['POSTGRES_POOL_MIN'],
+                    maximo=app.config['POSTGRES_POOL_MAX'],
+                    timeout=app.config['POSTGRES_POOL_TIMEOUT'],
+                    chequeo_tras=app.config['POSTGRES_POOL_CHEQUEO_SEG'],
+                    cursor_factory=CursorInstrumentado,  # RealDictCursor con medición
+                    connection_factory=ConexionPreparada  # Recuerda sus sentencias preparadas
+                )
+                app.extensions['pg_pool'] = pool
+    return pool
 
 def get_db():
     if 'db' not in g:
-        g.db = psycopg2.connect(
-            current_app.config['POSTGRES_URI'],
-            cursor_factory=RealDictCursor
-        )
-        g.db.autocommit = True 
+        g.db = get_pool().obtener()
     return g.db
 
+@contextmanager
+def transaccion():
+    """Cursor dentro de una transacción explícita (las conexiones van en autocommit)."""
+    db = get_db()
+    db.autocommit = False
+    try:
+        with db.cursor() as cursor:
+            yield cursor
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.autocommit = True
+
+@contextmanager
+def instantanea():
+    """
+    Cursor de solo lectura en una transacción REPEATABLE READ: todas sus
+    consultas ven la misma foto de la BD, aunque otros confirmen entre medio.
+    Para cargas que combinan versiones_tabla con los datos que versionan.
+    """
+    db = get_db()
+    db.set_session(isolation_level=extensions.ISOLATION_LEVEL_REPEATABLE_READ, readonly=True, autocommit=False)
+    try:
+        with db.cursor() as cursor:
+            yield cursor
+    finally:
+        db.rollback()
+        db.set_session(isolation_level='DEFAULT', readonly='DEFAULT', autocommit=True)
+
+@contextmanager
+def cursor_servidor(itersize=None):
+    """
+    Cursor con nombre (server-side): las filas se traen de a `itersize` al
+    iterar, en vez de cargar todo el resultado en memoria. Necesita una
+    transacción abierta mientras dure la lectura; se cierra con rollback
+    (solo lectura), también si el cliente corta la descarga.
+    """
+    db = get_db()
+    db.autocommit = False
+    try:
+        with db.cursor(name='cursor_servidor') as cursor:
+            cursor.itersize = itersize or current_app.config.get('EXPORTACION_ITERSIZE', 2000)
+            yield cursor
+    finally:
+        db.rollback()
+        db.autocommit = True
+
 def close_db(e=None):
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        get_pool().devolver(db)
 
 def init_db():
     """Crea las tablas en Postgres"""
@@ -29,6 +100,19 @@ def init_db_command():
     init_db()
     click.echo('Base de datos PostgreSQL inicializada.')
 
+@click.command('recalcular-resumenes')
+def recalcular_resumenes_command():
+    """Reconstruye resumen_pedidos_mensual y conteo_estados desde las tablas."""
+    with transaccion() as cursor:
+        cursor.execute("SELECT reconstruir_resumenes()")
+    click.echo('Resúmenes del dashboard recalculados.')
+
 def init_app(app):
+    app.config.setdefault('POSTGRES_POOL_MIN', 1)
+    app.config.setdefault('POSTGRES_POOL_MAX', 10)
+    app.config.setdefault('POSTGRES_POOL_TIMEOUT', 5.0)
+    app.config.setdefault('POSTGRES_POOL_CHEQUEO_SEG', 30.0)
     app.teardown_appcontext(close_db)
-    app.cli.add_command(init_db_command)
\ No newline at end of file
+    init_instrumentacion(app)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(recalcular_resumenes_command)
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask import Response, stream_with_context
+from app.db.database import cursor_servidor
+
+# Exportaciones completas en streaming: las filas se leen con un cursor del
+# servidor (o un cursor de Mongo) y se serializan a medida que llegan, así la
+# memoria no depende del tamaño de la tabla y el primer byte sale antes de
+# que termine la consulta.
+
+FORMATOS_EXPORTACION = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+FILAS_POR_ENVIO = 500  # Se agrupan filas por yield para no enviar trozos diminutos
+
+def _valor_json(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return str(valor)
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, default=_valor_json, ensure_ascii=False)
+    return valor
+
+def _csv(filas, columnas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+    for i, fila in enumerate(filas, start=1):
+        escritor.writerow([_valor_csv(fila.get(c)) for c in columnas])
+        if i % FILAS_POR_ENVIO == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _ndjson(filas, columnas):
+    lineas = []
+    for fila in filas:
+        if columnas:
+            fila = {c: fila.get(c) for c in columnas}
+        lineas.append(json.dumps(fila, default=_valor_json, ensure_ascii=False))
+        if len(lineas) == FILAS_POR_ENVIO:
+            yield '\n'.join(lineas) + '\n'
+            lineas = []
+    if lineas:
+        yield '\n'.join(lineas) + '\n'
+
+def filas_postgres(sql, valores=()):
+    """Filas de `sql` leídas de a EXPORTACION_ITERSIZE con un cursor del servidor."""
+    with cursor_servidor() as cursor:
+        cursor.execute(sql, valores)
+        yield from cursor
+
+def respuesta_exportacion(filas, columnas, formato, nombre):
+    """
+    Response en streaming. `filas` es un iterable perezoso de dicts; se recorre
+    dentro del contexto de la petición (la conexión sigue prestada hasta el
+    final). En NDJSON `columnas` puede ser None para volcar el documento entero.
+    """
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"formato debe ser uno de: {', '.join(FORMATOS_EXPORTACION)}")
+    serializar = _csv if formato == 'csv' else _ndjson
+    return Response(
+        stream_with_context(serializar(filas, columnas)),
+        mimetype=FORMATOS_EXPORTACION[formato],
+        headers={'Content-Disposition': f'attachment; filename={nombre}.{formato}'}
+    )
@@ -0,0 +1,274 @@
+import csv
+import io
+import json
+import math
+from collections import namedtuple
+from datetime import date
+from itertools import islice
+import click
+from flask import current_app, request, jsonify
+from app.db.database import transaccion
+from app.db.versiones import incrementar_version
+from app.services.atp import invalidar_linea_atp, TABLAS_ATP
+from app.services.cultivo import fecha_cosecha_estimada
+
+# Carga masiva: el archivo se lee en bloques, cada bloque se valida en Python
+# y las filas válidas entran con COPY a una tabla temporal; al final un solo
+# INSERT ... SELECT las pasa a la tabla real, todo en una transacción.
+
+FORMATOS = ('csv', 'ndjson')
+
+# --- Reglas de validación: reciben el valor crudo y devuelven el convertido ---
+
+def texto(maximo, obligatorio=True, defecto=None):
+    def regla(valor):
+        valor = str(valor).strip() if valor is not None else ''
+        if not valor:
+            if obligatorio:
+                raise ValueError("obligatorio")
+            return defecto
+        if len(valor) > maximo:
+            raise ValueError(f"supera {maximo} caracteres")
+        return valor
+    return regla
+
+def positivo(maximo=99999999.99):
+    """Número > 0 que cabe en NUMERIC(10,2)."""
+    def regla(valor):
+        try:
+            numero = float(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"número inválido: {valor!r}")
+        if not math.isfinite(numero) or numero <= 0 or numero > maximo:
+            raise ValueError(f"debe ser mayor que 0 y menor que {maximo:.0f}")
+        return numero
+    return regla
+
+def fecha():
+    def regla(valor):
+        try:
+            return date.fromisoformat(str(valor).strip())
+        except (TypeError, ValueError):
+            raise ValueError(f"fecha inválida (YYYY-MM-DD): {valor!r}")
+    return regla
+
+def opcion(validos, defecto):
+    def regla(valor):
+        valor = str(valor).strip() if valor is not None else ''
+        if not valor:
+            return defecto
+        if valor not in validos:
+            raise ValueError(f"debe ser uno de: {', '.join(validos)}")
+        return valor
+    return regla
+
+# tabla, (campo, regla) en orden de columnas, derivar(valores) -> columnas extra
+# calculadas, nombres de esas columnas y columna UNIQUE (duplicados = error)
+Especificacion = namedtuple('Especificacion', 'tabla reglas derivar derivadas unica')
+
+def _cosecha(valores):
+    tipo_alga, _, fecha_inicio, _ = valores
+    return (fecha_cosecha_estimada(fecha_inicio, tipo_alga),)
+
+IMPORTACIONES = {
+    'pedidos': Especificacion('pedidos', (
+        ('cliente', texto(100)),
+        ('producto', texto(50, obligatorio=False, defecto='Pellet Estándar')),
+        ('cantidad_ton', positivo()),
+        ('fecha_entrega', fecha()),
+        ('estado', opcion(('pendiente', 'entregado', 'cancelado'), 'pendiente')),
+    ), None, (), None),
+    'lotes': Especificacion('lotes', (
+        ('tipo_alga', texto(50)),
+        ('superficie', positivo()),
+        ('fecha_inicio', fecha()),
+        ('estado', opcion(('activo', 'cosechado'), 'activo')),
+    ), _cosecha, ('fecha_cosecha_estimada',), None),
+    'clientes': Especificacion('clientes', (
+        ('empresa', texto(100)),
+        ('contacto', texto(100, obligatorio=False)),
+        ('email', texto(100, obligatorio=False)),
+        ('telefono', texto(20, obligatorio=False)),
+        ('direccion', texto(1000, obligatorio=False)),
+        ('estado', opcion(('activo', 'inactivo'), 'activo')),
+    ), None, (), 'empresa'),
+}
+
+def leer_filas(archivo, formato):
+    """(linea, dict o None, error) por cada registro de un archivo binario."""
+    texto_archivo = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    if formato == 'csv':
+        lector = csv.DictReader(texto_archivo)
+        for fila in lector:
+            if None in fila:
+                yield lector.line_num, None, 'más columnas que el encabezado'
+            else:
+                yield lector.line_num, fila, None
+    else:
+        for linea, contenido in enumerate(texto_archivo, start=1):
+            if not contenido.strip():
+                continue
+            try:
+                fila = json.loads(contenido)
+            except ValueError as e:
+                yield linea, None, f'JSON inválido: {e}'
+                continue
+            if isinstance(fila, dict):
+                yield linea, fila, None
+            else:
+                yield linea, None, 'se esperaba un objeto JSON'
+
+def _validar(spec, fila):
+    valores, errores = [], []
+    for campo, regla in spec.reglas:
+        try:
+            valores.append(regla(fila.get(campo)))
+        except ValueError as e:
+            errores.append(f"{campo}: {e}")
+    if not errores and spec.derivar:
+        valores.extend(spec.derivar(valores))
+    return valores, errores
+
+def importar(entidad, archivo, formato='csv', solo_validar=False):
+    """
+    Importa `archivo` (binario, CSV con encabezado o NDJSON) en la tabla de
+    `entidad`. Las filas inválidas no se cargan y se informan con su número de
+    línea; con solo_validar no se escribe nada. Lanza ValueError si la
+    entidad/formato no existen o el archivo supera IMPORTACION_MAX_FILAS.
+    """
+    if entidad not in IMPORTACIONES:
+        raise ValueError(f"Entidad desconocida: {entidad} (use {', '.join(IMPORTACIONES)})")
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato} (use {', '.join(FORMATOS)})")
+    spec = IMPORTACIONES[entidad]
+    config = current_app.config
+    tam_bloque = config.get('IMPORTACION_TAM_BLOQUE', 5000)
+    max_filas = config.get('IMPORTACION_MAX_FILAS', 200000)
+    max_errores = config.get('IMPORTACION_MAX_ERRORES', 500)
+
+    columnas = [campo for campo, _ in spec.reglas] + list(spec.derivadas)
+    lista_columnas = ', '.join(columnas)
+    errores, total_errores, leidas, validas, insertadas = [], 0, 0, 0, 0
+
+    def anotar(linea, mensajes):
+        nonlocal total_errores
+        total_errores += 1
+        if len(errores) < max_errores:
+            errores.append({'linea': linea, 'errores': mensajes})
+
+    with transaccion() as cursor:
+        cursor.execute(f"""
+            CREATE TEMP TABLE carga ON COMMIT DROP AS
+            SELECT 0 AS linea, {lista_columnas} FROM {spec.tabla} WITH NO DATA
+        """)
+        filas = leer_filas(archivo, formato)
+        while True:
+            bloque = list(islice(filas, tam_bloque))
+            if not bloque:
+                break
+            leidas += len(bloque)
+            if leidas > max_filas:
+                raise ValueError(f"El archivo supera el máximo de {max_filas} filas")
+
+            buffer = io.StringIO()
+            escritor = csv.writer(buffer)
+            for linea, fila, error in bloque:
+                if error:
+                    anotar(linea, [error])
+                    continue
+                valores, mensajes = _validar(spec, fila)
+                if mensajes:
+                    anotar(linea, mensajes)
+                    continue
+                escritor.writerow([linea] + ['' if v is None else v for v in valores])
+                validas += 1
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY carga (linea, {lista_columnas}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+        if spec.unica:
+            # Repetidos dentro del archivo (vale la primera aparición) o ya existentes en la tabla
+            cursor.execute(f"""
+                DELETE FROM carga c
+                USING (
+                    SELECT linea,
+                           EXISTS (SELECT 1 FROM {spec.tabla} t WHERE t.{spec.unica} = k.{spec.unica}) AS existe,
+                           MIN(linea) OVER (PARTITION BY {spec.unica}) AS primera
+                    FROM carga k
+                ) d
+                WHERE c.linea = d.linea AND (d.existe OR d.linea <> d.primera)
+                RETURNING c.linea, c.{spec.unica} AS valor, d.existe, d.primera
+            """)
+            for fila in sorted(cursor.fetchall(), key=lambda f: f['linea']):
+                motivo = 'ya existe' if fila['existe'] else f"repetido en la línea {fila['primera']}"
+                anotar(fila['linea'], [f"{spec.unica}: {fila['valor']} {motivo}"])
+                validas -= 1
+
+        if not solo_validar and validas:
+            conflicto = f" ON CONFLICT ({spec.unica}) DO NOTHING" if spec.unica else ""
+            cursor.execute(f"""
+                INSERT INTO {spec.tabla} ({lista_columnas})
+                SELECT {lista_columnas} FROM carga ORDER BY linea{conflicto}
+            """)
+            insertadas = cursor.rowcount
+            if insertadas:
+                incrementar_version(cursor, spec.tabla)
+
+    if insertadas and spec.tabla in TABLAS_ATP:
+        invalidar_linea_atp()
+    errores.sort(key=lambda e: e['linea'])
+    return {
+        'entidad': entidad,
+        'solo_validar': solo_validar,
+        'filas_leidas': leidas,
+        'filas_validas': validas,
+        'insertadas': insertadas,
+        'con_errores': total_errores,
+        'errores': errores,
+        'errores_truncados': total_errores > len(errores)
+    }
+
+def _formato(nombre, tipo):
+    if (nombre or '').lower().endswith(('.ndjson', '.jsonl')) or 'ndjson' in (tipo or ''):
+        return 'ndjson'
+    return 'csv'
+
+def importar_desde_peticion(entidad):
+    """
+    Vista común de POST /api/<entidad>/importar: archivo multipart en el campo
+    'archivo' o el cuerpo crudo (text/csv, application/x-ndjson).
+    ?formato=csv|ndjson fuerza el formato; ?solo_validar=1 no escribe.
+    """
+    if 'archivo' in request.files:
+        subido = request.files['archivo']
+        archivo, formato = subido.stream, _formato(subido.filename, subido.mimetype)
+    else:
+        archivo, formato = request.stream, _formato(None, request.mimetype)
+    formato = request.args.get('formato', formato)
+    solo_validar = request.args.get('solo_validar', '').lower() in ('1', 'true', 'si')
+
+    try:
+        resultado = importar(entidad, archivo, formato, solo_validar)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify(resultado), (200 if solo_validar or not resultado['insertadas'] else 201)
+
+@click.command('importar')
+@click.argument('entidad', type=click.Choice(list(IMPORTACIONES)))
+@click.argument('ruta', type=click.Path(exists=True, dir_okay=False))
+@click.option('--formato', type=click.Choice(FORMATOS), default=None, help='Por defecto según la extensión.')
+@click.option('--solo-validar', is_flag=True, help='Valida sin escribir en la BD.')
+def importar_command(entidad, ruta, formato, solo_validar):
+    """Carga masiva de pedidos, lotes o clientes desde CSV/NDJSON."""
+    with open(ruta, 'rb') as archivo:
+        resultado = importar(entidad, archivo, formato or _formato(ruta, None), solo_validar)
+    click.echo(f"{resultado['filas_leidas']} filas leídas, {resultado['insertadas']} insertadas, "
+               f"{resultado['con_errores']} con errores.")
+    for error in resultado['errores']:
+        click.echo(f"  línea {error['linea']}: {'; '.join(error['errores'])}")
+    if resultado['errores_truncados']:
+        click.echo("  (lista de errores truncada)")
+
+def init_importacion(app):
+    app.cli.add_command(importar_command)
@@ -0,0 +1,167 @@
+import json
+import logging
+import re
+import time
+from psycopg2 import extensions, Error as ErrorPostgres
+from psycopg2.extras import RealDictCursor
+from flask import current_app, g, request, has_request_context
+
+# Medición de las consultas por petición: get_db() entrega conexiones cuyos
+# cursores cronometran cada sentencia. Al final de la petición los totales van
+# a la cabecera Server-Timing y a un log estructurado (un JSON por línea); las
+# sentencias sobre DB_CONSULTA_LENTA_MS se registran aparte, con los
+# parámetros reemplazados por su tipo y, opcionalmente, con su EXPLAIN.
+
+logger = logging.getLogger('algatrack.db')
+
+SQL_MAX_LOG = 2000  # Caracteres de SQL que se guardan en el log
+_ESPACIOS = re.compile(r'\s+')
+# Constantes que el planificador copia en Filter/Index Cond: '...' y números sueltos
+_LITERALES = re.compile(r"'(?:[^']|'')*'|(?<![\w.$])-?\d+(?:\.\d+)?(?![\w.])")
+
+def _texto_sql(cursor, query):
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    elif hasattr(query, 'as_string'):  # psycopg2.sql.Composable
+        query = query.as_string(cursor.connection)
+    return _ESPACIOS.sub(' ', query).strip()[:SQL_MAX_LOG]
+
+def _redactar(valor):
+    """Parámetros sin sus valores: solo el tipo (y el largo de las listas)."""
+    if isinstance(valor, dict):
+        return {k: _redactar(v) for k, v in valor.items()}
+    if isinstance(valor, tuple):
+        return [_redactar(v) for v in valor]
+    if isinstance(valor, list):
+        return f'<list[{len(valor)}]>'
+    return f'<{type(valor).__name__}>'
+
+def _redactar_plan(nodo):
+    """El plan se pide con los valores reales; se quitan antes de loguearlo."""
+    if isinstance(nodo, dict):
+        return {k: _redactar_plan(v) for k, v in nodo.items()}
+    if isinstance(nodo, list):
+        return [_redactar_plan(v) for v in nodo]
+    if isinstance(nodo, str):
+        return _LITERALES.sub('?', nodo)
+    return nodo
+
+def _explicar(cursor, query, vars):
+    """Plan estimado (sin ANALYZE: la sentencia no se vuelve a ejecutar)."""
+    conn = cursor.connection
+    en_transaccion = not conn.autocommit
+    with conn.cursor(cursor_factory=extensions.cursor) as explicador:
+        # Un error dentro de la transacción la dejaría abortada: se aísla en un savepoint
+        if en_transaccion:
+            explicador.execute("SAVEPOINT explain_lenta")
+        try:
+            explicador.execute(b"EXPLAIN (FORMAT JSON) " + explicador.mogrify(query, vars))
+            plan = _redactar_plan(explicador.fetchone()[0])
+        except ErrorPostgres as e:
+            plan = f'no disponible: {str(e).strip()}'
+            if en_transaccion:
+                explicador.execute("ROLLBACK TO SAVEPOINT explain_lenta")
+        if en_transaccion:
+            explicador.execute("RELEASE SAVEPOINT explain_lenta")
+        return plan
+
+def _registrar(cursor, query, vars, segundos, exito):
+    if not has_request_context() or 'consultas_db' not in g:
+        return  # CLI, hilos de fondo, etc.
+    ms = segundos * 1000
+    stats = g.consultas_db
+    stats['consultas'] += 1
+    stats['ms'] += ms
+    if ms > stats['max_ms']:
+        stats['max_ms'], stats['max_sql'] = ms, _texto_sql(cursor, query)[:200]
+
+    if ms < current_app.config.get('DB_CONSULTA_LENTA_MS', 500):
+        return
+    sql = _texto_sql(cursor, query)
+    evento = {
+        'evento': 'consulta_lenta',
+        'metodo': request.method,
+        'ruta': request.path,
+        'ms': round(ms, 2),
+        'sql': sql,
+        'parametros': None if vars is None else _redactar(vars),
+        'error': not exito,
+    }
+    # Solo lecturas de cursores normales (en uno con nombre la sentencia es un DECLARE);
+    # EXECUTE son las consultas preparadas de app.db.consultas, todas SELECT
+    if (exito and cursor.name is None and current_app.config.get('DB_EXPLAIN_LENTAS', False)
+            and sql.split(' ', 1)[0].upper() in ('SELECT', 'WITH', 'EXECUTE')):
+        evento['plan'] = _explicar(cursor, query, vars)
+    logger.warning(json.dumps(evento, ensure_ascii=False, default=str))
+
+class CursorInstrumentado(RealDictCursor):
+    """RealDictCursor que cronometra execute, executemany y copy_expert."""
+
+    def execute(self, query, vars=None):
+        inicio, exito = time.perf_counter(), False
+        try:
+            resultado = super().execute(query, vars)
+            exito = True
+            return resultado
+        finally:
+            _registrar(self, query, vars, time.perf_counter() - inicio, exito)
+
+    def executemany(self, query, vars_list):
+        inicio, exito = time.perf_counter(), False
+        try:
+            resultado = super().executemany(query, vars_list)
+            exito = True
+            return resultado
+        finally:
+            _registrar(self, query, None, time.perf_counter() - inicio, exito)
+
+    def copy_expert(self, sql, file, size=8192):
+        inicio, exito = time.perf_counter(), False
+        try:
+            resultado = super().copy_expert(sql, file, size)
+            exito = True
+            return resultado
+        finally:
+            _registrar(self, sql, None, time.perf_counter() - inicio, exito)
+
+def _iniciar_medicion():
+    g.consultas_db = {'consultas': 0, 'ms': 0.0, 'max_ms': 0.0, 'max_sql': None}
+    g.inicio_peticion = time.perf_counter()
+
+def _cerrar_medicion(respuesta):
+    stats = g.pop('consultas_db', None)
+    if stats is None:
+        return respuesta
+    total_ms = (time.perf_counter() - g.pop('inicio_peticion')) * 1000
+    config = current_app.config
+
+    if config.get('DB_SERVER_TIMING', True):
+        metricas = [f'db;dur={stats["ms"]:.2f};desc="{stats["consultas"]} consultas"']
+        if stats['consultas']:
+            metricas.append(f'db-max;dur={stats["max_ms"]:.2f}')
+        metricas.append(f'app;dur={total_ms - stats["ms"]:.2f}')
+        respuesta.headers.add('Server-Timing', ', '.join(metricas))
+
+    logger.info(json.dumps({
+        'evento': 'peticion',
+        'metodo': request.method,
+        'ruta': request.path,
+        'endpoint': request.endpoint,
+        'estado': respuesta.status_code,
+        'ms': round(total_ms, 2),
+        'consultas': stats['consultas'],
+        'db_ms': round(stats['ms'], 2),
+        'db_max_ms': round(stats['max_ms'], 2),
+        'db_max_sql': stats['max_sql'],
+    }, ensure_ascii=False))
+    return respuesta
+
+def init_instrumentacion(app):
+    app.before_request(_iniciar_medicion)
+    app.after_request(_cerrar_medicion)
+    logger.setLevel(app.config.get('DB_LOG_NIVEL', 'INFO'))
+    if not logger.handlers and not logging.getLogger().handlers:
+        # Sin configuración de logging (p.ej. gunicorn sin --log-config): a stderr
+        manejador = logging.StreamHandler()
+        manejador.setFormatter(logging.Formatter('%(asctime)s %(name)s %(levelname)s %(message)s'))
+        logger.addHandler(manejador)
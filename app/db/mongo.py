@@ -1,16 +1,115 @@
+import os
+import threading
+import time
 from pymongo import MongoClient
 from flask import current_app, g
 
+class CircuitoMongo:
+    """
+    Corta el acceso a Mongo tras varios fallos seguidos.
+    - cerrado: se usa Mongo normalmente.
+    - abierto: se omite Mongo sin intentar conectar durante `reintento_seg`.
+    - semiabierto: pasado ese tiempo se deja pasar UN intento de prueba;
+      si funciona vuelve a cerrado, si falla se abre otra vez.
+    """
+
+    def __init__(self, umbral_fallos=3, reintento_seg=30.0):
+        self.umbral_fallos = umbral_fallos
+        self.reintento_seg = reintento_seg
+        self._lock = threading.Lock()
+        self._fallos = 0
+        self._abierto_desde = None
+        self._probando = False
+
+    def permite(self):
+        with self._lock:
+            if self._abierto_desde is None:
+                return True
+            if self._probando or time.monotonic() - self._abierto_desde < self.reintento_seg:
+                return False
+            self._probando = True
+            return True
+
+    def disponible(self):
+        """Como permite() pero sin tomar el intento de prueba."""
+        with self._lock:
+            return self._abierto_desde is None or (
+                not self._probando and time.monotonic() - self._abierto_desde >= self.reintento_seg)
+
+    def registrar_exito(self):
+        with self._lock:
+            self._fallos = 0
+            self._abierto_desde = None
+            self._probando = False
+
+    def registrar_fallo(self):
+        with self._lock:
+            self._fallos += 1
+            if self._probando or self._fallos >= self.umbral_fallos:
+                self._abierto_desde = time.monotonic()
+            self._probando = False
+
+    def estado(self):
+        with self._lock:
+            if self._abierto_desde is None:
+                return 'cerrado'
+            return 'semiabierto' if self._probando else 'abierto'
+
+_lock = threading.Lock()
+_cliente = None
+_cliente_pid = None
+_circuito = None
+
+def get_circuito(config=None):
+    global _circuito
+    if _circuito is None:
+        config = config or current_app.config
+        with _lock:
+            if _circuito is None:
+                _circuito = CircuitoMongo(
+                    config['MONGO_CIRCUITO_FALLOS'],
+                    config['MONGO_CIRCUITO_REINTENTO_SEG']
+                )
+    return _circuito
+
+def get_mongo_client(config=None):
+    """Un MongoClient por proceso, creado en el primer uso y reutilizado."""
+    global _cliente, _cliente_pid
+    # Tras un fork el cliente del padre no sirve (pymongo no es fork-safe)
+    if _cliente is None or _cliente_pid != os.getpid():
+        config = config or current_app.config
+        with _lock:
+            if _cliente is None or _cliente_pid != os.getpid():
+                _cliente = MongoClient(
+                    config['MONGO_URI'],
+                    maxPoolSize=config['MONGO_MAX_POOL_SIZE'],
+                    connectTimeoutMS=config['MONGO_CONNECT_TIMEOUT_MS'],
+                    serverSelectionTimeoutMS=config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+                    socketTimeoutMS=config['MONGO_SOCKET_TIMEOUT_MS']
+                )
+                _cliente_pid = os.getpid()
+    return _cliente
+
 def get_mongo_db():
+    """Base NoSQL o None si Mongo no está disponible (circuito abierto)."""
     if 'mongo_db' not in g:
-        mongo_uri = current_app.config.get('MONGO_URI', 'mongodb://localhost:27017/')
+        if not get_circuito().disponible():
+            return None
         try:
-            client = MongoClient(mongo_uri)
-            g.mongo_db = client['algatrack_nosql'] 
+            g.mongo_db = get_mongo_client()['algatrack_nosql']
         except Exception as e:
             print(f"Error conectando a Mongo: {e}")
+            get_circuito().registrar_fallo()
             g.mongo_db = None
     return g.mongo_db
 
 def init_mongo(app):
-    app.config.setdefault('MONGO_URI', 'mongodb://localhost:27017/')
\ No newline at end of file
+    app.config.setdefault('MONGO_URI', 'mongodb://localhost:27017/')
+    if not app.config['MONGO_URI']:
+        app.config['MONGO_URI'] = 'mongodb://localhost:27017/'
+    app.config.setdefault('MONGO_MAX_POOL_SIZE', 10)
+    app.config.setdefault('MONGO_CONNECT_TIMEOUT_MS', 2000)
+    app.config.setdefault('MONGO_SERVER_SELECTION_TIMEOUT_MS', 2000)
+    app.config.setdefault('MONGO_SOCKET_TIMEOUT_MS', 5000)
+    app.config.setdefault('MONGO_CIRCUITO_FALLOS', 3)
+    app.config.setdefault('MONGO_CIRCUITO_REINTENTO_SEG', 30.0)
\ No newline at end of file
@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+import weakref
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolAgotado(Exception):
+    """No se pudo obtener una conexión dentro del tiempo de espera."""
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones PostgreSQL compartido por todo el proceso.
+
+    - Mantiene entre `minimo` y `maximo` conexiones abiertas.
+    - `obtener()` espera hasta `timeout` segundos si todas están ocupadas.
+    - Verifica la conexión al prestarla (chequeo local siempre, SELECT 1 si
+      estuvo inactiva más de `chequeo_tras` segundos).
+    - `devolver()` limpia el estado (rollback, autocommit) antes de reutilizarla.
+    - Tras un fork (workers de gunicorn) el hijo descarta las conexiones del
+      padre sin cerrarlas y abre las suyas.
+    """
+
+    def __init__(self, dsn, minimo=1, maximo=10, timeout=5.0, chequeo_tras=30.0, **kwargs):
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError("Tamaño de pool inválido")
+        self.dsn = dsn
+        self.minimo = minimo
+        self.maximo = maximo
+        self.timeout = timeout
+        self.chequeo_tras = chequeo_tras
+        self.kwargs = kwargs
+
+        self._cond = threading.Condition()
+        self._libres = []        # [(conexion, instante_devolucion)]
+        self._en_uso = set()     # ids de conexiones prestadas
+        self._total = 0
+        self._pid = os.getpid()
+        self._heredadas = []     # Conexiones del proceso padre (no se cierran)
+
+        self._esperas = 0
+        self._tiempo_espera_total = 0.0
+        self._tiempo_espera_max = 0.0
+        self._agotados = 0
+        self._descartadas = 0
+        self._prestamos = 0
+
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() and ref()._reiniciar_tras_fork())
+
+        for _ in range(minimo):
+            self._libres.append((self._conectar(), time.monotonic()))
+            self._total += 1
+
+    def _conectar(self):
+        conn = psycopg2.connect(self.dsn, **self.kwargs)
+        conn.autocommit = True
+        return conn
+
+    def _reiniciar_tras_fork(self):
+        # Un socket compartido entre padre e hijo corrompe el protocolo: el hijo
+        # olvida las conexiones heredadas (sin close(), que avisaría al servidor).
+        self._heredadas.extend(c for c, _ in self._libres)
+        self._libres = []
+        self._en_uso = set()
+        self._total = 0
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+
+    def _esta_sana(self, conn, inactiva_desde):
+        if conn.closed:
+            return False
+        if conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - inactiva_desde < self.chequeo_tras:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _cerrar(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def obtener(self):
+        if os.getpid() != self._pid:
+            self._reiniciar_tras_fork()
+        inicio = time.monotonic()
+        limite = inicio + self.timeout
+        espero = False
+
+        with self._cond:
+            while True:
+                if self._libres:
+                    conn, desde = self._libres.pop()
+                    break
+                if self._total < self.maximo:
+                    self._total += 1
+                    conn, desde = None, None
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._agotados += 1
+                    raise PoolAgotado(f"Sin conexiones libres tras {self.timeout}s (máximo {self.maximo})")
+                espero = True
+                self._cond.wait(restante)
+
+            self._prestamos += 1
+            if espero:
+                esperado = time.monotonic() - inicio
+                self._esperas += 1
+                self._tiempo_espera_total += esperado
+                self._tiempo_espera_max = max(self._tiempo_espera_max, esperado)
+
+        # La red queda fuera del lock: conectar o chequear no bloquea a los demás
+        try:
+            if conn is not None and not self._esta_sana(conn, desde):
+                self._cerrar(conn)
+                with self._cond:
+                    self._descartadas += 1
+                conn = None
+            if conn is None:
+                conn = self._conectar()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._en_uso.add(id(conn))
+        return conn
+
+    def _limpiar(self, conn):
+        """Deja la conexión como recién creada. Devuelve False si no sirve."""
+        if conn.closed:
+            return False
+        try:
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if not conn.autocommit:
+                conn.autocommit = True
+            if conn.readonly or conn.deferrable or conn.isolation_level != extensions.ISOLATION_LEVEL_DEFAULT:
+                conn.set_session(isolation_level='DEFAULT', readonly='DEFAULT', deferrable='DEFAULT')
+            return True
+        except psycopg2.Error:
+            return False
+
+    def devolver(self, conn):
+        if os.getpid() != self._pid:
+            # Conexión prestada antes del fork: pertenece al padre
+            return
+        with self._cond:
+            if id(conn) not in self._en_uso:
+                return
+            self._en_uso.discard(id(conn))
+
+        if self._limpiar(conn):
+            with self._cond:
+                self._libres.append((conn, time.monotonic()))
+                self._cond.notify()
+        else:
+            self._cerrar(conn)
+            with self._cond:
+                self._total -= 1
+                self._descartadas += 1
+                self._cond.notify()
+
+    def cerrar_todo(self):
+        with self._cond:
+            libres, self._libres = self._libres, []
+            self._total -= len(libres)
+        for conn, _ in libres:
+            self._cerrar(conn)
+
+    def estadisticas(self):
+        with self._cond:
+            return {
+                'en_uso': len(self._en_uso),
+                'libres': len(self._libres),
+                'total': self._total,
+                'minimo': self.minimo,
+                'maximo': self.maximo,
+                'prestamos': self._prestamos,
+                'esperas': self._esperas,
+                'tiempo_espera_total_ms': round(self._tiempo_espera_total * 1000, 2),
+                'tiempo_espera_max_ms': round(self._tiempo_espera_max * 1000, 2),
+                'agotados': self._agotados,
+                'descartadas': self._descartadas,
+            }
@@ -4,6 +4,9 @@ DROP TABLE IF EXISTS lotes CASCADE;
 DROP TABLE IF EXISTS clientes CASCADE;
 DROP TABLE IF EXISTS usuarios CASCADE;
 DROP TABLE IF EXISTS auditoria CASCADE;
+DROP TABLE IF EXISTS versiones_tabla CASCADE;
+DROP TABLE IF EXISTS resumen_pedidos_mensual CASCADE;
+DROP TABLE IF EXISTS conteo_estados CASCADE;
 
 -- En Postgres usamos SERIAL en lugar de AUTOINCREMENT
 CREATE TABLE usuarios (
@@ -12,6 +15,7 @@ CREATE TABLE usuarios (
     contrasena TEXT NOT NULL,
     email VARCHAR(100) UNIQUE NOT NULL,
     rol VARCHAR(20) NOT NULL,
+    version_sesion INTEGER NOT NULL DEFAULT 1, -- Se incrementa para revocar sesiones abiertas
     creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -35,6 +39,13 @@ CREATE TABLE pedidos (
     creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Consultas por ventana de fechas (calendario): rango sobre la fecha, estado filtrado en el índice
+CREATE INDEX idx_lotes_cosecha_estado ON lotes (fecha_cosecha_estimada, estado);
+CREATE INDEX idx_pedidos_entrega_estado ON pedidos (fecha_entrega, estado);
+-- Llaves de los listados paginados (keyset): ORDER BY + WHERE (fecha, id) > (...)
+CREATE INDEX idx_lotes_inicio_id ON lotes (fecha_inicio, id);
+CREATE INDEX idx_pedidos_entrega_id ON pedidos (fecha_entrega, id);
+
 CREATE TABLE clientes (
     id SERIAL PRIMARY KEY,
     empresa VARCHAR(100) UNIQUE NOT NULL, -- Nombre de la Razón Social
@@ -99,4 +110,136 @@ INSERT INTO configuracion_estacional
 VALUES 
 ('Invierno', '5,6,7,8', 0.70, 0.60, 1.40, 0.80, 'Frio ralentiza crecimiento y secado, aumenta gasto energia'),
 ('Verano',   '1,2,12',  1.20, 1.10, 1.00, 1.20, 'Calor acelera biomasa y secado eficiente'),
-('Media',    '3,4,9,10,11', 1.00, 1.00, 1.10, 1.00, 'Condiciones estandar de operacion');
\ No newline at end of file
+('Media',    '3,4,9,10,11', 1.00, 1.00, 1.10, 1.00, 'Condiciones estandar de operacion');
+
+-- Contador de cambios por tabla: los workers comparan su copia en memoria
+-- (p.ej. la configuración de simulación) con este número para detectar cambios
+CREATE TABLE versiones_tabla (
+    tabla VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO versiones_tabla (tabla, version) VALUES
+('parametros_sistema', 1),
+('configuracion_estacional', 1),
+('lotes', 1),
+('pedidos', 1),
+('clientes', 1),
+('usuarios', 1);
+
+-- =====================================================================
+-- RESÚMENES PARA EL DASHBOARD (mantenidos por triggers)
+-- Cada INSERT/UPDATE/DELETE aplica solo su delta, agregado por sentencia
+-- (tablas de transición), así también cubre cargas y cambios masivos.
+-- =====================================================================
+
+-- Toneladas y cantidad de pedidos por mes de entrega y estado
+CREATE TABLE resumen_pedidos_mensual (
+    mes DATE NOT NULL,                 -- Primer día del mes
+    estado VARCHAR(20) NOT NULL,
+    total_ton NUMERIC(14,2) NOT NULL DEFAULT 0,
+    pedidos INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (mes, estado)
+);
+
+-- Filas por estado de cada tabla (KPIs: lotes activos, pedidos pendientes)
+CREATE TABLE conteo_estados (
+    tabla VARCHAR(50) NOT NULL,
+    estado VARCHAR(20) NOT NULL,
+    cantidad BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tabla, estado)
+);
+
+CREATE OR REPLACE FUNCTION fn_resumen_pedidos() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO resumen_pedidos_mensual (mes, estado, total_ton, pedidos)
+        SELECT date_trunc('month', fecha_entrega)::date, COALESCE(estado, 'sin_estado'), SUM(cantidad_ton), COUNT(*)
+        FROM nuevas GROUP BY 1, 2
+        ON CONFLICT (mes, estado) DO UPDATE
+        SET total_ton = resumen_pedidos_mensual.total_ton + EXCLUDED.total_ton,
+            pedidos = resumen_pedidos_mensual.pedidos + EXCLUDED.pedidos;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO resumen_pedidos_mensual (mes, estado, total_ton, pedidos)
+        SELECT date_trunc('month', fecha_entrega)::date, COALESCE(estado, 'sin_estado'), -SUM(cantidad_ton), -COUNT(*)
+        FROM viejas GROUP BY 1, 2
+        ON CONFLICT (mes, estado) DO UPDATE
+        SET total_ton = resumen_pedidos_mensual.total_ton + EXCLUDED.total_ton,
+            pedidos = resumen_pedidos_mensual.pedidos + EXCLUDED.pedidos;
+    ELSE
+        INSERT INTO resumen_pedidos_mensual (mes, estado, total_ton, pedidos)
+        SELECT mes, estado, SUM(ton), SUM(n) FROM (
+            SELECT date_trunc('month', fecha_entrega)::date AS mes, COALESCE(estado, 'sin_estado') AS estado,
+                   -cantidad_ton AS ton, -1 AS n FROM viejas
+            UNION ALL
+            SELECT date_trunc('month', fecha_entrega)::date, COALESCE(estado, 'sin_estado'),
+                   cantidad_ton, 1 FROM nuevas
+        ) d GROUP BY 1, 2
+        ON CONFLICT (mes, estado) DO UPDATE
+        SET total_ton = resumen_pedidos_mensual.total_ton + EXCLUDED.total_ton,
+            pedidos = resumen_pedidos_mensual.pedidos + EXCLUDED.pedidos;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Genérica: sirve para cualquier tabla con columna estado
+CREATE OR REPLACE FUNCTION fn_conteo_estados() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO conteo_estados (tabla, estado, cantidad)
+        SELECT TG_TABLE_NAME, COALESCE(estado, 'sin_estado'), COUNT(*) FROM nuevas GROUP BY 2
+        ON CONFLICT (tabla, estado) DO UPDATE SET cantidad = conteo_estados.cantidad + EXCLUDED.cantidad;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO conteo_estados (tabla, estado, cantidad)
+        SELECT TG_TABLE_NAME, COALESCE(estado, 'sin_estado'), -COUNT(*) FROM viejas GROUP BY 2
+        ON CONFLICT (tabla, estado) DO UPDATE SET cantidad = conteo_estados.cantidad + EXCLUDED.cantidad;
+    ELSE
+        INSERT INTO conteo_estados (tabla, estado, cantidad)
+        SELECT TG_TABLE_NAME, estado, SUM(n) FROM (
+            SELECT COALESCE(estado, 'sin_estado') AS estado, -1 AS n FROM viejas
+            UNION ALL
+            SELECT COALESCE(estado, 'sin_estado'), 1 FROM nuevas
+        ) d GROUP BY 2
+        ON CONFLICT (tabla, estado) DO UPDATE SET cantidad = conteo_estados.cantidad + EXCLUDED.cantidad;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_resumen_pedidos_ins AFTER INSERT ON pedidos
+    REFERENCING NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION fn_resumen_pedidos();
+CREATE TRIGGER trg_resumen_pedidos_upd AFTER UPDATE ON pedidos
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION fn_resumen_pedidos();
+CREATE TRIGGER trg_resumen_pedidos_del AFTER DELETE ON pedidos
+    REFERENCING OLD TABLE AS viejas FOR EACH STATEMENT EXECUTE FUNCTION fn_resumen_pedidos();
+
+CREATE TRIGGER trg_conteo_pedidos_ins AFTER INSERT ON pedidos
+    REFERENCING NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION fn_conteo_estados();
+CREATE TRIGGER trg_conteo_pedidos_upd AFTER UPDATE ON pedidos
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION fn_conteo_estados();
+CREATE TRIGGER trg_conteo_pedidos_del AFTER DELETE ON pedidos
+    REFERENCING OLD TABLE AS viejas FOR EACH STATEMENT EXECUTE FUNCTION fn_conteo_estados();
+
+CREATE TRIGGER trg_conteo_lotes_ins AFTER INSERT ON lotes
+    REFERENCING NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION fn_conteo_estados();
+CREATE TRIGGER trg_conteo_lotes_upd AFTER UPDATE ON lotes
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION fn_conteo_estados();
+CREATE TRIGGER trg_conteo_lotes_del AFTER DELETE ON lotes
+    REFERENCING OLD TABLE AS viejas FOR EACH STATEMENT EXECUTE FUNCTION fn_conteo_estados();
+
+-- Recalcula ambos resúmenes desde cero (p.ej. tras restaurar un respaldo)
+CREATE OR REPLACE FUNCTION reconstruir_resumenes() RETURNS void AS $$
+BEGIN
+    LOCK TABLE pedidos, lotes IN SHARE MODE;
+    DELETE FROM resumen_pedidos_mensual;
+    INSERT INTO resumen_pedidos_mensual (mes, estado, total_ton, pedidos)
+    SELECT date_trunc('month', fecha_entrega)::date, COALESCE(estado, 'sin_estado'), SUM(cantidad_ton), COUNT(*)
+    FROM pedidos GROUP BY 1, 2;
+    DELETE FROM conteo_estados;
+    INSERT INTO conteo_estados (tabla, estado, cantidad)
+    SELECT 'pedidos', COALESCE(estado, 'sin_estado'), COUNT(*) FROM pedidos GROUP BY 2
+    UNION ALL
+    SELECT 'lotes', COALESCE(estado, 'sin_estado'), COUNT(*) FROM lotes GROUP BY 2;
+END;
+$$ LANGUAGE plpgsql;
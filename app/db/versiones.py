@@ -0,0 +1,23 @@
+from app.db.consultas import ejecutar
+
+# Contadores de versión por tabla (versiones_tabla).
+# Las rutas que escriben los incrementan en la misma transacción; los procesos
+# que cachean datos comparan su versión con la de la BD para saber si otro
+# worker cambió algo.
+
+def incrementar_version(cursor, *tablas):
+    """Sube en 1 la versión de cada tabla y devuelve {tabla: nueva_version}."""
+    cursor.execute("""
+        INSERT INTO versiones_tabla (tabla, version)
+        SELECT t, 1 FROM unnest(%s::text[]) AS t
+        ON CONFLICT (tabla) DO UPDATE SET version = versiones_tabla.version + 1
+        RETURNING tabla, version
+    """, (list(tablas),))
+    return {row['tabla']: row['version'] for row in cursor.fetchall()}
+
+def leer_versiones(cursor, *tablas):
+    """{tabla: version}; las tablas sin fila cuentan como versión 0."""
+    ejecutar(cursor, 'versiones', (list(tablas),))
+    versiones = {tabla: 0 for tabla in tablas}
+    versiones.update((row['tabla'], row['version']) for row in cursor.fetchall())
+    return versiones
\ No newline at end of file
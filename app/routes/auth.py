@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify, session
 from werkzeug.security import check_password_hash, generate_password_hash
-from app.db.database import get_db
-from app.utils.security import login_requerido, rol_requerido
+from app.db.database import get_db, transaccion
+from app.db.versiones import incrementar_version
+from app.db.consultas import ejecutar
+from app.utils.security import login_requerido, rol_requerido, get_cache_roles
+from app.utils.paginacion import ListadoPaginado, respuesta_paginada
 
 bp = Blueprint('auth', __name__, url_prefix='/api')
 
@@ -15,13 +18,15 @@ def login():
 
     db = get_db()
     with db.cursor() as cursor:
-        cursor.execute('SELECT * FROM usuarios WHERE usuario = %s', (usuario,))
+        ejecutar(cursor, 'usuario_por_nombre', (usuario,))
         user = cursor.fetchone()
 
     if user and check_password_hash(user['contrasena'], contrasena):
         session['usuario_id'] = user['id']
         session['rol'] = user['rol']
         session['nombre'] = user['usuario']
+        session['version_sesion'] = user['version_sesion']
+        get_cache_roles().guardar(user['id'], user['rol'], user['version_sesion'])
         return jsonify({
             'mensaje': 'Login exitoso',
             'usuario': {'nombre': user['usuario'], 'rol': user['rol']}
@@ -35,16 +40,25 @@ def logout():
 
 # --- GESTIÓN DE USUARIOS (Solo Gerencia) ---
 
+# Nunca se exponen contrasena ni version_sesion
+LISTADO_USUARIOS = ListadoPaginado(
+    'usuarios',
+    ('id', 'usuario', 'email', 'rol', 'creado_en'),
+    orden=('id',),
+    filtros=('rol',)
+)
+
 @bp.route('/usuarios', methods=['GET'])
 @login_requerido
 @rol_requerido('Gerencia')
 def listar_usuarios():
-    """Ver todos los usuarios del sistema"""
-    db = get_db()
-    with db.cursor() as cursor:
-        cursor.execute("SELECT id, usuario, email, rol, creado_en FROM usuarios ORDER BY id ASC")
-        users = cursor.fetchall()
-    return jsonify(users)
+    """Ver los usuarios del sistema (paginado con ?cursor=)"""
+    try:
+        with get_db().cursor() as cursor:
+            users, siguiente = LISTADO_USUARIOS.consultar(cursor, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return respuesta_paginada(users, siguiente)
 
 @bp.route('/register', methods=['POST'])
 @login_requerido
@@ -65,14 +79,16 @@ def registrar_usuario():
         # Hasheamos la contraseña antes de guardar
         pass_hash = generate_password_hash(password)
 
-        db = get_db()
-        with db.cursor() as cursor:
+        with transaccion() as cursor:
             cursor.execute("""
                 INSERT INTO usuarios (usuario, email, contrasena, rol)
                 VALUES (%s, %s, %s, %s)
+                RETURNING id
             """, (usuario, email, pass_hash, rol))
+            nuevo_id = cursor.fetchone()['id']
+            incrementar_version(cursor, 'usuarios')
         
-        db.commit()
+        get_cache_roles().invalidar(nuevo_id)
         return jsonify({'mensaje': 'Usuario creado exitosamente'}), 201
 
     except Exception as e:
@@ -89,8 +105,22 @@ def eliminar_usuario(id):
     if id == session.get('usuario_id'):
         return jsonify({'error': 'No puedes eliminar tu propia cuenta'}), 400
 
-    db = get_db()
-    with db.cursor() as cursor:
+    with transaccion() as cursor:
         cursor.execute("DELETE FROM usuarios WHERE id = %s", (id,))
-    db.commit()
-    return jsonify({'mensaje': 'Usuario eliminado'})
\ No newline at end of file
+        if cursor.rowcount:
+            incrementar_version(cursor, 'usuarios')
+    get_cache_roles().invalidar(id)
+    return jsonify({'mensaje': 'Usuario eliminado'})
+
+@bp.route('/usuarios/<int:id>/revocar', methods=['POST'])
+@login_requerido
+@rol_requerido('Gerencia')
+def revocar_sesiones(id):
+    """Invalida las sesiones abiertas de un usuario (deberá volver a loguearse)"""
+    with transaccion() as cursor:
+        cursor.execute("UPDATE usuarios SET version_sesion = version_sesion + 1 WHERE id = %s", (id,))
+        if cursor.rowcount == 0:
+            return jsonify({'error': 'Usuario no encontrado'}), 404
+        incrementar_version(cursor, 'usuarios')
+    get_cache_roles().invalidar(id)
+    return jsonify({'mensaje': 'Sesiones revocadas'})
\ No newline at end of file
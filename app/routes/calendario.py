@@ -1,59 +1,86 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, current_app
+from datetime import date, datetime, timedelta
 from app.db.database import get_db
 from app.utils.security import login_requerido
+from app.utils.condicional import etag_por_versiones
 
 bp = Blueprint('calendario', __name__, url_prefix='/api')
 
+# Un solo viaje a la BD: ambas fuentes filtradas por ventana (usan los índices
+# por fecha) y el JSON final armado por Postgres con json_agg
+SQL_EVENTOS = """
+    SELECT COALESCE(json_agg(e.evento ORDER BY e.fecha), '[]')::text AS eventos
+    FROM (
+        SELECT fecha_entrega AS fecha, json_build_object(
+            'title', '🚚 Entrega: ' || cliente || ' (' || cantidad_ton || ' Ton)',
+            'date', fecha_entrega,
+            'backgroundColor', '#0d6efd',
+            'borderColor', '#0d6efd',
+            'extendedProps', json_build_object('tipo', 'pedido', 'producto', producto)
+        ) AS evento
+        FROM pedidos
+        WHERE fecha_entrega BETWEEN %(desde)s AND %(hasta)s
+          AND estado != 'cancelado'
+        UNION ALL
+        SELECT fecha_cosecha_estimada, json_build_object(
+            'title', '🌾 Cosecha: ' || tipo_alga || ' (' || superficie || ' Has)',
+            'date', fecha_cosecha_estimada,
+            'backgroundColor', '#198754',
+            'borderColor', '#198754',
+            'extendedProps', json_build_object('tipo', 'cosecha')
+        )
+        FROM lotes
+        WHERE fecha_cosecha_estimada BETWEEN %(desde)s AND %(hasta)s
+          AND estado = 'activo'
+    ) e
+"""
+
+def _leer_fecha(*nombres):
+    """Fecha del primer parámetro presente: YYYY-MM-DD o ISO con hora, que se descarta."""
+    for nombre in nombres:
+        valor = request.args.get(nombre)
+        if valor:
+            return datetime.fromisoformat(valor).date()
+    return None
+
 @bp.route('/calendario', methods=['GET'])
 @login_requerido
+@etag_por_versiones('lotes', 'pedidos', por_dia=True)
 def obtener_eventos():
     """
-    Obtiene eventos combinados:
+    Obtiene eventos combinados dentro de la ventana ?desde=&hasta= (ambos inclusive):
     1. Fechas de Entrega de Pedidos (Azul)
     2. Fechas Estimadas de Cosecha de Lotes (Verde)
+    También acepta start/end, los que envía FullCalendar al cambiar de vista
+    (end es exclusivo). Sin inicio se usa el primer día del mes en curso y
+    sin fin el último día del mes del inicio.
     """
     try:
-        db = get_db()
-        eventos = []
+        desde = _leer_fecha('desde', 'start')
+        hasta = _leer_fecha('hasta')
+        if hasta is None:
+            fin = _leer_fecha('end')
+            hasta = fin - timedelta(days=1) if fin else None
+    except ValueError:
+        return jsonify({'error': 'Fechas inválidas (formato YYYY-MM-DD)'}), 400
 
-        with db.cursor() as cursor:
-            # 1. BUSCAR PEDIDOS (Entregas)
-            # Solo los pendientes o en proceso
-            cursor.execute("""
-                SELECT cliente, producto, cantidad_ton, fecha_entrega 
-                FROM pedidos 
-                WHERE estado != 'cancelado'
-            """)
-            pedidos = cursor.fetchall()
-            
-            for p in pedidos:
-                eventos.append({
-                    "title": f"🚚 Entrega: {p['cliente']} ({p['cantidad_ton']} Ton)",
-                    "date": p['fecha_entrega'].isoformat(), # Formato YYYY-MM-DD
-                    "backgroundColor": "#0d6efd", # Azul Bootstrap
-                    "borderColor": "#0d6efd",
-                    "extendedProps": { "tipo": "pedido", "producto": p['producto'] }
-                })
+    if desde is None:
+        desde = date.today().replace(day=1)
+    if hasta is None:
+        hasta = (desde.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    if hasta < desde:
+        return jsonify({'error': 'hasta debe ser posterior a desde'}), 400
+    maximo = current_app.config.get('CALENDARIO_MAX_DIAS', 366)
+    if (hasta - desde).days > maximo:
+        return jsonify({'error': f'Rango máximo {maximo} días'}), 400
 
-            # 2. BUSCAR LOTES (Cosechas)
-            cursor.execute("""
-                SELECT tipo_alga, superficie, fecha_cosecha_estimada 
-                FROM lotes 
-                WHERE estado = 'activo' AND fecha_cosecha_estimada IS NOT NULL
-            """)
-            lotes = cursor.fetchall()
-            
-            for l in lotes:
-                eventos.append({
-                    "title": f"🌾 Cosecha: {l['tipo_alga']} ({l['superficie']} Has)",
-                    "date": l['fecha_cosecha_estimada'].isoformat(),
-                    "backgroundColor": "#198754", # Verde Bootstrap
-                    "borderColor": "#198754",
-                    "extendedProps": { "tipo": "cosecha" }
-                })
-
-        return jsonify(eventos)
+    try:
+        with get_db().cursor() as cursor:
+            cursor.execute(SQL_EVENTOS, {'desde': desde, 'hasta': hasta})
+            eventos = cursor.fetchone()['eventos']
+        # Ya es JSON: se devuelve tal cual, sin decodificar fila por fila
+        return current_app.response_class(eventos, mimetype='application/json')
 
     except Exception as e:
         print(f"Error calendario: {e}")
-        return jsonify({'error': 'Error obteniendo eventos'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Error obteniendo eventos'}), 500
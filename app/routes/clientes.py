@@ -1,17 +1,29 @@
 from flask import Blueprint, request, jsonify
-from app.db.database import get_db
-from app.utils.security import login_requerido
+from app.db.database import get_db, transaccion
+from app.db.versiones import incrementar_version
+from app.db.importacion import importar_desde_peticion
+from app.utils.security import login_requerido, rol_requerido
+from app.utils.paginacion import ListadoPaginado, respuesta_paginada
 
 bp = Blueprint('clientes', __name__, url_prefix='/api')
 
+# empresa es UNIQUE: sirve sola como llave del cursor
+LISTADO_CLIENTES = ListadoPaginado(
+    'clientes',
+    ('id', 'empresa', 'contacto', 'email', 'telefono', 'direccion', 'estado', 'creado_en'),
+    orden=('empresa',),
+    filtros=('estado',)
+)
+
 @bp.route('/clientes', methods=['GET'])
 @login_requerido
 def listar_clientes():
-    db = get_db()
-    with db.cursor() as cursor:
-        cursor.execute("SELECT * FROM clientes ORDER BY empresa ASC")
-        clientes = cursor.fetchall()
-    return jsonify(clientes)
+    try:
+        with get_db().cursor() as cursor:
+            clientes, siguiente = LISTADO_CLIENTES.consultar(cursor, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return respuesta_paginada(clientes, siguiente)
 
 @bp.route('/clientes', methods=['POST'])
 @login_requerido
@@ -22,13 +34,12 @@ def crear_cliente():
         if not empresa:
             return jsonify({'error': 'El nombre de la empresa es obligatorio'}), 400
 
-        db = get_db()
-        with db.cursor() as cursor:
+        with transaccion() as cursor:
             cursor.execute("""
                 INSERT INTO clientes (empresa, contacto, email, telefono, direccion)
                 VALUES (%s, %s, %s, %s, %s)
             """, (empresa, data.get('contacto'), data.get('email'), data.get('telefono'), data.get('direccion')))
-        db.commit()
+            incrementar_version(cursor, 'clientes')
         return jsonify({'mensaje': 'Cliente registrado exitosamente'}), 201
     except Exception as e:
         # Capturamos error de duplicados (UNIQUE constraint)
@@ -36,19 +47,26 @@ def crear_cliente():
             return jsonify({'error': 'Ya existe un cliente con ese nombre'}), 400
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/clientes/importar', methods=['POST'])
+@login_requerido
+@rol_requerido('Comercial', 'Gerencia')
+def importar_clientes():
+    """Carga masiva de clientes; las empresas repetidas o ya registradas se informan como error"""
+    return importar_desde_peticion('clientes')
+
 @bp.route('/clientes/<int:id>', methods=['DELETE'])
 @login_requerido
 def eliminar_cliente(id):
-    db = get_db()
     try:
-        with db.cursor() as cursor:
+        with transaccion() as cursor:
             # Opcional: Verificar si tiene pedidos antes de borrar
             cursor.execute("SELECT COUNT(*) as c FROM pedidos WHERE cliente = (SELECT empresa FROM clientes WHERE id=%s)", (id,))
             if cursor.fetchone()['c'] > 0:
                 return jsonify({'error': 'No se puede borrar: Este cliente tiene pedidos asociados.'}), 400
             
             cursor.execute("DELETE FROM clientes WHERE id = %s", (id,))
-        db.commit()
+            if cursor.rowcount:
+                incrementar_version(cursor, 'clientes')
         return jsonify({'mensaje': 'Cliente eliminado'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
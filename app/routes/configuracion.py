@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
-from app.db.database import get_db
+from app.db.database import get_pool, transaccion
+from app.db.versiones import incrementar_version
+from app.services.config_simulacion import obtener_configuracion, invalidar_configuracion
+from app.db.auditoria import get_buffer
 from app.utils.security import login_requerido, rol_requerido
+from app.utils.condicional import etag_por_foto
 
 bp = Blueprint('configuracion', __name__, url_prefix='/api/config')
 
@@ -8,18 +12,11 @@ bp = Blueprint('configuracion', __name__, url_prefix='/api/config')
 
 @bp.route('/sistema', methods=['GET'])
 @login_requerido
+@etag_por_foto(lambda: obtener_configuracion().version)
 def get_parametros_sistema():
-    db = get_db()
     try:
-        with db.cursor() as cursor:
-            cursor.execute("SELECT clave, valor, unidad, descripcion, categoria FROM parametros_sistema ORDER BY categoria, clave")
-            rows = cursor.fetchall()
-            # Convertimos Decimal a float para JSON
-            data = []
-            for row in rows:
-                row['valor'] = float(row['valor'])
-                data.append(row)
-            return jsonify(data)
+        config = obtener_configuracion()
+        return jsonify([dict(fila) for fila in config.filas_parametros])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -28,45 +25,46 @@ def get_parametros_sistema():
 @rol_requerido('Gerencia') # Solo gerentes pueden cambiar precios
 def update_parametros_sistema():
     data = request.get_json() # Esperamos una lista de objetos: [{clave: 'precio_agua', valor: 3000}, ...]
-    db = get_db()
     
     try:
-        with db.cursor() as cursor:
-            for item in data:
-                cursor.execute(
-                    "UPDATE parametros_sistema SET valor = %s WHERE clave = %s",
-                    (item['valor'], item['clave'])
-                )
-        db.commit()
-        return jsonify({'mensaje': 'Parámetros actualizados correctamente'})
+        claves = [item['clave'] for item in data]
+        valores = [float(item['valor']) for item in data]
+    except (TypeError, KeyError, ValueError):
+        return jsonify({'error': 'Se espera una lista de {clave, valor numérico}'}), 400
+    if len(set(claves)) != len(claves):
+        return jsonify({'error': 'Hay claves repetidas'}), 400
+
+    try:
+        with transaccion() as cursor:
+            # Un solo UPDATE para todas las claves
+            cursor.execute("""
+                UPDATE parametros_sistema p SET valor = v.valor
+                FROM unnest(%s::text[], %s::numeric[]) AS v(clave, valor)
+                WHERE p.clave = v.clave
+                RETURNING p.clave
+            """, (claves, valores))
+            actualizadas = {fila['clave'] for fila in cursor.fetchall()}
+            if actualizadas:
+                incrementar_version(cursor, 'parametros_sistema')
+        invalidar_configuracion()
+        return jsonify({
+            'mensaje': 'Parámetros actualizados correctamente',
+            'resultados': [
+                {'clave': c, 'resultado': 'actualizado' if c in actualizadas else 'no_existe'} for c in claves
+            ]
+        })
     except Exception as e:
-        db.rollback()
         return jsonify({'error': str(e)}), 500
 
 # --- 2. CONFIGURACIÓN BIOLÓGICA (ESTACIONES) ---
 
 @bp.route('/estaciones', methods=['GET'])
 @login_requerido
+@etag_por_foto(lambda: obtener_configuracion().version)
 def get_estaciones():
-    db = get_db()
     try:
-        with db.cursor() as cursor:
-            cursor.execute("SELECT * FROM configuracion_estacional ORDER BY id")
-            rows = cursor.fetchall()
-            # Convertir Decimals
-            res = []
-            for row in rows:
-                res.append({
-                    'id': row['id'],
-                    'nombre_estacion': row['nombre_estacion'],
-                    'meses_asociados': row['meses_asociados'],
-                    'factor_biomasa': float(row['factor_biomasa']),
-                    'factor_secado': float(row['factor_secado']),
-                    'factor_energia': float(row['factor_energia']),
-                    'factor_crecimiento': float(row['factor_crecimiento']),
-                    'descripcion': row['descripcion']
-                })
-            return jsonify(res)
+        config = obtener_configuracion()
+        return jsonify([dict(estacion) for estacion in config.estaciones])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -76,9 +74,8 @@ def get_estaciones():
 def update_estacion():
     # Actualiza una sola estación por ID
     data = request.get_json()
-    db = get_db()
     try:
-        with db.cursor() as cursor:
+        with transaccion() as cursor:
             cursor.execute("""
                 UPDATE configuracion_estacional 
                 SET factor_biomasa=%s, factor_secado=%s, factor_energia=%s, factor_crecimiento=%s, meses_asociados=%s
@@ -88,8 +85,24 @@ def update_estacion():
                 data['factor_energia'], data['factor_crecimiento'],
                 data['meses_asociados'], data['id']
             ))
-        db.commit()
+            incrementar_version(cursor, 'configuracion_estacional')
+        invalidar_configuracion()
         return jsonify({'mensaje': 'Estación actualizada'})
     except Exception as e:
-        db.rollback()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+# --- 3. DIAGNÓSTICO ---
+
+@bp.route('/pool', methods=['GET'])
+@login_requerido
+@rol_requerido('Gerencia')
+def get_estadisticas_pool():
+    """Estado del pool de conexiones de este worker"""
+    return jsonify(get_pool().estadisticas())
+
+@bp.route('/auditoria', methods=['GET'])
+@login_requerido
+@rol_requerido('Gerencia')
+def get_estadisticas_auditoria():
+    """Cola de auditoría de este worker (profundidad y latencia de volcado)"""
+    return jsonify(get_buffer().estadisticas())
\ No newline at end of file
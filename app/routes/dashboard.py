@@ -1,43 +1,78 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, current_app
+from datetime import date, datetime
 from app.db.database import get_db
 from app.utils.security import login_requerido
+from app.utils.condicional import etag_por_versiones
 
 bp = Blueprint('dashboard', __name__, url_prefix='/api')
 
+# granularidad -> (unidad de date_trunc, paso de la serie, etiqueta TO_CHAR)
+GRANULARIDADES = {
+    'mes': ('month', '1 month', 'Mon YYYY'),
+    'trimestre': ('quarter', '3 months', 'YYYY "T"Q'),
+    'anio': ('year', '1 year', 'YYYY'),
+}
+
+def _leer_mes(nombre, defecto):
+    valor = request.args.get(nombre)
+    return datetime.strptime(valor, '%Y-%m').date() if valor else defecto
+
 @bp.route('/dashboard', methods=['GET'])
 @login_requerido
+@etag_por_versiones('lotes', 'pedidos', por_dia=True)
 def dashboard_data():
+    """
+    KPIs y gráfico de producción desde los resúmenes que mantienen los
+    triggers (conteo_estados, resumen_pedidos_mensual): el costo no depende
+    del largo del historial.
+    Parámetros: desde/hasta (YYYY-MM, por defecto los últimos 12 meses),
+    granularidad (mes | trimestre | anio) y estado (opcional).
+    """
+    hoy = date.today().replace(day=1)
+    try:
+        hasta = _leer_mes('hasta', hoy)
+        meses = hasta.year * 12 + hasta.month - 12  # 11 meses antes de `hasta`
+        desde = _leer_mes('desde', date(meses // 12, meses % 12 + 1, 1))
+    except ValueError:
+        return jsonify({'error': 'Fechas inválidas (formato YYYY-MM)'}), 400
+    granularidad = request.args.get('granularidad', 'mes')
+    if granularidad not in GRANULARIDADES:
+        return jsonify({'error': f"granularidad debe ser una de: {', '.join(GRANULARIDADES)}"}), 400
+    if hasta < desde:
+        return jsonify({'error': 'hasta debe ser posterior a desde'}), 400
+    maximo = current_app.config.get('DASHBOARD_MAX_MESES', 240)
+    if (hasta.year - desde.year) * 12 + hasta.month - desde.month >= maximo:
+        return jsonify({'error': f'Rango máximo {maximo} meses'}), 400
+    unidad, paso, etiqueta = GRANULARIDADES[granularidad]
+
     try:
         db = get_db()
         with db.cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) as c FROM lotes WHERE estado='activo'")
-            res_lotes = cursor.fetchone()
-            lotes_activos = res_lotes['c'] if res_lotes else 0
-            cursor.execute("SELECT COUNT(*) as c FROM pedidos WHERE estado='pendiente'")
-            res_pedidos = cursor.fetchone()
-            pedidos_pendientes = res_pedidos['c'] if res_pedidos else 0
-            # Datos para gráfico de producción mensual
             cursor.execute("""
-                        SELECT 
-                            TO_CHAR(fecha_entrega, 'Mon') as mes, 
-                            SUM(cantidad_ton) as total 
-                        FROM pedidos 
-                        GROUP BY TO_CHAR(fecha_entrega, 'Mon'), EXTRACT(MONTH FROM fecha_entrega)
-                        ORDER BY EXTRACT(MONTH FROM fecha_entrega)
-                    """)
-            resultados_grafico = cursor.fetchall()
-
-            # Transformamos el resultado de SQL al formato que espera React
-            datos_grafico = []
-            if resultados_grafico:
-                for fila in resultados_grafico:
-                    datos_grafico.append({
-                        "name": fila['mes'],       # Ej: "Jan", "Feb"
-                        "produccion": float(fila['total']) # Ej: 45.0
-                    })
-            else:
-                # Datos por defecto si la BD está vacía
-                datos_grafico = [{"name": "Sin Datos", "produccion": 0}]
+                SELECT tabla, estado, cantidad FROM conteo_estados
+                WHERE (tabla, estado) IN (('lotes', 'activo'), ('pedidos', 'pendiente'))
+            """)
+            conteos = {(f['tabla'], f['estado']): f['cantidad'] for f in cursor.fetchall()}
+            lotes_activos = conteos.get(('lotes', 'activo'), 0)
+            pedidos_pendientes = conteos.get(('pedidos', 'pendiente'), 0)
+
+            # Datos para gráfico de producción: una fila por periodo (con ceros
+            # en los periodos sin pedidos), sumando las filas mensuales del resumen
+            cursor.execute("""
+                SELECT TO_CHAR(p.periodo, %(etiqueta)s) AS name,          -- Ej: "Jan 2025", "2025 T1"
+                       COALESCE(SUM(r.total_ton), 0) AS produccion  -- NUMERIC, sale como número
+                FROM generate_series(date_trunc(%(unidad)s, %(desde)s::date),
+                                     %(hasta)s::date, %(paso)s::interval) AS p(periodo)
+                LEFT JOIN resumen_pedidos_mensual r
+                       ON r.mes >= p.periodo AND r.mes < p.periodo + %(paso)s::interval
+                      AND (%(estado)s::text IS NULL OR r.estado = %(estado)s)
+                GROUP BY p.periodo
+                ORDER BY p.periodo
+            """, {'etiqueta': etiqueta, 'unidad': unidad, 'desde': desde, 'hasta': hasta,
+                  'paso': paso, 'estado': request.args.get('estado')})
+            # Las filas ya tienen el formato que espera React; generate_series
+            # da al menos un periodo (hasta >= desde), con 0 si no hay pedidos
+            datos_grafico = cursor.fetchall()
 
         return jsonify({
             'kpis': {
@@ -49,4 +84,4 @@ def dashboard_data():
 
     except Exception as e:
         print(f"Error Postgres Dashboard: {e}")
-        return jsonify({'error': 'Error interno'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Error interno'}), 500
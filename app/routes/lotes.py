@@ -1,41 +1,50 @@
 from flask import Blueprint, request, jsonify
-from datetime import datetime, timedelta
-from app.db.database import get_db
-from app.utils.security import login_requerido
+from datetime import datetime
+from app.db.database import get_db, transaccion
+from app.db.versiones import incrementar_version
+from app.services.atp import aplicar_cambios_atp, oferta_de_lote
+from app.services.cultivo import fecha_cosecha_estimada
+from app.db.importacion import importar_desde_peticion
+from app.db.exportacion import respuesta_exportacion, filas_postgres
+from app.utils.security import login_requerido, rol_requerido
+from app.utils.paginacion import ListadoPaginado, respuesta_paginada
 
 bp = Blueprint('lotes', __name__, url_prefix='/api')
 
+LISTADO_LOTES = ListadoPaginado(
+    'lotes',
+    ('id', 'tipo_alga', 'superficie', 'fecha_inicio', 'fecha_cosecha_estimada', 'estado', 'creado_en'),
+    orden=('fecha_inicio', 'id'), descendente=True,
+    filtros=('estado', 'tipo_alga'), columna_fecha='fecha_inicio'
+)
+
 def calcular_fecha_cosecha(fecha_siembra_str, tipo_alga):
     """
     Calcula la fecha estimada basada en la estación y el tipo de alga.
     """
     fecha = datetime.strptime(fecha_siembra_str, '%Y-%m-%d')
-    mes = fecha.month
-    
-    # 1. Días base según tipo de alga
-    dias_base = 45 if tipo_alga == 'Gracilaria' else 60
-    
-    # 2. Factor Estacional (En invierno crece más lento)
-    factor = 1.0
-    if mes in [5, 6, 7, 8]: # Invierno
-        factor = 1.3 # Tarda un 30% más
-    elif mes in [1, 2, 12]: # Verano
-        factor = 0.9 # Crece un 10% más rápido
-        
-    dias_totales = int(dias_base * factor)
-    fecha_estimada = fecha + timedelta(days=dias_totales)
-    
-    return fecha_estimada.strftime('%Y-%m-%d')
+    return fecha_cosecha_estimada(fecha, tipo_alga).strftime('%Y-%m-%d')
 
 @bp.route('/lotes', methods=['GET'])
 @login_requerido
 def obtener_lotes():
-    """Listar todos los lotes"""
-    db = get_db()
-    with db.cursor() as cursor:
-        cursor.execute("SELECT * FROM lotes ORDER BY fecha_inicio DESC")
-        lotes = cursor.fetchall()
-    return jsonify(lotes)
+    """Listar lotes (más recientes primero, paginado con ?cursor=)"""
+    try:
+        with get_db().cursor() as cursor:
+            lotes, siguiente = LISTADO_LOTES.consultar(cursor, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return respuesta_paginada(lotes, siguiente)
+
+@bp.route('/lotes/exportar', methods=['GET'])
+@login_requerido
+def exportar_lotes():
+    """Todos los lotes en CSV o NDJSON (?formato=), con los mismos filtros y fields que el listado"""
+    try:
+        sql, valores, campos = LISTADO_LOTES.consulta_completa(request.args)
+        return respuesta_exportacion(filas_postgres(sql, valores), campos, request.args.get('formato', 'csv'), 'lotes')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @bp.route('/lotes', methods=['POST'])
 @login_requerido
@@ -50,35 +59,60 @@ def crear_lote():
         # Calculamos la fecha automáticamente
         fecha_cosecha = calcular_fecha_cosecha(fecha_inicio, tipo)
         
-        db = get_db()
-        with db.cursor() as cursor:
+        with transaccion() as cursor:
             cursor.execute("""
                 INSERT INTO lotes (tipo_alga, superficie, fecha_inicio, fecha_cosecha_estimada, estado)
                 VALUES (%s, %s, %s, %s, 'activo')
+                RETURNING estado, fecha_cosecha_estimada, superficie
             """, (tipo, superficie, fecha_inicio, fecha_cosecha))
+            nuevo = cursor.fetchone()
+            version = incrementar_version(cursor, 'lotes')['lotes']
             
-        db.commit()
+        aplicar_cambios_atp('lotes', version, agregar=[oferta_de_lote(**nuevo)])
         return jsonify({'mensaje': 'Lote creado', 'fecha_cosecha_estimada': fecha_cosecha}), 201
 
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@bp.route('/lotes/importar', methods=['POST'])
+@login_requerido
+@rol_requerido('Personal', 'Gerencia')
+def importar_lotes():
+    """Carga masiva de lotes (la fecha de cosecha se calcula igual que al crear uno)"""
+    return importar_desde_peticion('lotes')
+
 @bp.route('/lotes/<int:id>', methods=['DELETE'])
 @login_requerido
 def eliminar_lote(id):
     """Eliminar un lote (por error de carga o pérdida)"""
-    db = get_db()
-    with db.cursor() as cursor:
-        cursor.execute("DELETE FROM lotes WHERE id = %s", (id,))
-    db.commit()
+    with transaccion() as cursor:
+        cursor.execute("DELETE FROM lotes WHERE id = %s RETURNING estado, fecha_cosecha_estimada, superficie", (id,))
+        borrado = cursor.fetchone()
+        if borrado:
+            version = incrementar_version(cursor, 'lotes')['lotes']
+    if borrado:
+        aplicar_cambios_atp('lotes', version, quitar=[oferta_de_lote(**borrado)])
     return jsonify({'mensaje': 'Lote eliminado'})
 
 @bp.route('/lotes/<int:id>/cosechar', methods=['PUT'])
 @login_requerido
 def marcar_cosechado(id):
     """Cambia el estado a 'cosechado' (El stock pasa a estar disponible físicamente)"""
-    db = get_db()
-    with db.cursor() as cursor:
-        cursor.execute("UPDATE lotes SET estado = 'cosechado' WHERE id = %s", (id,))
-    db.commit()
+    with transaccion() as cursor:
+        # El FROM sobre la misma tabla ve la fila antes del UPDATE: estado anterior
+        cursor.execute("""
+            UPDATE lotes l SET estado = 'cosechado'
+            FROM lotes anterior
+            WHERE l.id = %s AND anterior.id = l.id
+            RETURNING anterior.estado AS estado_anterior, l.fecha_cosecha_estimada, l.superficie
+        """, (id,))
+        fila = cursor.fetchone()
+        if fila:
+            version = incrementar_version(cursor, 'lotes')['lotes']
+    if fila:
+        aplicar_cambios_atp(
+            'lotes', version,
+            quitar=[oferta_de_lote(fila['estado_anterior'], fila['fecha_cosecha_estimada'], fila['superficie'])],
+            agregar=[oferta_de_lote('cosechado', fila['fecha_cosecha_estimada'], fila['superficie'])]
+        )
     return jsonify({'mensaje': 'Lote marcado como cosechado'})
\ No newline at end of file
@@ -0,0 +1,14 @@
+import hmac
+from flask import Blueprint, request, jsonify, current_app
+from app.utils.metricas import generar_metricas
+
+bp = Blueprint('metricas', __name__, url_prefix='/api')
+
+@bp.route('/metrics', methods=['GET'])
+def exponer_metricas():
+    """Métricas en formato Prometheus (todos los workers). Con METRICAS_TOKEN exige 'Authorization: Bearer <token>'"""
+    token = current_app.config.get('METRICAS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'No autorizado'}), 401
+    datos, tipo = generar_metricas()
+    return current_app.response_class(datos, content_type=tipo)
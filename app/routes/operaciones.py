@@ -1,12 +1,33 @@
-from flask import Blueprint, request, jsonify, session
-from datetime import datetime, timezone
+from flask import Blueprint, request, jsonify, session, current_app
+from datetime import datetime, timezone, date, timedelta
+from app.db.auditoria import registrar_auditoria
 from app.db.mongo import get_mongo_db
-from app.db.database import get_db
+from app.db.exportacion import respuesta_exportacion
 from app.utils.security import login_requerido, rol_requerido
+from app.utils.metricas import medir_simulacion, CACHE_SIMULACION
 from app.services.predictor import MotorSimulacion
+from app.services.config_simulacion import obtener_configuracion
+from app.services.atp import obtener_linea_atp, RENDIMIENTO_TON_HA
+from app.services.simulador import simular_montecarlo, analizar_sensibilidad
+from app.services.cache_simulacion import get_cache_simulaciones
 
 bp = Blueprint('operaciones', __name__, url_prefix='/api')
 
+def resumir_resultado(resultado):
+    """Mensaje y color para el frontend a partir del resultado del motor"""
+    stock_proyectado = resultado['resultado']['stock_disponible']
+    deficit = resultado['resultado']['deficit_a_cultivar']
+    dias = resultado['operaciones']['dias_totales']
+    costo_total = resultado['financiero']['costo_total']
+    
+    if deficit == 0:
+        color = "green"
+        mensaje = f"ENTREGA INMEDIATA. Stock proyectado suficiente ({stock_proyectado} Ton). Costo Est: ${costo_total:,.0f}"
+    else:
+        color = "warning"
+        mensaje = f"REQUIERE CULTIVO. Déficit de {deficit} Ton. Tiempo total: {dias} días. Costo Est: ${costo_total:,.0f}"
+    return mensaje, color
+
 @bp.route('/simulacion', methods=['POST'])
 @login_requerido
 @rol_requerido('Comercial', 'Gerencia')
@@ -25,139 +46,327 @@ def simulacion():
         if cantidad <= 0: raise ValueError("La cantidad debe ser positiva")
         fecha = data.get('fecha')
         if not fecha: raise ValueError("La fecha es obligatoria")
+        fecha_atp = datetime.strptime(fecha, '%Y-%m-%d').date()
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
 
-    db = get_db()
-    
     # ---------------------------------------------------------
-    # 2. CARGAR PARÁMETROS DEL SISTEMA (Precios y Costos)
+    # 2. CONFIGURACIÓN (Costos + Estacionalidad, cacheada por versión)
     # ---------------------------------------------------------
-    params_dict = {}
-    try:
-        with db.cursor() as cursor:
-            cursor.execute("SELECT clave, valor FROM parametros_sistema")
-            rows = cursor.fetchall()
-            for row in rows:
-                params_dict[row['clave']] = float(row['valor'])
-                
-        # Fallback si la tabla está vacía
-        if not params_dict:
-            print("ADVERTENCIA: Tabla parametros_sistema vacía. Usando valores por defecto.")
-            params_dict = {
-                'precio_agua_m3': 2500.0, 'precio_kwh': 180.0, 'precio_diesel_L': 1150.0,
-                'consumo_agua_ton': 3.0, 'consumo_energia_ton': 40.0, 'consumo_diesel_ton': 12.5,
-                'horas_hombre_ton': 4.5, 'costo_hh_operario': 5500.0, 'insumos_varios_ton': 5000.0,
-                'capacidad_planta_dia': 2.5, 'dias_ciclo_base': 45.0, 'capacidad_cosecha_dia': 5.0
-            }
+    try:
+        config = obtener_configuracion()
     except Exception as e:
-        print(f"Error cargando parámetros: {e}")
+        print(f"Error cargando configuración: {e}")
         return jsonify({'error': 'Error de configuración del sistema (Costos)'}), 500
 
     # ---------------------------------------------------------
-    # 3. CARGAR CONFIGURACIÓN BIOLÓGICA (Estacionalidad)
-    # ---------------------------------------------------------
-    lista_estaciones = []
-    try:
-        with db.cursor() as cursor:
-            cursor.execute("SELECT * FROM configuracion_estacional")
-            rows = cursor.fetchall()
-            for row in rows:
-                lista_estaciones.append({
-                    'nombre_estacion': row['nombre_estacion'],
-                    'meses_asociados': row['meses_asociados'],
-                    'factor_biomasa': float(row['factor_biomasa']),
-                    'factor_secado': float(row['factor_secado']),
-                    'factor_energia': float(row['factor_energia']),
-                    'factor_crecimiento': float(row['factor_crecimiento'])
-                })
-    except Exception as e:
-        print(f"Error cargando biología: {e}")
-        # No retornamos error, permitimos que el motor use sus valores por defecto
-
-    # ---------------------------------------------------------
-    # 4. OBTENER DATOS REALES (ATP - STOCK NETO)
+    # 3. OBTENER DATOS REALES (ATP - STOCK NETO)
     # ---------------------------------------------------------
-    stock_neto = 0.0
-    superficie_equivalente = 0.0
-    
     try:
-        with db.cursor() as cursor:
-            # A) OFERTA
-            query_oferta = """
-                SELECT SUM(superficie) as total_ha
-                FROM lotes 
-                WHERE estado = 'cosechado' OR (estado = 'activo' AND fecha_cosecha_estimada <= %s)
-            """
-            cursor.execute(query_oferta, (fecha,))
-            row_oferta = cursor.fetchone()
-            oferta_ton = float(row_oferta['total_ha'] or 0) * 10.0
-
-            # B) DEMANDA
-            query_demanda = """
-                SELECT SUM(cantidad_ton) as total_ton
-                FROM pedidos
-                WHERE estado != 'cancelado' AND fecha_entrega <= %s
-            """
-            cursor.execute(query_demanda, (fecha,))
-            row_demanda = cursor.fetchone()
-            demanda_ton = float(row_demanda['total_ton'] or 0)
-
-            # C) CALCULO
-            stock_neto = max(0, oferta_ton - demanda_ton)
-            superficie_equivalente = stock_neto / 10.0 # Hectáreas virtuales disponibles
-
+        # Línea ATP en memoria: búsqueda binaria en vez de dos SUM por petición
+        stock_neto, version_atp = obtener_linea_atp().stock_neto_versionado(fecha_atp)
+        superficie_equivalente = stock_neto / RENDIMIENTO_TON_HA # Hectáreas virtuales disponibles
     except Exception as e:
         print(f"Error calculando stock neto: {e}")
         return jsonify({'error': 'Error de cálculo de inventario en BD'}), 500
 
     # ---------------------------------------------------------
-    # 5. EJECUTAR MOTOR (Con todos los parámetros)
+    # 4. EJECUTAR MOTOR (Con todos los parámetros)
     # ---------------------------------------------------------
+    def calcular():
+        with medir_simulacion('simular'):
+            return MotorSimulacion.simular(
+                cantidad, 
+                fecha, 
+                superficie_equivalente, 
+                config.parametros, 
+                config.tabla_estacional
+            )
+
     try:
-        resultado = MotorSimulacion.simular(
-            cantidad, 
-            fecha, 
-            superficie_equivalente, 
-            params_dict, 
-            lista_estaciones
-        )
+        # Misma cotización con la misma configuración y el mismo stock: se reutiliza
+        # (y las peticiones idénticas simultáneas esperan un único cálculo)
+        cache = get_cache_simulaciones()
+        if cache is None:
+            resultado, origen = calcular(), 'calculado'
+        else:
+            llave = (cantidad, fecha_atp, config.version, version_atp)
+            resultado, origen = cache.obtener_o_calcular(llave, calcular)
+        CACHE_SIMULACION.labels(origen).inc()
     except Exception as e:
         return jsonify({'error': f"Error en Motor de Simulación: {str(e)}"}), 500
 
     # ---------------------------------------------------------
-    # 6. RESPUESTA Y AUDITORÍA
+    # 5. RESPUESTA Y AUDITORÍA
     # ---------------------------------------------------------
-    stock_proyectado = resultado['resultado']['stock_disponible']
-    deficit = resultado['resultado']['deficit_a_cultivar']
-    dias = resultado['operaciones']['dias_totales']
-    costo_total = resultado['financiero']['costo_total']
-    
-    if deficit == 0:
-        color = "green"
-        mensaje = f"ENTREGA INMEDIATA. Stock proyectado suficiente ({stock_proyectado} Ton). Costo Est: ${costo_total:,.0f}"
-    else:
-        color = "warning"
-        mensaje = f"REQUIERE CULTIVO. Déficit de {deficit} Ton. Tiempo total: {dias} días. Costo Est: ${costo_total:,.0f}"
+    mensaje, color = resumir_resultado(resultado)
 
-    try:
-        mongo_db = get_mongo_db()
-        if mongo_db is not None:
-            mongo_db.logs_auditoria.insert_one({
-                "tipo": "SIMULACION_FINANCIERA",
-                "usuario": session.get('usuario_id'),
-                "input": {"cant": cantidad, "fecha": fecha},
-                "parametros_usados": params_dict,
-                "estacion_climatica": resultado['escenario']['estacion_detectada'],
-                "resultado_financiero": resultado['financiero'],
-                "resultado_operativo": mensaje,
-                "timestamp": datetime.now(timezone.utc)
-            })
-    except Exception as e:
-        print(f"Mongo Error: {e}")
+    # Se encola: el hilo de auditoría la inserta en Mongo en segundo plano
+    registrar_auditoria({
+        "tipo": "SIMULACION_FINANCIERA",
+        "usuario": session.get('usuario_id'),
+        "input": {"cant": cantidad, "fecha": fecha},
+        "parametros_usados": dict(config.parametros),
+        "estacion_climatica": resultado['escenario']['estacion_detectada'],
+        "resultado_financiero": resultado['financiero'],
+        "resultado_operativo": mensaje,
+        "origen_resultado": origen,
+        "timestamp": datetime.now(timezone.utc)
+    })
 
     return jsonify({
         'resumen': mensaje,
         'color': color,
         'datos': resultado
-    })
\ No newline at end of file
+    })
+
+@bp.route('/simulacion/lote', methods=['POST'])
+@login_requerido
+@rol_requerido('Comercial', 'Gerencia')
+def simulacion_lote():
+    """
+    Varias cotizaciones (cantidad x fecha) en una sola llamada:
+    una carga de configuración, una lectura de ATP y un único evento de auditoría.
+    Cada resultado es idéntico al de POST /api/simulacion para ese escenario.
+    """
+    data = request.get_json()
+    escenarios = (data or {}).get('escenarios')
+    if not isinstance(escenarios, list) or not escenarios:
+        return jsonify({'error': 'Se espera una lista "escenarios" con {cantidad, fecha}'}), 400
+    maximo = current_app.config.get('SIMULACION_LOTE_MAX', 500)
+    if len(escenarios) > maximo:
+        return jsonify({'error': f'Máximo {maximo} escenarios por lote'}), 400
+
+    cantidades, fechas = [], []
+    for i, esc in enumerate(escenarios):
+        try:
+            cantidad = float(esc.get('cantidad', 0))
+            if cantidad <= 0: raise ValueError("La cantidad debe ser positiva")
+            if not esc.get('fecha'): raise ValueError("La fecha es obligatoria")
+            fecha = datetime.strptime(esc['fecha'], '%Y-%m-%d')
+        except (ValueError, TypeError, AttributeError) as e:
+            return jsonify({'error': f'Escenario {i}: {e}'}), 400
+        cantidades.append(cantidad)
+        fechas.append(fecha)
+
+    try:
+        config = obtener_configuracion()
+    except Exception as e:
+        print(f"Error cargando configuración: {e}")
+        return jsonify({'error': 'Error de configuración del sistema (Costos)'}), 500
+
+    try:
+        linea = obtener_linea_atp()
+        superficies = [linea.stock_neto(f.date()) / RENDIMIENTO_TON_HA for f in fechas]
+    except Exception as e:
+        print(f"Error calculando stock neto: {e}")
+        return jsonify({'error': 'Error de cálculo de inventario en BD'}), 500
+
+    try:
+        with medir_simulacion('lote'):
+            resultados = MotorSimulacion.simular_lote(cantidades, fechas, superficies, config.parametros, config.tabla_estacional)
+    except Exception as e:
+        return jsonify({'error': f"Error en Motor de Simulación: {str(e)}"}), 500
+
+    respuesta = []
+    for resultado in resultados:
+        mensaje, color = resumir_resultado(resultado)
+        respuesta.append({'resumen': mensaje, 'color': color, 'datos': resultado})
+
+    registrar_auditoria({
+        "tipo": "SIMULACION_LOTE",
+        "usuario": session.get('usuario_id'),
+        "input": [{"cant": c, "fecha": e['fecha']} for c, e in zip(cantidades, escenarios)],
+        "parametros_usados": dict(config.parametros),
+        "resultados_financieros": [r['financiero']['costo_total'] for r in resultados],
+        "resultados_operativos": [r['resumen'] for r in respuesta],
+        "timestamp": datetime.now(timezone.utc)
+    })
+
+    return jsonify({'resultados': respuesta})
+
+@bp.route('/atp/curva', methods=['GET'])
+@login_requerido
+def curva_atp():
+    """
+    Stock comprometible para cada día (o semana) del rango, en formato
+    columnar: {fechas: [...], stock: [...], oferta: [...], demanda: [...]}.
+    Por defecto desde hoy y 180 días hacia adelante.
+    """
+    try:
+        desde = request.args.get('desde')
+        desde = datetime.strptime(desde, '%Y-%m-%d').date() if desde else date.today()
+        hasta = request.args.get('hasta')
+        hasta = datetime.strptime(hasta, '%Y-%m-%d').date() if hasta else desde + timedelta(days=180)
+    except ValueError:
+        return jsonify({'error': 'Fechas inválidas (formato YYYY-MM-DD)'}), 400
+
+    paso = request.args.get('paso', 'dia')
+    if paso not in ('dia', 'semana'):
+        return jsonify({'error': "paso debe ser 'dia' o 'semana'"}), 400
+    if hasta < desde:
+        return jsonify({'error': 'hasta debe ser posterior a desde'}), 400
+    maximo = current_app.config.get('ATP_CURVA_MAX_DIAS', 731)
+    if (hasta - desde).days > maximo:
+        return jsonify({'error': f'Rango máximo {maximo} días'}), 400
+
+    dias = 7 if paso == 'semana' else 1
+    fechas = [desde + timedelta(days=d) for d in range(0, (hasta - desde).days + 1, dias)]
+
+    try:
+        oferta, demanda, stock = obtener_linea_atp().curva(fechas)
+    except Exception as e:
+        print(f"Error calculando curva ATP: {e}")
+        return jsonify({'error': 'Error de cálculo de inventario en BD'}), 500
+
+    return jsonify({
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'paso': paso,
+        'fechas': [f.isoformat() for f in fechas],
+        'stock': [round(x, 2) for x in stock],
+        'oferta': [round(x, 2) for x in oferta],
+        'demanda': [round(x, 2) for x in demanda]
+    })
+
+@bp.route('/simulacion/riesgo', methods=['POST'])
+@login_requerido
+@rol_requerido('Comercial', 'Gerencia')
+def simulacion_riesgo():
+    """
+    Monte Carlo sobre una cotización: P10/P50/P90 de días y costo total.
+    Body: {cantidad, fecha, muestras?, semilla?, distribuciones?, ruido_precios?}
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No se recibieron datos JSON'}), 400
+
+    config_app = current_app.config
+    try:
+        cantidad = float(data.get('cantidad', 0))
+        if cantidad <= 0: raise ValueError("La cantidad debe ser positiva")
+        if not data.get('fecha'): raise ValueError("La fecha es obligatoria")
+        fecha = datetime.strptime(data['fecha'], '%Y-%m-%d')
+        muestras = int(data.get('muestras', config_app.get('MONTECARLO_MUESTRAS', 10000)))
+        maximo = config_app.get('MONTECARLO_MAX_MUESTRAS', 100000)
+        if not 1 <= muestras <= maximo: raise ValueError(f"muestras debe estar entre 1 y {maximo}")
+        semilla = data.get('semilla')
+        semilla = int(semilla) if semilla is not None else None
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        config = obtener_configuracion()
+        stock_neto = obtener_linea_atp().stock_neto(fecha.date())
+    except Exception as e:
+        print(f"Error cargando datos de simulación: {e}")
+        return jsonify({'error': 'Error de configuración o inventario en BD'}), 500
+
+    superficie_equivalente = stock_neto / RENDIMIENTO_TON_HA
+    try:
+        with medir_simulacion('montecarlo'):
+            riesgo = simular_montecarlo(
+                cantidad, fecha, superficie_equivalente, config.parametros, config.tabla_estacional,
+                distribuciones=data.get('distribuciones'),
+                ruido_precios=data.get('ruido_precios'),
+                muestras=muestras,
+                semilla=semilla,
+                max_segundos=config_app.get('MONTECARLO_MAX_SEG', 2.0)
+            )
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f"Error en Motor de Simulación: {str(e)}"}), 500
+
+    riesgo['base'] = MotorSimulacion.simular(
+        cantidad, fecha, superficie_equivalente, config.parametros, config.tabla_estacional)
+
+    registrar_auditoria({
+        "tipo": "SIMULACION_RIESGO",
+        "usuario": session.get('usuario_id'),
+        "input": {"cant": cantidad, "fecha": data['fecha'], "muestras": muestras, "semilla": semilla},
+        "dias_totales": riesgo['dias_totales'],
+        "costo_total": riesgo['costo_total'],
+        "timestamp": datetime.now(timezone.utc)
+    })
+
+    return jsonify(riesgo)
+
+@bp.route('/simulacion/sensibilidad', methods=['POST'])
+@login_requerido
+@rol_requerido('Comercial', 'Gerencia')
+def simulacion_sensibilidad():
+    """
+    Análisis de sensibilidad (tornado o grilla) sin modificar parametros_sistema.
+    Body: {cantidad, fecha, rangos: {clave: [valores] | {min, max, pasos}}, modo?}
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No se recibieron datos JSON'}), 400
+
+    try:
+        cantidad = float(data.get('cantidad', 0))
+        if cantidad <= 0: raise ValueError("La cantidad debe ser positiva")
+        if not data.get('fecha'): raise ValueError("La fecha es obligatoria")
+        fecha = datetime.strptime(data['fecha'], '%Y-%m-%d')
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        config = obtener_configuracion()
+        stock_neto = obtener_linea_atp().stock_neto(fecha.date())
+    except Exception as e:
+        print(f"Error cargando datos de simulación: {e}")
+        return jsonify({'error': 'Error de configuración o inventario en BD'}), 500
+
+    try:
+        with medir_simulacion('sensibilidad'):
+            resultado = analizar_sensibilidad(
+                cantidad, fecha, stock_neto / RENDIMIENTO_TON_HA, config.parametros, config.tabla_estacional,
+                data.get('rangos'),
+                modo=data.get('modo', 'uno_a_uno'),
+                max_escenarios=current_app.config.get('SENSIBILIDAD_MAX_ESCENARIOS', 50000)
+            )
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f"Error en Motor de Simulación: {str(e)}"}), 500
+
+    return jsonify(resultado)
+
+# Columnas del CSV de auditoría (en NDJSON va el documento completo)
+COLUMNAS_AUDITORIA = ('timestamp', 'tipo', 'usuario', 'input', 'estacion_climatica',
+                      'resultado_financiero', 'resultado_operativo', 'parametros_usados')
+
+@bp.route('/auditoria/exportar', methods=['GET'])
+@login_requerido
+@rol_requerido('Gerencia')
+def exportar_auditoria():
+    """
+    Historial de simulaciones (logs_auditoria) en CSV o NDJSON, leído de Mongo
+    por lotes. Filtros: tipo (por defecto todos los SIMULACION_*), desde/hasta.
+    """
+    try:
+        filtro = {'tipo': request.args.get('tipo') or {'$regex': '^SIMULACION'}}
+        rango = {}
+        for nombre, operador, dias in (('desde', '$gte', 0), ('hasta', '$lt', 1)):
+            if request.args.get(nombre):
+                dia = datetime.strptime(request.args[nombre], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+                rango[operador] = dia + timedelta(days=dias)
+        if rango:
+            filtro['timestamp'] = rango
+    except ValueError:
+        return jsonify({'error': 'Fechas inválidas (formato YYYY-MM-DD)'}), 400
+
+    formato = request.args.get('formato', 'csv')
+    mongo_db = get_mongo_db()
+    if mongo_db is None:
+        return jsonify({'error': 'Auditoría no disponible (MongoDB)'}), 503
+
+    documentos = mongo_db.logs_auditoria.find(filtro, {'_id': 0}).sort('timestamp', 1) \
+        .batch_size(current_app.config.get('EXPORTACION_ITERSIZE', 2000))
+    try:
+        return respuesta_exportacion(documentos, COLUMNAS_AUDITORIA if formato == 'csv' else None,
+                                     formato, 'auditoria_simulaciones')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
\ No newline at end of file
@@ -1,18 +1,41 @@
-from flask import Blueprint, request, jsonify
-from app.db.database import get_db
-from app.utils.security import login_requerido
+from flask import Blueprint, request, jsonify, current_app
+from app.db.database import get_db, transaccion
+from app.db.versiones import incrementar_version
+from app.services.atp import aplicar_cambios_atp, demanda_de_pedido
+from app.db.importacion import importar_desde_peticion
+from app.db.exportacion import respuesta_exportacion, filas_postgres
+from app.utils.security import login_requerido, rol_requerido
+from app.utils.paginacion import ListadoPaginado, respuesta_paginada
 
 bp = Blueprint('pedidos', __name__, url_prefix='/api')
 
+LISTADO_PEDIDOS = ListadoPaginado(
+    'pedidos',
+    ('id', 'cliente', 'producto', 'cantidad_ton', 'fecha_entrega', 'estado', 'creado_en'),
+    orden=('fecha_entrega', 'id'),
+    filtros=('estado', 'cliente'), columna_fecha='fecha_entrega'
+)
+
 @bp.route('/pedidos', methods=['GET'])
 @login_requerido
 def listar_pedidos():
-    """Obtiene todos los pedidos ordenados por fecha de entrega"""
-    db = get_db()
-    with db.cursor() as cursor:
-        cursor.execute("SELECT * FROM pedidos ORDER BY fecha_entrega ASC")
-        pedidos = cursor.fetchall()
-    return jsonify(pedidos)
+    """Obtiene los pedidos ordenados por fecha de entrega (paginado con ?cursor=)"""
+    try:
+        with get_db().cursor() as cursor:
+            pedidos, siguiente = LISTADO_PEDIDOS.consultar(cursor, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return respuesta_paginada(pedidos, siguiente)
+
+@bp.route('/pedidos/exportar', methods=['GET'])
+@login_requerido
+def exportar_pedidos():
+    """Todos los pedidos en CSV o NDJSON (?formato=), con los mismos filtros y fields que el listado"""
+    try:
+        sql, valores, campos = LISTADO_PEDIDOS.consulta_completa(request.args)
+        return respuesta_exportacion(filas_postgres(sql, valores), campos, request.args.get('formato', 'csv'), 'pedidos')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @bp.route('/pedidos', methods=['POST'])
 @login_requerido
@@ -28,17 +51,81 @@ def crear_pedido():
         if not all([cliente, cantidad, fecha]):
             return jsonify({'error': 'Faltan datos obligatorios'}), 400
 
-        db = get_db()
-        with db.cursor() as cursor:
+        with transaccion() as cursor:
             cursor.execute("""
                 INSERT INTO pedidos (cliente, producto, cantidad_ton, fecha_entrega, estado)
                 VALUES (%s, %s, %s, %s, 'pendiente')
+                RETURNING estado, fecha_entrega, cantidad_ton
             """, (cliente, producto, float(cantidad), fecha))
-        db.commit()
+            nuevo = cursor.fetchone()
+            version = incrementar_version(cursor, 'pedidos')['pedidos']
+        aplicar_cambios_atp('pedidos', version, agregar=[demanda_de_pedido(**nuevo)])
         return jsonify({'mensaje': 'Pedido registrado exitosamente'}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/pedidos/importar', methods=['POST'])
+@login_requerido
+@rol_requerido('Comercial', 'Gerencia')
+def importar_pedidos():
+    """Carga masiva de pedidos desde CSV/NDJSON, con reporte de errores por línea"""
+    return importar_desde_peticion('pedidos')
+
+ESTADOS_PEDIDO = ('pendiente', 'entregado', 'cancelado')
+
+def _cambiar_estados(cambios):
+    """
+    Aplica [(id, estado), ...] en un solo UPDATE y actualiza la línea ATP.
+    Devuelve {id: fila} de los pedidos que existían.
+    """
+    with transaccion() as cursor:
+        # El FROM sobre la misma tabla ve la fila antes del UPDATE: estado anterior
+        cursor.execute("""
+            UPDATE pedidos p SET estado = v.estado
+            FROM unnest(%s::int[], %s::text[]) AS v(id, estado), pedidos anterior
+            WHERE p.id = v.id AND anterior.id = p.id
+            RETURNING p.id, anterior.estado AS estado_anterior, p.estado, p.fecha_entrega, p.cantidad_ton
+        """, ([c[0] for c in cambios], [c[1] for c in cambios]))
+        filas = cursor.fetchall()
+        if filas:
+            version = incrementar_version(cursor, 'pedidos')['pedidos']
+    if filas:
+        aplicar_cambios_atp(
+            'pedidos', version,
+            quitar=[demanda_de_pedido(f['estado_anterior'], f['fecha_entrega'], f['cantidad_ton']) for f in filas],
+            agregar=[demanda_de_pedido(f['estado'], f['fecha_entrega'], f['cantidad_ton']) for f in filas]
+        )
+    return {f['id']: f for f in filas}
+
+def _eliminar(ids):
+    """Borra los ids en un solo DELETE. Devuelve {id: fila} de los borrados."""
+    with transaccion() as cursor:
+        cursor.execute(
+            "DELETE FROM pedidos WHERE id = ANY(%s) RETURNING id, estado, fecha_entrega, cantidad_ton",
+            (list(ids),)
+        )
+        borrados = cursor.fetchall()
+        if borrados:
+            version = incrementar_version(cursor, 'pedidos')['pedidos']
+    if borrados:
+        aplicar_cambios_atp('pedidos', version, quitar=[
+            demanda_de_pedido(f['estado'], f['fecha_entrega'], f['cantidad_ton']) for f in borrados
+        ])
+    return {f['id']: f for f in borrados}
+
+def _leer_ids(valores):
+    """Lista de ids enteros, sin repetir y dentro del máximo por lote."""
+    if not isinstance(valores, list) or not valores:
+        raise ValueError('Se espera una lista de ids')
+    maximo = current_app.config.get('MUTACION_LOTE_MAX', 1000)
+    if len(valores) > maximo:
+        raise ValueError(f'Máximo {maximo} pedidos por lote')
+    if any(isinstance(v, bool) or not isinstance(v, int) for v in valores):
+        raise ValueError('Los ids deben ser enteros')
+    if len(set(valores)) != len(valores):
+        raise ValueError('Hay ids repetidos')
+    return valores
+
 @bp.route('/pedidos/<int:id>/estado', methods=['PUT'])
 @login_requerido
 def cambiar_estado(id):
@@ -46,21 +133,68 @@ def cambiar_estado(id):
     data = request.get_json()
     nuevo_estado = data.get('estado')
     
-    if nuevo_estado not in ['pendiente', 'entregado', 'cancelado']:
+    if nuevo_estado not in ESTADOS_PEDIDO:
         return jsonify({'error': 'Estado inválido'}), 400
 
-    db = get_db()
-    with db.cursor() as cursor:
-        cursor.execute("UPDATE pedidos SET estado = %s WHERE id = %s", (nuevo_estado, id))
-    db.commit()
+    _cambiar_estados([(id, nuevo_estado)])
     return jsonify({'mensaje': f'Estado actualizado a {nuevo_estado}'})
 
+@bp.route('/pedidos/estado', methods=['PUT'])
+@login_requerido
+def cambiar_estado_lote():
+    """
+    Cambia el estado de varios pedidos en una sola sentencia.
+    Body: {ids: [...], estado} o {cambios: [{id, estado}, ...]}.
+    Responde el resultado por id ('actualizado' o 'no_encontrado').
+    """
+    data = request.get_json() or {}
+    try:
+        if 'cambios' in data:
+            cambios = data['cambios']
+            if not isinstance(cambios, list) or not all(isinstance(c, dict) for c in cambios):
+                raise ValueError('cambios debe ser una lista de {id, estado}')
+            ids = _leer_ids([c.get('id') for c in cambios])
+            estados = [c.get('estado') for c in cambios]
+        else:
+            ids = _leer_ids(data.get('ids'))
+            estados = [data.get('estado')] * len(ids)
+        if any(e not in ESTADOS_PEDIDO for e in estados):
+            raise ValueError(f"Estado inválido (use {', '.join(ESTADOS_PEDIDO)})")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    actualizados = _cambiar_estados(list(zip(ids, estados)))
+    resultados = []
+    for id in ids:
+        fila = actualizados.get(id)
+        if fila:
+            resultados.append({'id': id, 'resultado': 'actualizado',
+                               'estado_anterior': fila['estado_anterior'], 'estado': fila['estado']})
+        else:
+            resultados.append({'id': id, 'resultado': 'no_encontrado'})
+    return jsonify({
+        'mensaje': f'{len(actualizados)} de {len(ids)} pedidos actualizados',
+        'resultados': resultados
+    })
+
 @bp.route('/pedidos/<int:id>', methods=['DELETE'])
 @login_requerido
 def eliminar_pedido(id):
     """Elimina un pedido permanentemente"""
-    db = get_db()
-    with db.cursor() as cursor:
-        cursor.execute("DELETE FROM pedidos WHERE id = %s", (id,))
-    db.commit()
-    return jsonify({'mensaje': 'Pedido eliminado'})
\ No newline at end of file
+    _eliminar([id])
+    return jsonify({'mensaje': 'Pedido eliminado'})
+
+@bp.route('/pedidos/eliminar', methods=['POST'])
+@login_requerido
+def eliminar_pedidos_lote():
+    """Elimina varios pedidos en una sola sentencia. Body: {ids: [...]}"""
+    try:
+        ids = _leer_ids((request.get_json() or {}).get('ids'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    borrados = _eliminar(ids)
+    return jsonify({
+        'mensaje': f'{len(borrados)} de {len(ids)} pedidos eliminados',
+        'resultados': [{'id': id, 'resultado': 'eliminado' if id in borrados else 'no_encontrado'} for id in ids]
+    })
\ No newline at end of file
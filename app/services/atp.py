@@ -0,0 +1,204 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date
+from decimal import Decimal
+from flask import current_app
+from app.db.database import get_db, instantanea
+from app.db.versiones import leer_versiones
+from app.db.consultas import ejecutar
+
+RENDIMIENTO_TON_HA = 10.0
+# Los lotes cosechados cuentan como oferta para cualquier fecha
+FECHA_COSECHADO = date.min
+TABLAS_ATP = ('lotes', 'pedidos')
+
+class SumaAcumulada:
+    """
+    Cantidades por fecha ordenadas + sumas prefijas.
+    Consultar "total hasta fecha" es una búsqueda binaria; al sumar un delta
+    solo se recalculan los prefijos desde la fecha modificada, y de forma
+    perezosa en la siguiente consulta.
+    """
+    __slots__ = ('fechas', 'cantidades', 'acumulado', 'sucio_desde')
+
+    def __init__(self, filas=()):
+        por_fecha = {}
+        for fecha, cantidad in filas:
+            por_fecha[fecha] = por_fecha.get(fecha, Decimal(0)) + cantidad
+        self.fechas = sorted(por_fecha)
+        self.cantidades = [por_fecha[f] for f in self.fechas]
+        self.acumulado = []
+        self.sucio_desde = 0
+
+    def sumar(self, fecha, delta):
+        i = bisect_left(self.fechas, fecha)
+        if i < len(self.fechas) and self.fechas[i] == fecha:
+            self.cantidades[i] += delta
+            if self.cantidades[i] == 0:
+                del self.fechas[i], self.cantidades[i]
+        else:
+            self.fechas.insert(i, fecha)
+            self.cantidades.insert(i, delta)
+        self.sucio_desde = min(self.sucio_desde, i)
+
+    def _recalcular(self):
+        i = self.sucio_desde
+        if i == len(self.fechas) == len(self.acumulado):
+            return
+        del self.acumulado[i:]
+        total = self.acumulado[-1] if self.acumulado else Decimal(0)
+        for cantidad in self.cantidades[i:]:
+            total += cantidad
+            self.acumulado.append(total)
+        self.sucio_desde = len(self.fechas)
+
+    def hasta(self, fecha):
+        self._recalcular()
+        i = bisect_right(self.fechas, fecha)
+        return self.acumulado[i - 1] if i else Decimal(0)
+
+    def hasta_cada(self, fechas):
+        """hasta() para una lista ordenada de fechas, en una sola pasada."""
+        self._recalcular()
+        resultado, i, n = [], 0, len(self.fechas)
+        for fecha in fechas:
+            while i < n and self.fechas[i] <= fecha:
+                i += 1
+            resultado.append(self.acumulado[i - 1] if i else Decimal(0))
+        return resultado
+
+class LineaATP:
+    """
+    Oferta (hectáreas por fecha de cosecha) y demanda (toneladas por fecha
+    de entrega) acumuladas. Las sumas se guardan en Decimal, igual que SUM()
+    en Postgres, para que stock_neto() dé exactamente lo mismo que las
+    consultas agregadas. `version` es la de versiones_tabla (lotes, pedidos).
+    """
+
+    def __init__(self, oferta, demanda, version=None):
+        self.oferta = SumaAcumulada(oferta)
+        self.demanda = SumaAcumulada(demanda)
+        self.version = dict(version or {})
+        self.cargada_en = time.monotonic()
+        self.lock = threading.Lock()
+
+    def oferta_ha(self, fecha):
+        with self.lock:
+            return self.oferta.hasta(fecha)
+
+    def demanda_ton(self, fecha):
+        with self.lock:
+            return self.demanda.hasta(fecha)
+
+    def stock_neto(self, fecha):
+        """Toneladas comprometibles a la fecha (nunca negativo)."""
+        return self.stock_neto_versionado(fecha)[0]
+
+    def stock_neto_versionado(self, fecha):
+        """(stock_neto, versión de lotes/pedidos) leídos juntos, para usar la versión como llave."""
+        with self.lock:
+            oferta_ton = float(self.oferta.hasta(fecha)) * RENDIMIENTO_TON_HA
+            demanda_ton = float(self.demanda.hasta(fecha))
+            version = tuple(sorted(self.version.items()))
+        return max(0, oferta_ton - demanda_ton), version
+
+    def curva(self, fechas):
+        """Oferta, demanda y stock neto (toneladas) para cada fecha ordenada."""
+        with self.lock:
+            oferta = self.oferta.hasta_cada(fechas)
+            demanda = self.demanda.hasta_cada(fechas)
+        oferta_ton = [float(o) * RENDIMIENTO_TON_HA for o in oferta]
+        demanda_ton = [float(d) for d in demanda]
+        stock = [max(0, o - d) for o, d in zip(oferta_ton, demanda_ton)]
+        return oferta_ton, demanda_ton, stock
+
+def oferta_de_lote(estado, fecha_cosecha_estimada, superficie):
+    """(fecha, hectáreas) con que un lote aporta a la oferta, o None."""
+    if estado == 'cosechado':
+        return FECHA_COSECHADO, superficie
+    if estado == 'activo' and fecha_cosecha_estimada is not None:
+        return fecha_cosecha_estimada, superficie
+    return None
+
+def demanda_de_pedido(estado, fecha_entrega, cantidad_ton):
+    """(fecha, toneladas) con que un pedido compromete stock, o None."""
+    if estado is not None and estado != 'cancelado':
+        return fecha_entrega, cantidad_ton
+    return None
+
+def cargar_linea_atp():
+    """
+    Toda la historia agrupada por fecha (una consulta por tabla) y la versión
+    de lotes/pedidos, leídas en la misma foto de la BD. Con lecturas sueltas
+    una escritura confirmada entre medio dejaría datos nuevos con la versión
+    vieja, y aplicar_cambios_atp() sumaría ese cambio por segunda vez.
+    """
+    with instantanea() as cursor:
+        version = leer_versiones(cursor, *TABLAS_ATP)
+        ejecutar(cursor, 'atp_oferta')
+        oferta = [(row['fecha'] or FECHA_COSECHADO, row['total']) for row in cursor.fetchall()]
+
+        ejecutar(cursor, 'atp_demanda')
+        demanda = [(row['fecha'], row['total']) for row in cursor.fetchall()]
+    return LineaATP(oferta, demanda, version)
+
+_lock = threading.Lock()
+_actual = None
+_ultimo_chequeo = 0.0
+
+def obtener_linea_atp():
+    """
+    Línea ATP de este worker. Cada ATP_CHEQUEO_SEG compara su versión con
+    versiones_tabla; si otro worker escribió (o pasaron ATP_RECARGA_SEG) la
+    reconstruye desde la BD. Las escrituras de este worker la actualizan en
+    el lugar con aplicar_cambios_atp().
+    """
+    global _actual, _ultimo_chequeo
+    config = current_app.config
+    ahora = time.monotonic()
+    actual = _actual
+    if actual is not None and ahora - _ultimo_chequeo < config.get('ATP_CHEQUEO_SEG', 1.0):
+        return actual
+
+    with get_db().cursor() as cursor:
+        version = leer_versiones(cursor, *TABLAS_ATP)
+    vencida = actual is not None and ahora - actual.cargada_en > config.get('ATP_RECARGA_SEG', 300.0)
+    if actual is None or actual.version != version or vencida:
+        with _lock:
+            if _actual is None or _actual.version != version or vencida:
+                _actual = cargar_linea_atp()
+            actual = _actual
+    _ultimo_chequeo = ahora
+    return actual
+
+def aplicar_cambios_atp(tabla, nueva_version, quitar=(), agregar=()):
+    """
+    Aplica en memoria el efecto de una escritura ya confirmada.
+    `quitar`/`agregar` son (fecha, cantidad) o None. Si la versión local no
+    es la inmediatamente anterior, otro worker escribió entre medio y la
+    línea se descarta para reconstruirla en la próxima lectura.
+    """
+    global _actual
+    with _lock:
+        actual = _actual
+        if actual is None:
+            return
+        if actual.version.get(tabla) != nueva_version - 1:
+            _actual = None
+            return
+        suma = actual.oferta if tabla == 'lotes' else actual.demanda
+        with actual.lock:
+            for item in quitar:
+                if item is not None:
+                    suma.sumar(item[0], -item[1])
+            for item in agregar:
+                if item is not None:
+                    suma.sumar(item[0], item[1])
+            actual.version[tabla] = nueva_version
+
+def invalidar_linea_atp():
+    """Descarta la línea (p.ej. tras cargas masivas)."""
+    global _actual
+    with _lock:
+        _actual = None
\ No newline at end of file
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+class _Vuelo:
+    """Cálculo en curso de una llave: los que llegan después esperan su resultado."""
+    __slots__ = ('listo', 'resultado', 'error')
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+
+class CacheSimulaciones:
+    """
+    Resultados de MotorSimulacion.simular por llave (cantidad, fecha, versión
+    de configuración, versión ATP), con LRU y TTL. Como la llave incluye las
+    versiones, una escritura en parámetros, lotes o pedidos deja las entradas
+    viejas sin uso (el TTL y el LRU las sacan).
+
+    Peticiones idénticas simultáneas se agrupan (single-flight): la primera
+    calcula y las demás esperan hasta `espera_seg` su resultado. Los errores
+    no se guardan: se propagan a los que esperaban y la próxima llamada
+    vuelve a calcular. Los resultados se comparten entre peticiones, así que
+    no deben modificarse.
+    """
+
+    def __init__(self, ttl_seg=30.0, max_entradas=1000, espera_seg=5.0):
+        self.ttl_seg = ttl_seg
+        self.max_entradas = max_entradas
+        self.espera_seg = espera_seg
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # llave -> (resultado, vence_en)
+        self._en_vuelo = {}
+
+    def obtener_o_calcular(self, llave, calcular):
+        """(resultado, origen) con origen 'cache', 'compartido' o 'calculado'."""
+        with self._lock:
+            entrada = self._entradas.get(llave)
+            if entrada is not None:
+                if entrada[1] > time.monotonic():
+                    self._entradas.move_to_end(llave)
+                    return entrada[0], 'cache'
+                del self._entradas[llave]
+            vuelo = self._en_vuelo.get(llave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._en_vuelo[llave] = _Vuelo()
+
+        if not lider:
+            if vuelo.listo.wait(self.espera_seg):
+                if vuelo.error is not None:
+                    raise vuelo.error
+                return vuelo.resultado, 'compartido'
+            # El que calcula tarda demasiado: se calcula aparte, sin registrar el vuelo
+            return calcular(), 'calculado'
+
+        try:
+            vuelo.resultado = calcular()
+        except Exception as e:
+            vuelo.error = e
+            raise
+        else:
+            with self._lock:
+                self._entradas[llave] = (vuelo.resultado, time.monotonic() + self.ttl_seg)
+                self._entradas.move_to_end(llave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+            return vuelo.resultado, 'calculado'
+        finally:
+            with self._lock:
+                self._en_vuelo.pop(llave, None)
+            vuelo.listo.set()
+
+    def invalidar(self):
+        with self._lock:
+            self._entradas.clear()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache_simulaciones():
+    """Cache de este worker; None si SIMULACION_CACHE_TTL_SEG es 0."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = current_app.config
+                _cache = CacheSimulaciones(
+                    config.get('SIMULACION_CACHE_TTL_SEG', 30.0),
+                    config.get('SIMULACION_CACHE_MAX', 1000),
+                    config.get('SIMULACION_CACHE_ESPERA_SEG', 5.0)
+                )
+    return _cache if _cache.ttl_seg > 0 else None
@@ -0,0 +1,100 @@
+import threading
+import time
+from types import MappingProxyType
+from flask import current_app
+from app.db.database import get_db
+from app.db.versiones import leer_versiones
+from app.db.consultas import ejecutar
+from app.services.predictor import TablaEstacional
+
+TABLAS_CONFIG = ('parametros_sistema', 'configuracion_estacional')
+
+# Valores usados si la tabla parametros_sistema está vacía
+PARAMETROS_POR_DEFECTO = {
+    'precio_agua_m3': 2500.0, 'precio_kwh': 180.0, 'precio_diesel_L': 1150.0,
+    'consumo_agua_ton': 3.0, 'consumo_energia_ton': 40.0, 'consumo_diesel_ton': 12.5,
+    'horas_hombre_ton': 4.5, 'costo_hh_operario': 5500.0, 'insumos_varios_ton': 5000.0,
+    'capacidad_planta_dia': 2.5, 'dias_ciclo_base': 45.0, 'capacidad_cosecha_dia': 5.0
+}
+
+class ConfiguracionSimulacion:
+    """
+    Foto inmutable de parametros_sistema + configuracion_estacional, ya
+    convertida a float y con la tabla estacional compilada. Se comparte
+    entre peticiones del mismo worker y se reemplaza entera cuando cambia
+    la versión en versiones_tabla.
+    """
+    __slots__ = ('version', 'parametros', 'filas_parametros', 'estaciones', 'tabla_estacional', 'usa_defecto')
+
+    def __init__(self, version, filas_parametros, estaciones):
+        parametros = {f['clave']: f['valor'] for f in filas_parametros}
+        usa_defecto = not parametros
+        if usa_defecto:
+            parametros = dict(PARAMETROS_POR_DEFECTO)
+
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'parametros', MappingProxyType(parametros))
+        object.__setattr__(self, 'filas_parametros', tuple(MappingProxyType(f) for f in filas_parametros))
+        object.__setattr__(self, 'estaciones', tuple(MappingProxyType(e) for e in estaciones))
+        object.__setattr__(self, 'tabla_estacional', TablaEstacional(estaciones))
+        object.__setattr__(self, 'usa_defecto', usa_defecto)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("ConfiguracionSimulacion es inmutable")
+
+def _cargar(cursor, version):
+    ejecutar(cursor, 'parametros_sistema')
+    filas_parametros = []
+    for row in cursor.fetchall():
+        row = dict(row)
+        row['valor'] = float(row['valor'])
+        filas_parametros.append(row)
+
+    ejecutar(cursor, 'configuracion_estacional')
+    estaciones = []
+    for row in cursor.fetchall():
+        estaciones.append({
+            'id': row['id'],
+            'nombre_estacion': row['nombre_estacion'],
+            'meses_asociados': row['meses_asociados'],
+            'factor_biomasa': float(row['factor_biomasa']),
+            'factor_secado': float(row['factor_secado']),
+            'factor_energia': float(row['factor_energia']),
+            'factor_crecimiento': float(row['factor_crecimiento']),
+            'descripcion': row['descripcion']
+        })
+    return ConfiguracionSimulacion(version, filas_parametros, estaciones)
+
+_lock = threading.Lock()
+_actual = None
+_ultimo_chequeo = float('-inf')
+
+def obtener_configuracion():
+    """
+    Devuelve la configuración vigente. Solo consulta la versión en la BD
+    (una fila por tabla) si pasaron CONFIG_CHEQUEO_SEG desde la última vez,
+    y solo relee las tablas si la versión cambió.
+    """
+    global _actual, _ultimo_chequeo
+    ahora = time.monotonic()
+    if _actual is not None and ahora - _ultimo_chequeo < current_app.config.get('CONFIG_CHEQUEO_SEG', 1.0):
+        return _actual
+
+    with get_db().cursor() as cursor:
+        versiones = leer_versiones(cursor, *TABLAS_CONFIG)
+        version = tuple(versiones[t] for t in TABLAS_CONFIG)
+        actual = _actual
+        if actual is None or actual.version != version:
+            with _lock:
+                if _actual is None or _actual.version != version:
+                    _actual = _cargar(cursor, version)
+                actual = _actual
+    _ultimo_chequeo = ahora
+    if actual.usa_defecto:
+        print("ADVERTENCIA: Tabla parametros_sistema vacía. Usando valores por defecto.")
+    return actual
+
+def invalidar_configuracion():
+    """Fuerza a revisar la versión en la próxima lectura (tras escribir en este worker)."""
+    global _ultimo_chequeo
+    _ultimo_chequeo = float('-inf')  # time.monotonic() puede ser menor que CONFIG_CHEQUEO_SEG
\ No newline at end of file
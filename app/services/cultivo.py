@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+def dias_hasta_cosecha(tipo_alga, mes):
+    """Días de cultivo según el tipo de alga y el mes de siembra."""
+    # 1. Días base según tipo de alga
+    dias_base = 45 if tipo_alga == 'Gracilaria' else 60
+    
+    # 2. Factor Estacional (En invierno crece más lento)
+    factor = 1.0
+    if mes in [5, 6, 7, 8]: # Invierno
+        factor = 1.3 # Tarda un 30% más
+    elif mes in [1, 2, 12]: # Verano
+        factor = 0.9 # Crece un 10% más rápido
+        
+    return int(dias_base * factor)
+
+def fecha_cosecha_estimada(fecha_siembra, tipo_alga):
+    """Fecha de siembra (date o datetime) + días de cultivo."""
+    return fecha_siembra + timedelta(days=dias_hasta_cosecha(tipo_alga, fecha_siembra.month))
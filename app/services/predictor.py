@@ -1,41 +1,75 @@
 from datetime import datetime
+from collections import namedtuple
+import numpy as np
+
+FactoresEstacion = namedtuple('FactoresEstacion', 'nombre biomasa secado energia crecimiento')
+
+FACTORES_FALLBACK = FactoresEstacion("Estandar (Fallback)", 1.0, 1.0, 1.1, 1.0)
+
+class TablaEstacional:
+    """
+    Tabla de 12 entradas (enero..diciembre) con los factores de cada mes,
+    compilada una vez desde configuracion_estacional. Las filas inválidas y
+    los meses repetidos se reportan al compilar; si un mes está en dos
+    estaciones gana la primera (mismo criterio que la búsqueda lineal).
+    """
+    __slots__ = ('por_mes', 'matriz', 'advertencias')
+
+    def __init__(self, lista_estaciones):
+        por_mes = [None] * 12
+        advertencias = []
+        for estacion in lista_estaciones:
+            nombre = estacion.get('nombre_estacion', '?')
+            try:
+                meses = [int(x) for x in estacion['meses_asociados'].split(',')]
+                factores = FactoresEstacion(
+                    nombre,
+                    float(estacion['factor_biomasa']),
+                    float(estacion['factor_secado']),
+                    float(estacion['factor_energia']),
+                    float(estacion['factor_crecimiento'])
+                )
+            except Exception as e:
+                advertencias.append(f"Error parseando meses de estacion {nombre}: {e}")
+                continue
+
+            for mes in meses:
+                if not 1 <= mes <= 12:
+                    advertencias.append(f"Mes fuera de rango en estacion {nombre}: {mes}")
+                elif por_mes[mes - 1] is not None:
+                    advertencias.append(f"Mes {mes} repetido en {por_mes[mes - 1].nombre} y {nombre}")
+                else:
+                    por_mes[mes - 1] = factores
+
+        self.por_mes = tuple(f or FACTORES_FALLBACK for f in por_mes)
+        # Misma tabla como matriz 12x4 (biomasa, secado, energia, crecimiento) para el motor vectorizado
+        self.matriz = np.array([f[1:] for f in self.por_mes], dtype=float)
+        self.advertencias = tuple(advertencias)
+        for advertencia in advertencias:
+            print(advertencia)
+
+    def factores(self, mes):
+        return self.por_mes[mes - 1]
 
 class MotorSimulacion:
     
     @staticmethod
     def obtener_factores_dinamicos(mes, lista_estaciones):
         """
-        Busca en la lista de estaciones (desde BD) cuál coincide con el mes actual.
-        Si no encuentra, devuelve factores neutros (1.0).
+        Factores del mes según la configuración estacional (TablaEstacional
+        ya compilada o lista de estaciones desde BD).
+        Si ninguna estación incluye el mes, devuelve factores neutros.
         """
-        for estacion in lista_estaciones:
-            # Convertimos el string '5,6,7,8' a una lista de enteros [5, 6, 7, 8]
-            try:
-                meses = [int(x) for x in estacion['meses_asociados'].split(',')]
-                if mes in meses:
-                    return {
-                        "nombre": estacion['nombre_estacion'],
-                        "biomasa": float(estacion['factor_biomasa']),
-                        "secado": float(estacion['factor_secado']),
-                        "energia": float(estacion['factor_energia']),
-                        "crecimiento": float(estacion['factor_crecimiento'])
-                    }
-            except Exception as e:
-                print(f"Error parseando meses de estacion {estacion['nombre_estacion']}: {e}")
-                continue
-        
-        # Fallback (Por defecto)
-        return { 
-            "nombre": "Estandar (Fallback)", 
-            "biomasa": 1.0, "secado": 1.0, "energia": 1.1, "crecimiento": 1.0 
-        }
+        if not isinstance(lista_estaciones, TablaEstacional):
+            lista_estaciones = TablaEstacional(lista_estaciones)
+        return lista_estaciones.por_mes[mes - 1]
 
     @staticmethod
     def simular(cantidad_solicitada, fecha_objetivo, superficie_cultivada, params_economicos, lista_estaciones):
         """
         Ahora recibe DOS configuraciones:
         1. params_economicos: Precios y costos ($)
-        2. lista_estaciones: Reglas biológicas (Clima)
+        2. lista_estaciones: Reglas biológicas (Clima), idealmente ya compiladas en TablaEstacional
         """
         if isinstance(fecha_objetivo, str):
             fecha_objetivo = datetime.strptime(fecha_objetivo, '%Y-%m-%d')
@@ -49,30 +83,28 @@ class MotorSimulacion:
         # 2. ANÁLISIS DE STOCK (Afectado por Factor Biomasa)
         # ---------------------------------------------------------
         rendimiento_base = 10.0 # Esto también podría venir de params_economicos si quisieras
-        stock_proyectado = superficie_cultivada * rendimiento_base * factores['biomasa']
+        stock_proyectado = superficie_cultivada * rendimiento_base * factores.biomasa
         deficit = max(0, cantidad_solicitada - stock_proyectado)
         
         # ---------------------------------------------------------
         # 3. TIEMPO OPERATIVO (Afectado por Factor Secado)
         # ---------------------------------------------------------
-        cap_planta = params_economicos.get('capacidad_planta_dia', 2.5) * factores['secado']
+        cap_planta = params_economicos.get('capacidad_planta_dia', 2.5) * factores.secado
         dias_fabrica = cantidad_solicitada / cap_planta
         
         dias_agricola = 0
-        mensaje_estado = "Stock Disponible"
         
         if deficit > 0:
             ciclo_base = params_economicos.get('dias_ciclo_base', 45)
             # Afectado por Factor Crecimiento (Verano crece más rápido)
-            tiempo_crecimiento = ciclo_base / factores['crecimiento']
+            tiempo_crecimiento = ciclo_base / factores.crecimiento
             
             cap_cosecha = params_economicos.get('capacidad_cosecha_dia', 5.0)
             tiempo_cosecha = deficit / cap_cosecha
             
             dias_agricola = tiempo_crecimiento + tiempo_cosecha
-            mensaje_estado = "Requiere Ciclo de Cultivo Completo"
 
-        dias_totales = round(dias_agricola + dias_fabrica + 2, 1)
+        dias_totales = dias_agricola + dias_fabrica + 2
 
         # ---------------------------------------------------------
         # 4. CÁLCULO DE COSTOS (Afectado por Factor Energía)
@@ -80,7 +112,7 @@ class MotorSimulacion:
         costo_agua = cantidad_solicitada * params_economicos['consumo_agua_ton'] * params_economicos['precio_agua_m3']
         
         # En invierno (factor energía > 1) se paga más luz
-        costo_energia = cantidad_solicitada * params_economicos['consumo_energia_ton'] * params_economicos['precio_kwh'] * factores['energia']
+        costo_energia = cantidad_solicitada * params_economicos['consumo_energia_ton'] * params_economicos['precio_kwh'] * factores.energia
         
         costo_diesel = cantidad_solicitada * params_economicos['consumo_diesel_ton'] * params_economicos['precio_diesel_L']
         costo_mo = cantidad_solicitada * params_economicos['horas_hombre_ton'] * params_economicos['costo_hh_operario']
@@ -91,20 +123,28 @@ class MotorSimulacion:
         if deficit > 0:
             costo_total_neto = costo_total_neto * 1.15
 
+        return MotorSimulacion._armar_resultado(
+            fecha_objetivo, factores, stock_proyectado, deficit, dias_totales,
+            costo_total_neto, costo_agua, costo_energia, costo_diesel, costo_mo
+        )
+
+    @staticmethod
+    def _armar_resultado(fecha_objetivo, factores, stock_proyectado, deficit, dias_totales,
+                         costo_total_neto, costo_agua, costo_energia, costo_diesel, costo_mo):
         return {
             "escenario": {
                 "fecha": fecha_objetivo.strftime("%Y-%m-%d"),
-                "estacion_detectada": factores['nombre'], # Mostramos qué detectó la BD
-                "factores_aplicados": factores
+                "estacion_detectada": factores.nombre, # Mostramos qué detectó la BD
+                "factores_aplicados": factores._asdict()
             },
             "resultado": {
                 "es_factible": True,
                 "stock_disponible": round(stock_proyectado, 2),
                 "deficit_a_cultivar": round(deficit, 2),
-                "mensaje_origen": mensaje_estado
+                "mensaje_origen": "Requiere Ciclo de Cultivo Completo" if deficit > 0 else "Stock Disponible"
             },
             "operaciones": {
-                "dias_totales": dias_totales
+                "dias_totales": round(dias_totales, 1)
             },
             "financiero": {
                 "costo_total": round(costo_total_neto, 0),
@@ -115,4 +155,69 @@ class MotorSimulacion:
                     "mano_obra": round(costo_mo, 0)
                 }
             }
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def simular_vectorizado(cantidades, meses, superficies, params_economicos, tabla, factores=None):
+        """
+        Misma lógica que simular() pero sobre arreglos NumPy: un escenario por
+        posición. Las operaciones se hacen en el mismo orden que la versión
+        escalar para que los float64 resultantes sean idénticos.
+        Los valores de params_economicos pueden ser escalares o arreglos, y
+        `factores` (n x 4: biomasa, secado, energia, crecimiento) reemplaza a
+        la tabla estacional cuando se quieren factores por escenario.
+        Devuelve un dict de arreglos sin redondear.
+        """
+        p = params_economicos
+        cantidad = np.asarray(cantidades, dtype=float)
+        if factores is None:
+            factores = tabla.matriz[np.asarray(meses, dtype=int) - 1]
+        biomasa, secado, energia, crecimiento = np.asarray(factores, dtype=float).T
+
+        # STOCK
+        rendimiento_base = 10.0
+        stock = np.asarray(superficies, dtype=float) * rendimiento_base * biomasa
+        deficit = np.maximum(cantidad - stock, 0.0)
+        con_deficit = deficit > 0
+
+        # TIEMPO OPERATIVO
+        dias_fabrica = cantidad / (p.get('capacidad_planta_dia', 2.5) * secado)
+        tiempo_crecimiento = p.get('dias_ciclo_base', 45) / crecimiento
+        tiempo_cosecha = deficit / p.get('capacidad_cosecha_dia', 5.0)
+        dias_agricola = np.where(con_deficit, tiempo_crecimiento + tiempo_cosecha, 0.0)
+        dias_totales = dias_agricola + dias_fabrica + 2
+
+        # COSTOS
+        costo_agua = cantidad * p['consumo_agua_ton'] * p['precio_agua_m3']
+        costo_energia = cantidad * p['consumo_energia_ton'] * p['precio_kwh'] * energia
+        costo_diesel = cantidad * p['consumo_diesel_ton'] * p['precio_diesel_L']
+        costo_mo = cantidad * p['horas_hombre_ton'] * p['costo_hh_operario']
+        costo_insumos = cantidad * p['insumos_varios_ton']
+        costo_total = costo_agua + costo_energia + costo_diesel + costo_mo + costo_insumos
+        costo_total = np.where(con_deficit, costo_total * 1.15, costo_total)
+
+        return {
+            'stock': stock, 'deficit': deficit, 'dias_totales': dias_totales,
+            'costo_total': costo_total, 'costo_agua': costo_agua, 'costo_energia': costo_energia,
+            'costo_diesel': costo_diesel, 'costo_mo': costo_mo
+        }
+
+    @staticmethod
+    def simular_lote(cantidades, fechas, superficies, params_economicos, tabla):
+        """Versión vectorizada de simular() que devuelve la misma lista de dicts."""
+        fechas = [datetime.strptime(f, '%Y-%m-%d') if isinstance(f, str) else f for f in fechas]
+        v = MotorSimulacion.simular_vectorizado(
+            cantidades, [f.month for f in fechas], superficies, params_economicos, tabla)
+        columnas = zip(
+            v['stock'].tolist(), v['deficit'].tolist(), v['dias_totales'].tolist(),
+            v['costo_total'].tolist(), v['costo_agua'].tolist(), v['costo_energia'].tolist(),
+            v['costo_diesel'].tolist(), v['costo_mo'].tolist()
+        )
+        resultados = []
+        for fecha, (stock, deficit, dias, total, agua, energia, diesel, mo) in zip(fechas, columnas):
+            resultados.append(MotorSimulacion._armar_resultado(
+                fecha, tabla.por_mes[fecha.month - 1], stock,
+                deficit if deficit > 0 else 0,  # simular() usa max(0, x): entero 0 sin déficit
+                dias, total, agua, energia, diesel, mo
+            ))
+        return resultados
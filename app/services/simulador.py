@@ -0,0 +1,223 @@
+import math
+import time
+import numpy as np
+from app.services.predictor import MotorSimulacion
+
+FACTORES = ('biomasa', 'secado', 'energia', 'crecimiento')
+TIPOS_DISTRIBUCION = ('normal', 'uniforme', 'triangular', 'fijo')
+PERCENTILES = (10, 50, 90)
+TAM_BLOQUE = 10000
+FACTOR_MINIMO = 0.01  # Un factor <= 0 no tiene sentido físico (y divide por cero)
+
+def _muestrear(rng, distribucion, centro, n):
+    """n valores alrededor de `centro` (el factor o precio configurado)."""
+    tipo = distribucion.get('tipo', 'normal')
+    if tipo == 'normal':
+        valores = rng.normal(centro, abs(centro) * float(distribucion.get('cv', 0.1)), n)
+    elif tipo == 'uniforme':
+        a = float(distribucion.get('amplitud', 0.2))
+        valores = rng.uniform(centro * (1 - a), centro * (1 + a), n)
+    elif tipo == 'triangular':
+        a = float(distribucion.get('amplitud', 0.2))
+        valores = rng.triangular(centro * (1 - a), centro, centro * (1 + a), n)
+    elif tipo == 'fijo':
+        valores = np.full(n, centro)
+    else:
+        raise ValueError(f"Distribución desconocida: {tipo} (use {', '.join(TIPOS_DISTRIBUCION)})")
+    return np.maximum(valores, FACTOR_MINIMO * abs(centro))
+
+def _resumen(valores):
+    p = np.percentile(valores, PERCENTILES)
+    resumen = {f'p{q}': round(float(v), 1) for q, v in zip(PERCENTILES, p)}
+    resumen['media'] = round(float(valores.mean()), 1)
+    return resumen
+
+def simular_montecarlo(cantidad, fecha, superficie, params_economicos, tabla,
+                       distribuciones=None, ruido_precios=None, muestras=10000,
+                       semilla=None, max_segundos=None):
+    """
+    Riesgo de una cotización: repite simular() con factores estacionales (y
+    opcionalmente precios) muestreados, en bloques vectorizados de TAM_BLOQUE.
+
+    - distribuciones: {estacion | '*': {factor: {tipo, cv | amplitud}}}. Los
+      factores sin distribución usan una normal con cv 0.1.
+    - ruido_precios: {clave de parametros_sistema: cv} (ruido normal).
+    - semilla: misma semilla y mismas entradas => mismos percentiles.
+    - max_segundos: corta entre bloques si se excede (resultado 'truncado').
+    """
+    distribuciones = distribuciones or {}
+    ruido_precios = ruido_precios or {}
+    for clave in ruido_precios:
+        if clave not in params_economicos:
+            raise ValueError(f"Parámetro desconocido en ruido_precios: {clave}")
+
+    base = tabla.factores(fecha.month)
+    por_estacion = distribuciones.get(base.nombre, distribuciones.get('*', {}))
+    for factor in por_estacion:
+        if factor not in FACTORES:
+            raise ValueError(f"Factor desconocido: {factor} (use {', '.join(FACTORES)})")
+
+    rng = np.random.default_rng(semilla)
+    inicio = time.perf_counter()
+    dias, costos, deficits = [], [], []
+    hechas = 0
+    while hechas < muestras:
+        n = min(TAM_BLOQUE, muestras - hechas)
+        factores = np.column_stack([
+            _muestrear(rng, por_estacion.get(f, {}), getattr(base, f), n) for f in FACTORES
+        ])
+        params = dict(params_economicos)
+        for clave, cv in ruido_precios.items():
+            params[clave] = _muestrear(rng, {'tipo': 'normal', 'cv': cv}, params[clave], n)
+
+        v = MotorSimulacion.simular_vectorizado(
+            np.full(n, cantidad), None, np.full(n, superficie), params, tabla, factores=factores)
+        dias.append(v['dias_totales'])
+        costos.append(v['costo_total'])
+        deficits.append(v['deficit'] > 0)
+        hechas += n
+        if max_segundos is not None and time.perf_counter() - inicio > max_segundos:
+            break
+
+    dias = np.concatenate(dias)
+    costos = np.concatenate(costos)
+    return {
+        'muestras': hechas,
+        'solicitadas': muestras,
+        'truncado': hechas < muestras,
+        'semilla': semilla,
+        'estacion': base.nombre,
+        'dias_totales': _resumen(dias),
+        'costo_total': _resumen(costos),
+        'probabilidad_deficit': round(float(np.concatenate(deficits).mean()), 4)
+    }
+
+MODOS_SENSIBILIDAD = ('uno_a_uno', 'grilla')
+# Parámetros que dividen en el motor: un valor 0 no es un escenario válido
+DIVISORES = ('capacidad_planta_dia', 'capacidad_cosecha_dia', 'factor_secado', 'factor_crecimiento')
+
+def _valores_rango(clave, rango, max_valores):
+    """Lista de valores a evaluar: [v1, v2, ...] o {min, max, pasos}."""
+    if isinstance(rango, dict):
+        minimo, maximo = float(rango['min']), float(rango['max'])
+        pasos = int(rango.get('pasos', 5))
+        if pasos < 2 or maximo < minimo:
+            raise ValueError(f"Rango inválido para {clave}: se espera min <= max y pasos >= 2")
+        # Antes de reservar memoria: pasos viene del cliente
+        if pasos > max_valores:
+            raise ValueError(f"Demasiados valores para {clave} ({pasos}); máximo {max_valores}")
+        valores = np.linspace(minimo, maximo, pasos).tolist()
+    elif isinstance(rango, list) and rango:
+        if len(rango) > max_valores:
+            raise ValueError(f"Demasiados valores para {clave} ({len(rango)}); máximo {max_valores}")
+        valores = [float(v) for v in rango]
+    else:
+        raise ValueError(f"Rango inválido para {clave}: lista de valores o {{min, max, pasos}}")
+    if any(not np.isfinite(v) or v < 0 for v in valores):
+        raise ValueError(f"Valores inválidos para {clave}: deben ser números >= 0")
+    if clave in DIVISORES and min(valores) == 0:
+        raise ValueError(f"{clave} no puede ser 0")
+    return valores
+
+def _impacto(parametro, valores, dias, costos):
+    return {
+        'parametro': parametro,
+        'valores': [round(v, 4) for v in valores],
+        'dias_totales': [round(float(d), 1) for d in dias],
+        'costo_total': [round(float(c), 0) for c in costos],
+        'impacto_dias': round(float(np.max(dias) - np.min(dias)), 1),
+        'impacto_costo': round(float(np.max(costos) - np.min(costos)), 0)
+    }
+
+def analizar_sensibilidad(cantidad, fecha, superficie, params_economicos, tabla,
+                          rangos, modo='uno_a_uno', max_escenarios=50000):
+    """
+    Sensibilidad de días y costo total a parámetros de parametros_sistema y
+    a los factores de la estación (claves factor_biomasa, factor_secado,
+    factor_energia, factor_crecimiento). Trabaja sobre una copia de los
+    parámetros: nunca toca la configuración vigente.
+
+    - uno_a_uno: cada parámetro se mueve solo, el resto queda en la base
+      (diagrama tornado).
+    - grilla: todas las combinaciones; el impacto de cada parámetro es la
+      diferencia entre el mayor y el menor promedio por valor (efecto principal).
+
+    Todos los escenarios se evalúan en una sola llamada a simular_vectorizado.
+    """
+    if modo not in MODOS_SENSIBILIDAD:
+        raise ValueError(f"Modo desconocido: {modo} (use {', '.join(MODOS_SENSIBILIDAD)})")
+    if not isinstance(rangos, dict) or not rangos:
+        raise ValueError("Se espera un objeto 'rangos' con al menos un parámetro")
+
+    base = tabla.factores(fecha.month)
+    claves = list(rangos)
+    for clave in claves:
+        es_factor = clave.startswith('factor_') and clave.removeprefix('factor_') in FACTORES
+        if clave not in params_economicos and not es_factor:
+            raise ValueError(f"Parámetro desconocido: {clave}")
+    # Cada parámetro por sí solo ya no puede superar el máximo de escenarios
+    valores = [_valores_rango(clave, rangos[clave], max_escenarios - 1) for clave in claves]
+
+    if modo == 'uno_a_uno':
+        n = 1 + sum(len(v) for v in valores)
+    else:
+        n = 1 + math.prod(len(v) for v in valores)  # Entero de Python: sin desborde
+    if n > max_escenarios:
+        raise ValueError(f"Demasiados escenarios ({n}); máximo {max_escenarios}")
+
+    # Columna por parámetro barrido; la fila 0 es siempre el escenario base
+    columnas = {}
+    for clave, vals in zip(claves, valores):
+        centro = getattr(base, clave.removeprefix('factor_')) if clave.startswith('factor_') else params_economicos[clave]
+        columnas[clave] = np.full(n, float(centro))
+    if modo == 'uno_a_uno':
+        fila = 1
+        for clave, vals in zip(claves, valores):
+            columnas[clave][fila:fila + len(vals)] = vals
+            fila += len(vals)
+    else:
+        malla = np.meshgrid(*valores, indexing='ij')
+        for clave, eje in zip(claves, malla):
+            columnas[clave][1:] = eje.ravel()
+
+    params = dict(params_economicos)
+    factores = np.tile(np.array(base[1:], dtype=float), (n, 1))
+    for clave, columna in columnas.items():
+        if clave.startswith('factor_'):
+            factores[:, FACTORES.index(clave.removeprefix('factor_'))] = columna
+        else:
+            params[clave] = columna
+
+    v = MotorSimulacion.simular_vectorizado(
+        np.full(n, cantidad), None, np.full(n, superficie), params, tabla, factores=factores)
+    dias, costos = v['dias_totales'], v['costo_total']
+
+    resultado = {
+        'modo': modo,
+        'escenarios': n,
+        'estacion': base.nombre,
+        'base': {'dias_totales': round(float(dias[0]), 1), 'costo_total': round(float(costos[0]), 0)}
+    }
+    impactos = []
+    if modo == 'uno_a_uno':
+        fila = 1
+        for clave, vals in zip(claves, valores):
+            tramo = slice(fila, fila + len(vals))
+            impactos.append(_impacto(clave, vals, dias[tramo], costos[tramo]))
+            fila += len(vals)
+    else:
+        forma = [len(v) for v in valores]
+        dias_malla, costos_malla = dias[1:].reshape(forma), costos[1:].reshape(forma)
+        for eje, (clave, vals) in enumerate(zip(claves, valores)):
+            otros = tuple(i for i in range(len(claves)) if i != eje)
+            impactos.append(_impacto(clave, vals, dias_malla.mean(axis=otros), costos_malla.mean(axis=otros)))
+        resultado['grilla'] = {
+            'parametros': claves,
+            'combinaciones': np.column_stack([columnas[c][1:] for c in claves]).round(4).tolist(),
+            'dias_totales': dias[1:].round(1).tolist(),
+            'costo_total': costos[1:].round(0).tolist()
+        }
+
+    resultado['sensibilidad'] = sorted(impactos, key=lambda i: i['impacto_costo'], reverse=True)
+    resultado['ranking_dias'] = [i['parametro'] for i in sorted(impactos, key=lambda i: i['impacto_dias'], reverse=True)]
+    return resultado
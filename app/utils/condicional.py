@@ -0,0 +1,62 @@
+import hashlib
+from datetime import date
+from functools import wraps
+from flask import request, make_response, current_app
+from app.db.database import get_db
+from app.db.versiones import leer_versiones
+
+def _responder(partes, f, args, kwargs):
+    etag = hashlib.sha1('|'.join(partes).encode()).hexdigest()[:24]
+    if request.if_none_match.contains(etag):
+        respuesta = current_app.response_class(status=304)
+    else:
+        respuesta = make_response(f(*args, **kwargs))
+        if respuesta.status_code != 200:
+            return respuesta
+    respuesta.set_etag(etag)
+    # El navegador guarda la respuesta pero revalida siempre con If-None-Match
+    respuesta.headers['Cache-Control'] = 'private, no-cache'
+    return respuesta
+
+def etag_por_versiones(*tablas, por_dia=False):
+    """
+    GET condicional: el ETag sale de la URL y de las versiones (versiones_tabla)
+    de las tablas de las que depende la respuesta. Si coincide con
+    If-None-Match se responde 304 sin ejecutar la vista.
+
+    Las versiones se leen antes de la vista: si alguien escribe entre medio, la
+    respuesta lleva datos nuevos con un ETag viejo y la próxima petición
+    simplemente no coincide (nunca se da por vigente algo desactualizado).
+    Sirve solo para vistas que leen la BD en la misma petición; las que
+    responden desde una cache deben usar etag_por_foto.
+    `por_dia` agrega la fecha de hoy, para vistas cuyo rango por defecto
+    depende de ella.
+    """
+    def decorador(f):
+        @wraps(f)
+        def envoltura(*args, **kwargs):
+            with get_db().cursor() as cursor:
+                versiones = leer_versiones(cursor, *tablas)
+            partes = [request.full_path] + [f"{t}={versiones[t]}" for t in tablas]
+            if por_dia:
+                partes.append(date.today().isoformat())
+            return _responder(partes, f, args, kwargs)
+        return envoltura
+    return decorador
+
+def etag_por_foto(obtener_version):
+    """
+    Como etag_por_versiones, para vistas que responden desde una foto cacheada
+    en el worker (p.ej. la configuración de simulación). El ETag sale de la
+    versión de esa foto y no de la BD: la cache puede ir unos segundos atrás
+    de versiones_tabla y un ETag nuevo sobre un cuerpo viejo dejaría al cliente
+    con datos desactualizados hasta el próximo cambio. La foto solo avanza,
+    así que si cambia antes de que corra la vista el cuerpo es más nuevo que
+    el ETag, nunca al revés.
+    """
+    def decorador(f):
+        @wraps(f)
+        def envoltura(*args, **kwargs):
+            return _responder([request.full_path, str(obtener_version())], f, args, kwargs)
+        return envoltura
+    return decorador
@@ -0,0 +1,53 @@
+from collections.abc import Mapping
+from decimal import Decimal
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+def _default(valor):
+    """Tipos que orjson no conoce; lo demás (date, datetime, UUID, dataclass) es nativo."""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, Mapping):  # p.ej. MappingProxyType de la configuración cacheada
+        return dict(valor)
+    if hasattr(valor, '__html__'):
+        return str(valor.__html__())
+    raise TypeError(f"Tipo no serializable a JSON: {type(valor).__name__}")
+
+class ProveedorJSON(DefaultJSONProvider):
+    """
+    jsonify/request.get_json con orjson. Las filas de RealDictCursor se
+    serializan tal cual: NUMERIC (Decimal) sale como número y DATE/TIMESTAMP
+    en ISO 8601, sin convertir fila por fila en las rutas. Las llaves se
+    ordenan igual que con el proveedor por defecto; si orjson no puede con un
+    valor (p.ej. enteros de más de 64 bits) se usa el proveedor por defecto.
+    """
+    opciones = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def _orjson(self, obj, indentar=False):
+        opciones = self.opciones | (orjson.OPT_INDENT_2 if indentar else 0)
+        try:
+            return orjson.dumps(obj, default=_default, option=opciones)
+        except orjson.JSONEncodeError:
+            return None
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs:
+            datos = self._orjson(obj)
+            if datos is not None:
+                return datos.decode()
+        kwargs.setdefault('default', _default)
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indentar = (self.compact is None and self._app.debug) or self.compact is False
+        datos = self._orjson(obj, indentar)
+        if datos is None:
+            return super().response(obj)
+        # Bytes directo a la respuesta: sin pasar por str
+        return self._app.response_class(datos + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,104 @@
+import os
+import time
+from contextlib import contextmanager
+from flask import current_app, g, request
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram,
+                               CONTENT_TYPE_LATEST, generate_latest, multiprocess)
+
+# Métricas en formato Prometheus. Con gunicorn cada worker escribe sus valores
+# en PROMETHEUS_MULTIPROC_DIR (ver gunicorn.conf.py) y GET /api/metrics suma
+# los de todos los procesos; sin esa variable (desarrollo, tests) se usa el
+# registro en memoria del proceso.
+
+BUCKETS_PETICION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_SIMULACION = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+
+PETICIONES = Counter(
+    'algatrack_peticiones_total', 'Peticiones atendidas',
+    ['blueprint', 'endpoint', 'metodo', 'estado'])
+LATENCIA = Histogram(
+    'algatrack_peticion_segundos', 'Duración de la petición (hasta armar la respuesta)',
+    ['blueprint', 'endpoint', 'metodo'], buckets=BUCKETS_PETICION)
+EN_CURSO = Gauge(
+    'algatrack_peticiones_en_curso', 'Peticiones en proceso',
+    ['blueprint'], multiprocess_mode='livesum')
+SIMULACION = Histogram(
+    'algatrack_simulacion_segundos', 'Tiempo del motor de simulación por tipo de cálculo',
+    ['tipo'], buckets=BUCKETS_SIMULACION)
+CACHE_SIMULACION = Counter(
+    'algatrack_simulacion_cache_total', 'Cotizaciones por origen del resultado (cache | compartido | calculado)',
+    ['origen'])
+
+# Estado por worker, actualizado al final de cada petición; se suma entre workers vivos
+POOL = Gauge(
+    'algatrack_pool_conexiones', 'Conexiones PostgreSQL del pool por estado',
+    ['estado'], multiprocess_mode='livesum')
+POOL_AGOTADO = Gauge(
+    'algatrack_pool_agotado_total', 'Veces que no hubo conexión libre a tiempo',
+    multiprocess_mode='livesum')
+AUDITORIA_COLA = Gauge(
+    'algatrack_auditoria_en_cola', 'Eventos de auditoría esperando ir a Mongo',
+    multiprocess_mode='livesum')
+AUDITORIA_DESCARTADOS = Gauge(
+    'algatrack_auditoria_descartados_total', 'Eventos de auditoría descartados por la cola llena',
+    multiprocess_mode='livesum')
+
+SIN_RUTA = 'sin_ruta'  # 404 y similares: no se usa la URL como etiqueta (cardinalidad)
+
+def _etiquetas():
+    return request.blueprint or 'app', request.endpoint or SIN_RUTA
+
+@contextmanager
+def medir_simulacion(tipo):
+    """Cronometra una llamada al motor (simular, lote, montecarlo, sensibilidad)."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        SIMULACION.labels(tipo).observe(time.perf_counter() - inicio)
+
+def _actualizar_estado_worker(app):
+    pool = app.extensions.get('pg_pool')
+    if pool is not None:
+        stats = pool.estadisticas()
+        POOL.labels('en_uso').set(stats['en_uso'])
+        POOL.labels('libres').set(stats['libres'])
+        POOL_AGOTADO.set(stats['agotados'])
+    auditoria = app.extensions.get('auditoria')
+    if auditoria is not None:
+        stats = auditoria.estadisticas()
+        AUDITORIA_COLA.set(stats['en_cola'])
+        AUDITORIA_DESCARTADOS.set(stats['descartados'])
+
+def _inicio():
+    g.metricas_inicio = time.perf_counter()
+    g.metricas_blueprint = request.blueprint or 'app'
+    EN_CURSO.labels(g.metricas_blueprint).inc()
+
+def _fin(respuesta):
+    if 'metricas_inicio' in g:
+        blueprint, endpoint = _etiquetas()
+        PETICIONES.labels(blueprint, endpoint, request.method, str(respuesta.status_code)).inc()
+        LATENCIA.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - g.metricas_inicio)
+        _actualizar_estado_worker(current_app)
+    return respuesta
+
+def _cierre(error=None):
+    # teardown: se ejecuta también si la petición terminó en excepción
+    blueprint = g.pop('metricas_blueprint', None)
+    if blueprint is not None:
+        EN_CURSO.labels(blueprint).dec()
+
+def generar_metricas():
+    """(contenido, content-type) del texto Prometheus, sumando workers si hay directorio compartido."""
+    _actualizar_estado_worker(current_app)
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return generate_latest(registro), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def init_metricas(app):
+    app.before_request(_inicio)
+    app.after_request(_fin)
+    app.teardown_request(_cierre)
@@ -0,0 +1,136 @@
+import base64
+import json
+from datetime import date, datetime
+import psycopg2
+from flask import current_app, jsonify
+
+CABECERA_CURSOR = 'X-Siguiente-Cursor'
+
+def _codificar_cursor(valores):
+    texto = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in valores])
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+def _decodificar_cursor(token, largo):
+    """
+    Valores del cursor como texto: Postgres los convierte al tipo de cada
+    columna de orden (como las fechas, que ya viajan en ISO), y un valor que
+    no calza es un DataError en vez de un "operator does not exist".
+    """
+    try:
+        texto = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        valores = json.loads(texto)
+    except (ValueError, TypeError):
+        raise ValueError('Cursor inválido')
+    if not isinstance(valores, list) or len(valores) != largo:
+        raise ValueError('Cursor inválido')
+    if any(isinstance(v, bool) or not isinstance(v, (str, int, float, type(None))) for v in valores):
+        raise ValueError('Cursor inválido')
+    return [v if v is None or isinstance(v, str) else str(v) for v in valores]
+
+class ListadoPaginado:
+    """
+    Listado con paginación por llave (keyset) para un GET de colección.
+    `orden` son las columnas del ORDER BY; la última debe ser única para que
+    el cursor (los valores de orden de la última fila) sea exacto. La página
+    siguiente continúa con WHERE (orden) > (cursor) en vez de OFFSET, así
+    cada página cuesta lo mismo sin importar lo lejos que esté.
+
+    Parámetros de la petición: limite, cursor, fields=a,b,c, los filtros de
+    igualdad declarados (p.ej. estado) y desde/hasta sobre `columna_fecha`.
+    """
+
+    def __init__(self, tabla, columnas, orden, descendente=False, filtros=(), columna_fecha=None):
+        self.tabla = tabla
+        self.columnas = tuple(columnas)
+        self.orden = tuple(orden)
+        self.descendente = descendente
+        self.filtros = tuple(filtros)
+        self.columna_fecha = columna_fecha
+
+    def _proyeccion(self, fields):
+        if not fields:
+            return self.columnas
+        pedidas = tuple(dict.fromkeys(c.strip() for c in fields.split(',') if c.strip()))
+        desconocidas = [c for c in pedidas if c not in self.columnas]
+        if desconocidas or not pedidas:
+            raise ValueError(f"Campos inválidos: {', '.join(desconocidas) or fields}. "
+                             f"Disponibles: {', '.join(self.columnas)}")
+        return pedidas
+
+    def _filtros(self, args):
+        condiciones, valores = [], []
+        for filtro in self.filtros:
+            if args.get(filtro):
+                condiciones.append(f"{filtro} = %s")
+                valores.append(args[filtro])
+        if self.columna_fecha:
+            for nombre, operador in (('desde', '>='), ('hasta', '<=')):
+                if args.get(nombre):
+                    try:
+                        valores.append(datetime.strptime(args[nombre], '%Y-%m-%d').date())
+                    except ValueError:
+                        raise ValueError(f'{nombre} inválido (formato YYYY-MM-DD)')
+                    condiciones.append(f"{self.columna_fecha} {operador} %s")
+        return condiciones, valores
+
+    def _select(self, seleccion, condiciones):
+        direccion = 'DESC' if self.descendente else 'ASC'
+        sql = f"SELECT {', '.join(seleccion)} FROM {self.tabla}"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        return sql + " ORDER BY " + ", ".join(f"{c} {direccion}" for c in self.orden)
+
+    def consulta_completa(self, args):
+        """(sql, valores, campos) con los mismos fields/filtros/orden pero sin página (exportaciones)."""
+        campos = self._proyeccion(args.get('fields'))
+        condiciones, valores = self._filtros(args)
+        return self._select(campos, condiciones), valores, campos
+
+    def consultar(self, cursor, args):
+        """Ejecuta una página. Devuelve (filas, token de la siguiente página o None)."""
+        config = current_app.config
+        try:
+            limite = int(args.get('limite', config.get('PAGINACION_LIMITE', 100)))
+        except ValueError:
+            raise ValueError('limite debe ser un entero')
+        maximo = config.get('PAGINACION_MAX', 1000)
+        if not 1 <= limite <= maximo:
+            raise ValueError(f'limite debe estar entre 1 y {maximo}')
+
+        campos = self._proyeccion(args.get('fields'))
+        # Las columnas de orden se leen siempre (hacen falta para el cursor)
+        seleccion = campos + tuple(c for c in self.orden if c not in campos)
+
+        condiciones, valores = self._filtros(args)
+        if args.get('cursor'):
+            ultimos = _decodificar_cursor(args['cursor'], len(self.orden))
+            marcadores = ', '.join(['%s'] * len(self.orden))
+            condiciones.append(f"({', '.join(self.orden)}) {'<' if self.descendente else '>'} ({marcadores})")
+            valores.extend(ultimos)
+
+        # Una fila extra indica si hay página siguiente sin hacer COUNT(*)
+        sql = self._select(seleccion, condiciones) + " LIMIT %s"
+        valores.append(limite + 1)
+
+        try:
+            cursor.execute(sql, valores)
+        except psycopg2.DataError:
+            # Cursor alterado a mano (p.ej. "abc" para una fecha): error del cliente
+            if args.get('cursor'):
+                raise ValueError('Cursor inválido')
+            raise
+        filas = cursor.fetchall()
+        siguiente = None
+        if len(filas) > limite:
+            filas = filas[:limite]
+            siguiente = _codificar_cursor([filas[-1][c] for c in self.orden])
+        if len(seleccion) > len(campos):
+            filas = [{c: fila[c] for c in campos} for fila in filas]
+        return filas, siguiente
+
+def respuesta_paginada(filas, siguiente):
+    """Lista JSON (mismo formato que antes) + cursor de la siguiente página en cabecera."""
+    respuesta = jsonify(filas)
+    if siguiente:
+        respuesta.headers[CABECERA_CURSOR] = siguiente
+    return respuesta
@@ -0,0 +1,133 @@
+import cProfile
+import os
+import random
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from flask import current_app, g, request
+from app.utils.security import rol_de_sesion
+
+# Perfilado de peticiones en producción. Se activa para una fracción de las
+# peticiones (PERFILADOR_HABILITADO + PERFILADOR_MUESTREO) o para una petición
+# puntual de Gerencia con la cabecera X-Perfilar. Cada perfil queda en
+# PERFILADOR_DIRECTORIO/<endpoint>/ y se conservan los últimos
+# PERFILADOR_MAX_ARCHIVOS por endpoint. Apagado, el costo por petición es
+# mirar una cabecera y una clave de configuración.
+#
+#   cprofile -> .prof (python -m pstats, snakeviz)
+#   muestreo -> .txt con pilas colapsadas ("a;b;c cuenta", flamegraph.pl / speedscope)
+
+CABECERA = 'X-Perfilar'          # Valor opcional: cprofile | muestreo
+CABECERA_ARCHIVO = 'X-Perfil'    # Nombre del archivo generado, en la respuesta
+MODOS = ('cprofile', 'muestreo')
+
+class MuestreadorPilas:
+    """Hilo que toma la pila de otro hilo cada `intervalo` segundos y cuenta las repetidas."""
+
+    def __init__(self, hilo_id, intervalo=0.005):
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name='perfilador', daemon=True)
+
+    def _muestrear(self):
+        while not self._detener.wait(self.intervalo):
+            frame = sys._current_frames().get(self.hilo_id)
+            marcos = []
+            while frame is not None:
+                codigo = frame.f_code
+                marcos.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+                frame = frame.f_back
+            if marcos:
+                self.pilas[';'.join(reversed(marcos))] += 1
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+
+    def guardar(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            for pila, cuenta in self.pilas.most_common():
+                f.write(f"{pila} {cuenta}\n")
+
+class PerfilCProfile:
+    def __init__(self):
+        self.perfil = cProfile.Profile()
+
+    def iniciar(self):
+        self.perfil.enable()
+
+    def detener(self):
+        self.perfil.disable()
+
+    def guardar(self, ruta):
+        self.perfil.dump_stats(ruta)
+
+def _rotar(carpeta, maximo):
+    archivos = sorted(os.scandir(carpeta), key=lambda e: e.stat().st_mtime, reverse=True)
+    for viejo in archivos[maximo:]:
+        try:
+            os.remove(viejo.path)
+        except OSError:
+            pass
+
+def _iniciar():
+    config = current_app.config
+    pedido = request.headers.get(CABECERA)
+    if pedido is not None:
+        if rol_de_sesion() != 'Gerencia':
+            return
+        modo = pedido if pedido in MODOS else config.get('PERFILADOR_MODO', 'cprofile')
+    else:
+        if not config.get('PERFILADOR_HABILITADO', False):
+            return
+        endpoints = config.get('PERFILADOR_ENDPOINTS')
+        if endpoints and request.endpoint not in endpoints:
+            return
+        if random.random() >= config.get('PERFILADOR_MUESTREO', 0.01):
+            return
+        modo = config.get('PERFILADOR_MODO', 'cprofile')
+
+    if modo == 'muestreo':
+        perfilador = MuestreadorPilas(threading.get_ident(), config.get('PERFILADOR_INTERVALO_SEG', 0.005))
+    else:
+        perfilador = PerfilCProfile()
+    try:
+        perfilador.iniciar()
+    except ValueError:
+        return  # Otro cProfile activo en este hilo
+    extension = 'txt' if modo == 'muestreo' else 'prof'
+    nombre = f"{datetime.now():%Y%m%d-%H%M%S-%f}_{os.getpid()}.{extension}"
+    g.perfil = (perfilador, request.endpoint or 'sin_ruta', nombre)
+
+def _anotar(respuesta):
+    if 'perfil' in g:
+        respuesta.headers[CABECERA_ARCHIVO] = f"{g.perfil[1]}/{g.perfil[2]}"
+    return respuesta
+
+def _terminar(error=None):
+    # teardown: el perfil incluye los after_request y se cierra aunque haya excepción
+    perfil = g.pop('perfil', None)
+    if perfil is None:
+        return
+    perfilador, endpoint, nombre = perfil
+    perfilador.detener()
+    config = current_app.config
+    carpeta = os.path.join(config['PERFILADOR_DIRECTORIO'], endpoint)
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        perfilador.guardar(os.path.join(carpeta, nombre))
+        _rotar(carpeta, config.get('PERFILADOR_MAX_ARCHIVOS', 20))
+    except OSError as e:
+        print(f"Error guardando perfil: {e}")
+
+def init_perfilador(app):
+    app.config.setdefault('PERFILADOR_DIRECTORIO', os.path.join(app.instance_path, 'perfiles'))
+    app.before_request(_iniciar)
+    app.after_request(_anotar)
+    app.teardown_request(_terminar)
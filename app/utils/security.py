@@ -1,6 +1,72 @@
 import functools
-from flask import session, jsonify
+import threading
+import time
+from collections import OrderedDict
+from flask import session, jsonify, current_app
 from app.db.database import get_db
+from app.db.consultas import ejecutar
+
+class CacheRoles:
+    """
+    Cache LRU con TTL de usuario_id -> (rol, version_sesion).
+    Un usuario borrado se guarda como (None, None) para no consultar en cada
+    petición; tras `ttl_seg` se vuelve a leer de la BD, así que un usuario
+    revocado en otro worker queda fuera en como mucho ese tiempo.
+    """
+
+    def __init__(self, ttl_seg=30.0, max_entradas=1000):
+        self.ttl_seg = ttl_seg
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._generacion = 0
+
+    def generacion(self):
+        return self._generacion
+
+    def obtener(self, usuario_id):
+        with self._lock:
+            entrada = self._entradas.get(usuario_id)
+            if entrada is None:
+                return None
+            if entrada[2] < time.monotonic():
+                del self._entradas[usuario_id]
+                return None
+            self._entradas.move_to_end(usuario_id)
+            return entrada[0], entrada[1]
+
+    def guardar(self, usuario_id, rol, version, generacion=None):
+        with self._lock:
+            # Si hubo una invalidación mientras se consultaba la BD, el dato leído
+            # puede ser anterior a ella: no se guarda
+            if generacion is not None and generacion != self._generacion:
+                return
+            self._entradas[usuario_id] = (rol, version, time.monotonic() + self.ttl_seg)
+            self._entradas.move_to_end(usuario_id)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, usuario_id=None):
+        with self._lock:
+            self._generacion += 1
+            if usuario_id is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(usuario_id, None)
+
+_cache_roles = None
+_cache_lock = threading.Lock()
+
+def get_cache_roles():
+    global _cache_roles
+    if _cache_roles is None:
+        with _cache_lock:
+            if _cache_roles is None:
+                _cache_roles = CacheRoles(
+                    current_app.config.get('ROLES_CACHE_TTL_SEG', 30.0),
+                    current_app.config.get('ROLES_CACHE_MAX', 1000)
+                )
+    return _cache_roles
 
 def login_requerido(f):
     @functools.wraps(f)
@@ -10,23 +76,47 @@ def login_requerido(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def _rol_y_version(usuario_id):
+    """(rol, version_sesion) desde la cache o la BD; (None, None) si el usuario no existe."""
+    cache = get_cache_roles()
+    entrada = cache.obtener(usuario_id)
+    if entrada is None:
+        generacion = cache.generacion()
+        with get_db().cursor() as cursor:
+            ejecutar(cursor, 'rol_usuario', (usuario_id,))
+            user = cursor.fetchone()
+        entrada = (user['rol'], user['version_sesion']) if user else (None, None)
+        cache.guardar(usuario_id, *entrada, generacion=generacion)
+    return entrada
+
+def rol_de_sesion():
+    """Rol del usuario de la sesión, o None si no hay sesión válida (sin responder nada)."""
+    if 'usuario_id' not in session:
+        return None
+    try:
+        rol, version = _rol_y_version(session['usuario_id'])
+    except Exception:
+        return None
+    return rol if session.get('version_sesion', version) == version else None
+
 def rol_requerido(*roles):
     def decorator(f):
         @functools.wraps(f)
         def decorated_function(*args, **kwargs):
             if 'usuario_id' not in session:
                 return jsonify({'error': 'No autorizado'}), 401
-            
-            db = get_db()
-            
+
             try:
-                with db.cursor() as cursor:
-                    cursor.execute('SELECT rol FROM usuarios WHERE id = %s', (session['usuario_id'],))
-                    user = cursor.fetchone()
+                rol, version = _rol_y_version(session['usuario_id'])
             except Exception as e:
                 print(f"Error verificando rol: {e}")
                 return jsonify({'error': 'Error interno de seguridad'}), 500
-            if not user or user['rol'] not in roles:
+
+            # Usuario borrado o sesión emitida antes de revocarla
+            if rol is None or session.get('version_sesion', version) != version:
+                session.clear()
+                return jsonify({'error': 'Sesión revocada', 'codigo': 401}), 401
+            if rol not in roles:
                 return jsonify({'error': 'Acceso prohibido: Rol insuficiente', 'codigo': 403}), 403
             return f(*args, **kwargs)
         return decorated_function
@@ -0,0 +1,175 @@
+"""
+Benchmark de endpoints con el cliente de pruebas de Flask contra la BD local
+(POSTGRES_URI / MONGO_URI del entorno; Mongo puede no estar disponible).
+
+    python benchmarks/bench_endpoints.py --iteraciones 200 --salida reporte.json
+    python benchmarks/bench_endpoints.py --comparar antes.json --salida despues.json
+
+Por escenario informa latencia p50/p95/p99, peticiones por segundo (en serie)
+y el pico de memoria asignada durante una petición (tracemalloc, en una
+pasada aparte para no inflar las latencias). El reporte es un JSON estable
+(llaves ordenadas) pensado para compararlo entre versiones.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.db.database import get_db
+
+USUARIO = 'bench_gerencia'
+CONTRASENA = 'bench123'
+
+def escenarios():
+    """(nombre, método, url, cuerpo JSON). Fechas relativas a hoy, como las usa el frontend."""
+    hoy = date.today()
+    en_un_mes = (hoy + timedelta(days=30)).isoformat()
+    return [
+        ('dashboard', 'GET', '/api/dashboard', None),
+        ('dashboard_trimestral', 'GET', f'/api/dashboard?granularidad=trimestre&desde={hoy.year - 2}-01', None),
+        ('calendario', 'GET', '/api/calendario', None),
+        ('lotes_pagina', 'GET', '/api/lotes?limite=100', None),
+        ('pedidos_pagina', 'GET', '/api/pedidos?limite=100', None),
+        ('pedidos_filtrados', 'GET', f'/api/pedidos?estado=pendiente&desde={hoy.isoformat()}&limite=500', None),
+        ('clientes_pagina', 'GET', '/api/clientes?limite=100', None),
+        ('atp_curva', 'GET', '/api/atp/curva', None),
+        ('simulacion', 'POST', '/api/simulacion', {'cantidad': 25, 'fecha': en_un_mes}),
+        ('simulacion_lote', 'POST', '/api/simulacion/lote', {'escenarios': [
+            {'cantidad': 5 + i, 'fecha': (hoy + timedelta(days=7 + 3 * i)).isoformat()} for i in range(50)]}),
+        ('simulacion_riesgo', 'POST', '/api/simulacion/riesgo',
+         {'cantidad': 25, 'fecha': en_un_mes, 'muestras': 2000, 'semilla': 1}),
+    ]
+
+def _preparar_usuario(app):
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO usuarios (usuario, contrasena, email, rol) VALUES (%s, %s, %s, 'Gerencia')
+                ON CONFLICT (usuario) DO UPDATE SET contrasena = EXCLUDED.contrasena, rol = 'Gerencia'
+            """, (USUARIO, generate_password_hash(CONTRASENA), f'{USUARIO}@bench.local'))
+
+def _contar_filas(app):
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            cursor.execute("""
+                SELECT (SELECT COUNT(*) FROM lotes) AS lotes, (SELECT COUNT(*) FROM pedidos) AS pedidos,
+                       (SELECT COUNT(*) FROM clientes) AS clientes
+            """)
+            return dict(cursor.fetchone())
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _percentil(ordenadas, p):
+    # Interpolación lineal entre los dos vecinos (igual que numpy.percentile por defecto)
+    k = (len(ordenadas) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(ordenadas) - 1)
+    return ordenadas[i] + (ordenadas[j] - ordenadas[i]) * (k - i)
+
+def medir(cliente, metodo, url, cuerpo, iteraciones, calentamiento):
+    llamar = lambda: cliente.open(url, method=metodo, json=cuerpo)
+    for _ in range(calentamiento):
+        respuesta = llamar()
+
+    tiempos = []
+    inicio = time.perf_counter()
+    for _ in range(iteraciones):
+        t0 = time.perf_counter()
+        respuesta = llamar()
+        respuesta.get_data()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    total = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    llamar().get_data()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tiempos.sort()
+    return {
+        'estado': respuesta.status_code,
+        'bytes': len(respuesta.get_data()),
+        'p50_ms': round(_percentil(tiempos, 50), 3),
+        'p95_ms': round(_percentil(tiempos, 95), 3),
+        'p99_ms': round(_percentil(tiempos, 99), 3),
+        'media_ms': round(statistics.fmean(tiempos), 3),
+        'max_ms': round(tiempos[-1], 3),
+        'rps': round(iteraciones / total, 1),
+        'memoria_pico_kb': round(pico / 1024, 1),
+    }
+
+def comparar(anterior, actual):
+    print(f"\n{'escenario':<22}{'p50 antes':>11}{'p50 ahora':>11}{'p95 antes':>11}{'p95 ahora':>11}{'cambio p95':>12}")
+    for nombre, ahora in actual['escenarios'].items():
+        antes = anterior.get('escenarios', {}).get(nombre)
+        if not antes:
+            print(f"{nombre:<22}{'-':>11}{ahora['p50_ms']:>11.2f}{'-':>11}{ahora['p95_ms']:>11.2f}{'nuevo':>12}")
+            continue
+        cambio = (ahora['p95_ms'] / antes['p95_ms'] - 1) * 100 if antes['p95_ms'] else 0.0
+        print(f"{nombre:<22}{antes['p50_ms']:>11.2f}{ahora['p50_ms']:>11.2f}"
+              f"{antes['p95_ms']:>11.2f}{ahora['p95_ms']:>11.2f}{cambio:>+11.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iteraciones', type=int, default=100)
+    parser.add_argument('--calentamiento', type=int, default=5)
+    parser.add_argument('--solo', help='Escenarios separados por coma (por defecto todos)')
+    parser.add_argument('--salida', default='benchmarks/reporte.json')
+    parser.add_argument('--comparar', help='Reporte JSON anterior para mostrar diferencias')
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['TESTING'] = True
+    logging.getLogger('algatrack.db').setLevel(logging.WARNING)  # Sin una línea de log por petición
+    _preparar_usuario(app)
+
+    cliente = app.test_client()
+    login = cliente.post('/api/login', json={'usuario': USUARIO, 'contrasena': CONTRASENA})
+    if login.status_code != 200:
+        sys.exit(f"No se pudo iniciar sesión ({login.status_code}): {login.get_data(as_text=True)}")
+
+    elegidos = set(args.solo.split(',')) if args.solo else None
+    resultados = {}
+    for nombre, metodo, url, cuerpo in escenarios():
+        if elegidos and nombre not in elegidos:
+            continue
+        resultados[nombre] = medir(cliente, metodo, url, cuerpo, args.iteraciones, args.calentamiento)
+        r = resultados[nombre]
+        print(f"{nombre:<22} {r['estado']}  p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+              f"p99 {r['p99_ms']:8.2f} ms  {r['rps']:8.1f} req/s  {r['memoria_pico_kb']:9.1f} KB")
+
+    reporte = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'iteraciones': args.iteraciones,
+        'filas': _contar_filas(app),
+        'escenarios': resultados,
+    }
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+    print(f"Reporte: {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(json.load(f), reporte)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark de serialización JSON: proveedor por defecto de Flask vs
+ProveedorJSON (orjson) sobre cargas parecidas a las de los listados.
+
+    python benchmarks/bench_json.py [--filas 1000] [--repeticiones 50]
+
+No toca la base de datos: las filas se arman en memoria con los mismos tipos
+que devuelve RealDictCursor (Decimal, date, datetime).
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.utils.json_provider import ProveedorJSON
+
+def _pedidos(n):
+    base = date(2025, 1, 1)
+    return [{
+        'id': i,
+        'cliente': f'Cliente {i % 40}',
+        'producto': 'Pellet Estándar',
+        'cantidad_ton': Decimal(f'{(i % 97) + 0.5:.2f}'),
+        'fecha_entrega': base + timedelta(days=i % 365),
+        'estado': ('pendiente', 'entregado', 'cancelado')[i % 3],
+        'creado_en': datetime(2025, 1, 1, 8, 30) + timedelta(minutes=i),
+    } for i in range(n)]
+
+def _lotes(n):
+    base = date(2025, 1, 1)
+    return [{
+        'id': i,
+        'tipo_alga': ('Gracilaria', 'Macrocystis', 'Lessonia')[i % 3],
+        'superficie': Decimal(f'{(i % 50) + 1.25:.2f}'),
+        'fecha_inicio': base + timedelta(days=i % 365),
+        'fecha_cosecha_estimada': base + timedelta(days=i % 365 + 120),
+        'estado': 'activo' if i % 4 else 'cosechado',
+        'creado_en': datetime(2025, 1, 1, 8, 30) + timedelta(minutes=i),
+    } for i in range(n)]
+
+def _configuracion():
+    parametros = [{'clave': f'param_{i}', 'valor': Decimal(f'{i * 0.1:.2f}'), 'descripcion': 'Parámetro'}
+                  for i in range(20)]
+    estaciones = [{'mes': m, 'nombre_estacion': 'Verano', 'factor_crecimiento': Decimal('1.10'),
+                   'dias_secado_base': Decimal('2.50')} for m in range(1, 13)]
+    return {'parametros': parametros, 'estaciones': estaciones}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filas', type=int, default=1000)
+    parser.add_argument('--repeticiones', type=int, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    proveedores = {'flask (json)': DefaultJSONProvider(app), 'orjson': ProveedorJSON(app)}
+    cargas = {
+        f'pedidos x{args.filas}': _pedidos(args.filas),
+        f'lotes x{args.filas}': _lotes(args.filas),
+        'configuracion': _configuracion(),
+    }
+
+    print(f"{'carga':<18}{'proveedor':<14}{'ms/llamada':>12}{'bytes':>10}")
+    with app.app_context():
+        for nombre, carga in cargas.items():
+            tiempos = {}
+            for etiqueta, proveedor in proveedores.items():
+                tamano = len(proveedor.response(carga).get_data())
+                segundos = min(timeit.repeat(lambda: proveedor.response(carga).get_data(),
+                                             number=args.repeticiones, repeat=3))
+                tiempos[etiqueta] = segundos / args.repeticiones * 1000
+                print(f"{nombre:<18}{etiqueta:<14}{tiempos[etiqueta]:>12.3f}{tamano:>10}")
+            print(f"{'':<18}{'aceleración':<14}{tiempos['flask (json)'] / tiempos['orjson']:>11.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Sentencias preparadas vs SQL normal (POSTGRES_PREPARADAS), contra la BD de
+POSTGRES_URI (conviene cargarla antes con generar_datos.py).
+
+    python benchmarks/bench_preparadas.py [--iteraciones 500]
+
+1. Por consulta: cada entrada de app.db.consultas.CONSULTAS ejecutada en la
+   misma conexión, con y sin PREPARE.
+2. Por petición: POST /api/simulacion y POST /api/login con el cliente de
+   pruebas. La simulación se mide "en frío" (sin las caches de
+   configuración, ATP, roles ni resultados) para que cada petición haga sus
+   consultas; en caliente casi no toca la BD. Además del total se informa el
+   tiempo en la BD que reporta Server-Timing, que no incluye el ruido del
+   hash de contraseñas del login.
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.db.consultas import CONSULTAS, ejecutar
+from app.db.database import get_db
+
+USUARIO = 'bench_gerencia'
+CONTRASENA = 'bench123'
+
+# Parámetros de ejemplo para las consultas que los llevan
+PARAMETROS = {
+    'versiones': (['lotes', 'pedidos', 'parametros_sistema', 'configuracion_estacional'],),
+    'rol_usuario': (1,),
+    'usuario_por_nombre': (USUARIO,),
+}
+
+def _mediana_ms(funcion, iteraciones):
+    tiempos = []
+    for _ in range(iteraciones):
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos)
+
+def por_consulta(app, iteraciones):
+    print(f"{'consulta':<26}{'normal ms':>11}{'preparada ms':>14}{'ahorro':>9}")
+    with app.app_context():
+        cursor = get_db().cursor()
+        for nombre in CONSULTAS:
+            parametros = PARAMETROS.get(nombre, ())
+            def correr():
+                ejecutar(cursor, nombre, parametros)
+                cursor.fetchall()
+            tiempos = {}
+            for activado in (False, True):
+                app.config['POSTGRES_PREPARADAS'] = activado
+                correr()  # Calentamiento (y PREPARE)
+                tiempos[activado] = _mediana_ms(correr, iteraciones)
+            ahorro = (1 - tiempos[True] / tiempos[False]) * 100
+            print(f"{nombre:<26}{tiempos[False]:>11.3f}{tiempos[True]:>14.3f}{ahorro:>8.1f}%")
+        cursor.close()
+
+def _ms_db(respuesta):
+    """Tiempo en la BD según Server-Timing (app.db.instrumentacion)."""
+    for metrica in respuesta.headers.get('Server-Timing', '').split(','):
+        nombre, _, resto = metrica.strip().partition(';')
+        if nombre == 'db':
+            return float(resto.split(';')[0].split('=')[1])
+    return 0.0
+
+def por_peticion(app, iteraciones):
+    cliente = app.test_client()
+    cliente.post('/api/login', json={'usuario': USUARIO, 'contrasena': CONTRASENA})
+    cuerpo = {'cantidad': 25, 'fecha': (date.today() + timedelta(days=30)).isoformat()}
+    peticiones = {
+        'POST /api/simulacion (frío)': lambda: cliente.post('/api/simulacion', json=cuerpo),
+        'POST /api/login': lambda: app.test_client().post(
+            '/api/login', json={'usuario': USUARIO, 'contrasena': CONTRASENA}),
+    }
+    print(f"\n{'petición':<30}{'total ms':>10}{'(prep.)':>10}{'BD ms':>9}{'(prep.)':>10}{'ahorro BD':>11}")
+    for nombre, peticion in peticiones.items():
+        veces = iteraciones if 'simulacion' in nombre else max(10, iteraciones // 10)  # El hash domina el login
+        # Alternadas, para que la deriva (caches, carga de la máquina) afecte igual a ambos modos.
+        # El total del login varía mucho por el hash de la contraseña: el ahorro se ve en BD ms.
+        total, bd = {False: [], True: []}, {False: [], True: []}
+        for _ in range(veces):
+            for activado in (False, True):
+                app.config['POSTGRES_PREPARADAS'] = activado
+                t0 = time.perf_counter()
+                respuesta = peticion()
+                total[activado].append((time.perf_counter() - t0) * 1000)
+                bd[activado].append(_ms_db(respuesta))
+        t = {k: statistics.median(v) for k, v in total.items()}
+        d = {k: statistics.median(v) for k, v in bd.items()}
+        print(f"{nombre:<30}{t[False]:>10.3f}{t[True]:>10.3f}{d[False]:>9.3f}{d[True]:>10.3f}{d[False] - d[True]:>11.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iteraciones', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config.update(TESTING=True, CONFIG_CHEQUEO_SEG=0, ATP_CHEQUEO_SEG=0, ATP_RECARGA_SEG=0,
+                      ROLES_CACHE_TTL_SEG=0, SIMULACION_CACHE_TTL_SEG=0)
+    logging.getLogger('algatrack.db').setLevel(logging.WARNING)
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO usuarios (usuario, contrasena, email, rol) VALUES (%s, %s, %s, 'Gerencia')
+                ON CONFLICT (usuario) DO UPDATE SET contrasena = EXCLUDED.contrasena, rol = 'Gerencia'
+                RETURNING id
+            """, (USUARIO, generate_password_hash(CONTRASENA), f'{USUARIO}@bench.local'))
+            PARAMETROS['rol_usuario'] = (cursor.fetchone()['id'],)
+
+    por_consulta(app, args.iteraciones)
+    por_peticion(app, args.iteraciones)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Generador de datos sintéticos para benchmarks: lotes, pedidos y clientes en
+PostgreSQL (con COPY) y eventos de auditoría en Mongo, a la escala pedida.
+
+    python benchmarks/generar_datos.py --escala 100000 --semilla 7 --limpiar
+
+--escala fija la cantidad de pedidos; el resto se deriva (lotes = escala/4,
+clientes = escala/1000, auditoría = escala/2) salvo que se indique aparte.
+Con la misma semilla y --fecha-base los datos son idénticos. --limpiar
+vacía lotes, pedidos y clientes antes de cargar (¡solo en una BD de pruebas!).
+Sin --limpiar los lotes y pedidos se agregan a los existentes; los clientes
+ya cargados con la misma semilla (empresa es UNIQUE) se mantienen.
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo.errors import PyMongoError
+from app import create_app
+from app.db.database import transaccion
+from app.db.mongo import get_mongo_client
+from app.db.versiones import incrementar_version
+from app.services.cultivo import fecha_cosecha_estimada
+
+TAM_BLOQUE = 50000  # Filas por COPY
+
+TIPOS_ALGA = (('Gracilaria', 6), ('Pelillo', 2), ('Lessonia', 1), ('Macrocystis', 1))
+PRODUCTOS = ('Pellet Estándar', 'Pellet Premium', 'Fertilizante', 'Biomasa Seca', 'Harina')
+CIUDADES = ('Puerto Montt', 'Castro', 'Ancud', 'Calbuco', 'La Serena', 'Coquimbo', 'Valparaíso', 'Concepción')
+ESTACIONES = {12: 'Verano', 1: 'Verano', 2: 'Verano', 3: 'Otoño', 4: 'Otoño', 5: 'Otoño',
+              6: 'Invierno', 7: 'Invierno', 8: 'Invierno', 9: 'Primavera', 10: 'Primavera', 11: 'Primavera'}
+
+def _elegir_ponderado(rng, opciones):
+    return rng.choices([o for o, _ in opciones], weights=[p for _, p in opciones])[0]
+
+def generar_clientes(rng, n, semilla):
+    for i in range(n):
+        ciudad = rng.choice(CIUDADES)
+        yield (f"Empresa {semilla}-{i:06d}", f"Contacto {i}", f"contacto{i}@empresa{semilla}.cl",
+               f"+569{rng.randrange(10**7, 10**8)}", f"{ciudad} {rng.randrange(1, 9999)}",
+               'activo' if rng.random() < 0.9 else 'inactivo')
+
+def generar_lotes(rng, n, base):
+    # Siembras en los últimos dos años y los próximos dos meses
+    for _ in range(n):
+        tipo = _elegir_ponderado(rng, TIPOS_ALGA)
+        inicio = base + timedelta(days=rng.randrange(-730, 60))
+        cosecha = fecha_cosecha_estimada(inicio, tipo)
+        yield (tipo, round(rng.uniform(1, 30), 2), inicio, cosecha,
+               'cosechado' if cosecha < base else 'activo')
+
+def generar_pedidos(rng, n, base, clientes):
+    # Entregas desde hace dos años hasta un año adelante; el pasado ya se cerró
+    for _ in range(n):
+        entrega = base + timedelta(days=rng.randrange(-730, 365))
+        if entrega < base:
+            estado = 'entregado' if rng.random() < 0.85 else 'cancelado'
+        else:
+            estado = 'pendiente' if rng.random() < 0.9 else 'cancelado'
+        yield (rng.choice(clientes), rng.choice(PRODUCTOS), round(rng.uniform(0.5, 40), 2), entrega, estado)
+
+def generar_auditoria(rng, n, base):
+    inicio = datetime.combine(base, datetime.min.time(), tzinfo=timezone.utc) - timedelta(days=365)
+    for _ in range(n):
+        momento = inicio + timedelta(seconds=rng.randrange(365 * 86400))
+        cantidad = round(rng.uniform(1, 80), 1)
+        fecha = (momento.date() + timedelta(days=rng.randrange(7, 120))).isoformat()
+        costo = round(cantidad * rng.uniform(180, 260), 2)
+        yield {
+            'tipo': 'SIMULACION_FINANCIERA',
+            'usuario': rng.randrange(1, 4),
+            'input': {'cant': cantidad, 'fecha': fecha},
+            'estacion_climatica': ESTACIONES[momento.month],
+            'resultado_financiero': {'costo_total': costo, 'precio_sugerido': round(costo * 1.3, 2)},
+            'resultado_operativo': 'Viable' if rng.random() < 0.7 else 'Requiere stock adicional',
+            'timestamp': momento,
+        }
+
+def copiar(cursor, tabla, columnas, filas):
+    """COPY en bloques de TAM_BLOQUE filas. Devuelve cuántas se cargaron."""
+    total = 0
+    while True:
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        n = 0
+        for fila in filas:
+            escritor.writerow(fila)
+            n += 1
+            if n == TAM_BLOQUE:
+                break
+        if not n:
+            return total
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        total += n
+        if n < TAM_BLOQUE:
+            return total
+
+def cargar(pedidos, lotes, clientes, auditoria, semilla, base, limpiar=False):
+    """Carga todo en una transacción (Mongo aparte). Devuelve filas por tabla y segundos."""
+    rng = random.Random(semilla)
+    resumen = {}
+    inicio = time.perf_counter()
+    with transaccion() as cursor:
+        if limpiar:
+            cursor.execute("TRUNCATE lotes, pedidos, clientes RESTART IDENTITY")
+        filas_clientes = list(generar_clientes(rng, clientes, semilla))
+        # COPY no admite ON CONFLICT: los clientes pasan por una tabla temporal
+        # para que repetir la carga con la misma semilla no choque con empresa UNIQUE
+        columnas_clientes = ('empresa', 'contacto', 'email', 'telefono', 'direccion', 'estado')
+        cursor.execute(f"""
+            CREATE TEMP TABLE carga_clientes ON COMMIT DROP AS
+            SELECT {', '.join(columnas_clientes)} FROM clientes WITH NO DATA
+        """)
+        copiar(cursor, 'carga_clientes', columnas_clientes, iter(filas_clientes))
+        cursor.execute(f"""
+            INSERT INTO clientes ({', '.join(columnas_clientes)})
+            SELECT {', '.join(columnas_clientes)} FROM carga_clientes
+            ON CONFLICT (empresa) DO NOTHING
+        """)
+        resumen['clientes'] = cursor.rowcount
+        resumen['lotes'] = copiar(cursor, 'lotes',
+                                  ('tipo_alga', 'superficie', 'fecha_inicio', 'fecha_cosecha_estimada', 'estado'),
+                                  generar_lotes(rng, lotes, base))
+        nombres = [c[0] for c in filas_clientes] or ['Cliente Genérico']
+        resumen['pedidos'] = copiar(cursor, 'pedidos',
+                                    ('cliente', 'producto', 'cantidad_ton', 'fecha_entrega', 'estado'),
+                                    generar_pedidos(rng, pedidos, base, nombres))
+        if limpiar:
+            # TRUNCATE no dispara los triggers de los resúmenes del dashboard
+            cursor.execute("SELECT reconstruir_resumenes()")
+        for tabla in ('clientes', 'lotes', 'pedidos'):
+            incrementar_version(cursor, tabla)
+        cursor.execute("ANALYZE lotes; ANALYZE pedidos; ANALYZE clientes")
+
+    resumen['auditoria'] = 0
+    if auditoria:
+        try:
+            coleccion = get_mongo_client()['algatrack_nosql'].logs_auditoria
+            documentos = generar_auditoria(rng, auditoria, base)
+            while True:
+                bloque = [d for _, d in zip(range(10000), documentos)]
+                if not bloque:
+                    break
+                coleccion.insert_many(bloque, ordered=False)
+                resumen['auditoria'] += len(bloque)
+        except PyMongoError as e:
+            print(f"Mongo no disponible, se omite la auditoría: {e}")
+    resumen['segundos'] = round(time.perf_counter() - inicio, 2)
+    return resumen
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--escala', type=int, default=10000, help='Pedidos a generar (por defecto 10000)')
+    parser.add_argument('--lotes', type=int, help='Por defecto escala/4')
+    parser.add_argument('--clientes', type=int, help='Por defecto escala/1000 (mínimo 20)')
+    parser.add_argument('--auditoria', type=int, help='Documentos en Mongo, por defecto escala/2 (0 = ninguno)')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--fecha-base', type=date.fromisoformat, default=date.today(),
+                        help='"Hoy" de los datos (YYYY-MM-DD); fíjela para reproducir exactamente')
+    parser.add_argument('--limpiar', action='store_true', help='TRUNCATE de lotes, pedidos y clientes antes de cargar')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        resumen = cargar(
+            pedidos=args.escala,
+            lotes=args.lotes if args.lotes is not None else args.escala // 4,
+            clientes=args.clientes if args.clientes is not None else max(20, args.escala // 1000),
+            auditoria=args.auditoria if args.auditoria is not None else args.escala // 2,
+            semilla=args.semilla, base=args.fecha_base, limpiar=args.limpiar
+        )
+    print(', '.join(f"{k}: {v}" for k, v in resumen.items()))
+
+if __name__ == '__main__':
+    main()
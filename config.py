@@ -22,8 +22,90 @@ class Config:
     POSTGRES_URI = uri  # Para que no fallen tus scripts seed.py o database.py
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pool de conexiones (por proceso/worker de gunicorn)
+    POSTGRES_POOL_MIN = int(os.getenv('POSTGRES_POOL_MIN', 1))
+    POSTGRES_POOL_MAX = int(os.getenv('POSTGRES_POOL_MAX', 10))
+    POSTGRES_POOL_TIMEOUT = float(os.getenv('POSTGRES_POOL_TIMEOUT', 5))          # Segundos esperando conexión libre
+    POSTGRES_POOL_CHEQUEO_SEG = float(os.getenv('POSTGRES_POOL_CHEQUEO_SEG', 30)) # Inactividad antes de un SELECT 1
+    # Consultas frecuentes con PREPARE por conexión (desactivar detrás de pgbouncer en modo transacción)
+    POSTGRES_PREPARADAS = os.getenv('POSTGRES_PREPARADAS', 'true').lower() in ('1', 'true')
+
     MONGO_URI = os.getenv('MONGO_URI')
 
+    # Cliente Mongo compartido: timeouts cortos para no colgar las peticiones
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 10))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 2000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 2000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 5000))
+    MONGO_CIRCUITO_FALLOS = int(os.getenv('MONGO_CIRCUITO_FALLOS', 3))                    # Fallos seguidos para abrir el circuito
+    MONGO_CIRCUITO_REINTENTO_SEG = float(os.getenv('MONGO_CIRCUITO_REINTENTO_SEG', 30))   # Tiempo antes de volver a probar
+
+    # Medición de consultas por petición (Server-Timing + log estructurado 'algatrack.db')
+    DB_CONSULTA_LENTA_MS = float(os.getenv('DB_CONSULTA_LENTA_MS', 500))              # Umbral del log de consultas lentas
+    DB_EXPLAIN_LENTAS = os.getenv('DB_EXPLAIN_LENTAS', 'false').lower() in ('1', 'true')  # Adjuntar EXPLAIN (sin ANALYZE)
+    DB_SERVER_TIMING = os.getenv('DB_SERVER_TIMING', 'true').lower() in ('1', 'true')
+    DB_LOG_NIVEL = os.getenv('DB_LOG_NIVEL', 'INFO')                                  # WARNING = solo consultas lentas
+
+    # GET /api/metrics (Prometheus): si se define, el scraper debe enviar 'Authorization: Bearer <token>'
+    METRICAS_TOKEN = os.getenv('METRICAS_TOKEN')
+
+    # Perfilador de peticiones (también a pedido de Gerencia con la cabecera X-Perfilar)
+    PERFILADOR_HABILITADO = os.getenv('PERFILADOR_HABILITADO', 'false').lower() in ('1', 'true')
+    PERFILADOR_MUESTREO = float(os.getenv('PERFILADOR_MUESTREO', 0.01))              # Fracción de peticiones perfiladas
+    PERFILADOR_MODO = os.getenv('PERFILADOR_MODO', 'cprofile')                       # cprofile (.prof) | muestreo (pilas colapsadas)
+    PERFILADOR_INTERVALO_SEG = float(os.getenv('PERFILADOR_INTERVALO_SEG', 0.005))   # Periodo del modo muestreo
+    PERFILADOR_ENDPOINTS = tuple(e for e in os.getenv('PERFILADOR_ENDPOINTS', '').split(',') if e)  # Vacío = todos
+    PERFILADOR_MAX_ARCHIVOS = int(os.getenv('PERFILADOR_MAX_ARCHIVOS', 20))          # Perfiles conservados por endpoint
+    if os.getenv('PERFILADOR_DIRECTORIO'):
+        PERFILADOR_DIRECTORIO = os.getenv('PERFILADOR_DIRECTORIO')
+
+    # Auditoría en segundo plano (logs_auditoria)
+    AUDITORIA_CAPACIDAD = int(os.getenv('AUDITORIA_CAPACIDAD', 10000))          # Eventos máximos en memoria
+    AUDITORIA_TAM_LOTE = int(os.getenv('AUDITORIA_TAM_LOTE', 100))              # Eventos por insert_many
+    AUDITORIA_INTERVALO_SEG = float(os.getenv('AUDITORIA_INTERVALO_SEG', 2))    # Volcado máximo cada N segundos
+    AUDITORIA_POLITICA = os.getenv('AUDITORIA_POLITICA', 'respaldo')            # respaldo | descartar_nuevos | descartar_antiguos | bloquear
+    if os.getenv('AUDITORIA_ARCHIVO_RESPALDO'):
+        AUDITORIA_ARCHIVO_RESPALDO = os.getenv('AUDITORIA_ARCHIVO_RESPALDO')
+
+    # Cache de roles para rol_requerido (un usuario revocado queda fuera en <= TTL)
+    ROLES_CACHE_TTL_SEG = float(os.getenv('ROLES_CACHE_TTL_SEG', 30))
+    ROLES_CACHE_MAX = int(os.getenv('ROLES_CACHE_MAX', 1000))
+
+    # Configuración de simulación cacheada: segundos entre chequeos de versión
+    CONFIG_CHEQUEO_SEG = float(os.getenv('CONFIG_CHEQUEO_SEG', 1))
+    SIMULACION_LOTE_MAX = int(os.getenv('SIMULACION_LOTE_MAX', 500))   # Escenarios por POST /api/simulacion/lote
+    # Cache de POST /api/simulacion por (cantidad, fecha, versión config, versión ATP); TTL 0 = sin cache
+    SIMULACION_CACHE_TTL_SEG = float(os.getenv('SIMULACION_CACHE_TTL_SEG', 30))
+    SIMULACION_CACHE_MAX = int(os.getenv('SIMULACION_CACHE_MAX', 1000))
+    SIMULACION_CACHE_ESPERA_SEG = float(os.getenv('SIMULACION_CACHE_ESPERA_SEG', 5))  # Espera máxima por un cálculo idéntico en curso
+    MUTACION_LOTE_MAX = int(os.getenv('MUTACION_LOTE_MAX', 1000))     # Ids por cambio/borrado masivo de pedidos
+
+    # Línea ATP en memoria: chequeo de versión y reconstrucción completa de respaldo
+    ATP_CHEQUEO_SEG = float(os.getenv('ATP_CHEQUEO_SEG', 1))
+    ATP_RECARGA_SEG = float(os.getenv('ATP_RECARGA_SEG', 300))
+    ATP_CURVA_MAX_DIAS = int(os.getenv('ATP_CURVA_MAX_DIAS', 731))   # Horizonte máximo de GET /api/atp/curva
+    CALENDARIO_MAX_DIAS = int(os.getenv('CALENDARIO_MAX_DIAS', 366))  # Ventana máxima de GET /api/calendario
+    DASHBOARD_MAX_MESES = int(os.getenv('DASHBOARD_MAX_MESES', 240))  # Rango máximo del gráfico de GET /api/dashboard
+
+    # Listados paginados (GET /api/lotes, pedidos, clientes, usuarios)
+    PAGINACION_LIMITE = int(os.getenv('PAGINACION_LIMITE', 100))
+    PAGINACION_MAX = int(os.getenv('PAGINACION_MAX', 1000))
+
+    # Carga masiva (POST /api/<pedidos|lotes|clientes>/importar y flask importar)
+    IMPORTACION_TAM_BLOQUE = int(os.getenv('IMPORTACION_TAM_BLOQUE', 5000))   # Filas por COPY
+    IMPORTACION_MAX_FILAS = int(os.getenv('IMPORTACION_MAX_FILAS', 200000))
+    IMPORTACION_MAX_ERRORES = int(os.getenv('IMPORTACION_MAX_ERRORES', 500))  # Errores detallados en la respuesta
+
+    # Exportaciones en streaming: filas por viaje del cursor del servidor / batch de Mongo
+    EXPORTACION_ITERSIZE = int(os.getenv('EXPORTACION_ITERSIZE', 2000))
+
+    # Monte Carlo (POST /api/simulacion/riesgo): tope de muestras y de tiempo por petición
+    MONTECARLO_MUESTRAS = int(os.getenv('MONTECARLO_MUESTRAS', 10000))
+    MONTECARLO_MAX_MUESTRAS = int(os.getenv('MONTECARLO_MAX_MUESTRAS', 100000))
+    MONTECARLO_MAX_SEG = float(os.getenv('MONTECARLO_MAX_SEG', 2))
+    SENSIBILIDAD_MAX_ESCENARIOS = int(os.getenv('SENSIBILIDAD_MAX_ESCENARIOS', 50000))  # Tope de POST /api/simulacion/sensibilidad
+
     # 3. CONFIGURACIÓN DE COOKIES (POR DEFECTO: PRODUCCIÓN)
     # Asumimos el escenario más estricto (Nube)
     SESSION_COOKIE_SAMESITE = 'None'
@@ -0,0 +1,26 @@
+# Configuración de gunicorn (gunicorn lo carga solo desde el directorio de trabajo):
+#   gunicorn run:app
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+
+# Métricas Prometheus compartidas entre workers: cada proceso escribe sus
+# valores en este directorio y /api/metrics los suma. Debe definirse antes de
+# que se importe prometheus_client (la app se carga después de este archivo).
+directorio_metricas = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'algatrack_metricas'))
+
+def on_starting(server):
+    # Archivos de una ejecución anterior sumarían contadores viejos
+    shutil.rmtree(directorio_metricas, ignore_errors=True)
+    os.makedirs(directorio_metricas, exist_ok=True)
+
+def child_exit(server, worker):
+    # Los gauges 'live*' del worker que terminó dejan de sumarse
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,104 @@
+from datetime import date
+from decimal import Decimal
+from app.db.database import get_db
+from app.services.atp import SumaAcumulada, obtener_linea_atp, cargar_linea_atp
+
+CLIENTE_TEST = 'Cliente_Pytest_ATP'
+
+def test_suma_acumulada_incremental():
+    """Sumar deltas da lo mismo que construir desde cero"""
+    suma = SumaAcumulada([(date(2025, 1, 10), Decimal('5')), (date(2025, 3, 1), Decimal('2.5'))])
+    assert suma.hasta(date(2025, 2, 1)) == Decimal('5')
+    suma.sumar(date(2025, 2, 1), Decimal('1.25'))
+    suma.sumar(date(2025, 1, 10), Decimal('-5'))
+    assert suma.fechas == [date(2025, 2, 1), date(2025, 3, 1)]
+    assert suma.hasta(date(2025, 1, 31)) == 0
+    assert suma.hasta(date(2025, 2, 1)) == Decimal('1.25')
+    assert suma.hasta(date(2030, 1, 1)) == Decimal('3.75')
+
+def _linea_desde_bd(app):
+    with app.app_context():
+        return cargar_linea_atp()
+
+def _mismo_stock(app, fechas):
+    with app.app_context():
+        linea = obtener_linea_atp()
+        desde_bd = _linea_desde_bd(app)
+        return all(linea.stock_neto(f) == desde_bd.stock_neto(f) for f in fechas)
+
+def test_linea_atp_se_actualiza_con_escrituras(app, client):
+    """Crear, cancelar y borrar pedidos actualiza la línea en memoria sin recargarla"""
+    client.post('/api/login', json={'usuario': 'usuario_pytest_autom', 'contrasena': '123456'})
+    fechas = [date(2025, 6, 1), date(2025, 9, 1), date(2026, 1, 1)]
+    with app.app_context():
+        linea = obtener_linea_atp()
+
+    try:
+        client.post('/api/pedidos', json={'cliente': CLIENTE_TEST, 'cantidad_ton': 12.5, 'fecha_entrega': '2025-08-15'})
+        with app.app_context():
+            assert obtener_linea_atp() is linea
+            with get_db().cursor() as cursor:
+                cursor.execute("SELECT id FROM pedidos WHERE cliente = %s", (CLIENTE_TEST,))
+                pedido_id = cursor.fetchone()['id']
+        assert _mismo_stock(app, fechas)
+
+        client.put(f'/api/pedidos/{pedido_id}/estado', json={'estado': 'cancelado'})
+        assert _mismo_stock(app, fechas)
+        client.put(f'/api/pedidos/{pedido_id}/estado', json={'estado': 'pendiente'})
+        assert _mismo_stock(app, fechas)
+
+        client.delete(f'/api/pedidos/{pedido_id}')
+        assert _mismo_stock(app, fechas)
+        with app.app_context():
+            assert obtener_linea_atp() is linea
+    finally:
+        with app.app_context():
+            with get_db().cursor() as cursor:
+                cursor.execute("DELETE FROM pedidos WHERE cliente = %s", (CLIENTE_TEST,))
+
+def test_curva_atp_coincide_con_stock_por_fecha(app, client):
+    """La curva diaria da el mismo stock que consultar cada fecha por separado"""
+    client.post('/api/login', json={'usuario': 'usuario_pytest_autom', 'contrasena': '123456'})
+    response = client.get('/api/atp/curva?desde=2025-04-01&hasta=2025-07-31')
+    assert response.status_code == 200
+    curva = response.json
+    assert len(curva['fechas']) == len(curva['stock']) == 122
+
+    with app.app_context():
+        linea = obtener_linea_atp()
+        for fecha, stock in zip(curva['fechas'], curva['stock']):
+            assert stock == round(linea.stock_neto(date.fromisoformat(fecha)), 2)
+
+    semanal = client.get('/api/atp/curva?desde=2025-04-01&hasta=2025-07-31&paso=semana').json
+    assert semanal['fechas'] == curva['fechas'][::7]
+    assert semanal['stock'] == curva['stock'][::7]
+
+def test_cambios_masivos_de_pedidos(app, client):
+    """Estado y borrado por lote: resultado por id y línea ATP consistente"""
+    client.post('/api/login', json={'usuario': 'usuario_pytest_autom', 'contrasena': '123456'})
+    fechas = [date(2025, 6, 1), date(2025, 9, 1), date(2026, 1, 1)]
+    try:
+        for i in range(4):
+            client.post('/api/pedidos', json={'cliente': CLIENTE_TEST, 'cantidad_ton': 2 + i, 'fecha_entrega': f'2025-0{5 + i}-15'})
+        with app.app_context():
+            with get_db().cursor() as cursor:
+                cursor.execute("SELECT id FROM pedidos WHERE cliente = %s ORDER BY id", (CLIENTE_TEST,))
+                ids = [f['id'] for f in cursor.fetchall()]
+
+        response = client.put('/api/pedidos/estado', json={'ids': ids[:3] + [-1], 'estado': 'entregado'})
+        assert [r['resultado'] for r in response.json['resultados']] == ['actualizado'] * 3 + ['no_encontrado']
+        assert response.json['resultados'][0]['estado_anterior'] == 'pendiente'
+        response = client.put('/api/pedidos/estado', json={'cambios': [
+            {'id': ids[0], 'estado': 'cancelado'}, {'id': ids[3], 'estado': 'cancelado'}
+        ]})
+        assert response.status_code == 200
+        assert _mismo_stock(app, fechas)
+        assert client.put('/api/pedidos/estado', json={'ids': [ids[0], ids[0]], 'estado': 'pendiente'}).status_code == 400
+
+        response = client.post('/api/pedidos/eliminar', json={'ids': [ids[1], ids[2], -1]})
+        assert [r['resultado'] for r in response.json['resultados']] == ['eliminado', 'eliminado', 'no_encontrado']
+        assert _mismo_stock(app, fechas)
+    finally:
+        with app.app_context():
+            with get_db().cursor() as cursor:
+                cursor.execute("DELETE FROM pedidos WHERE cliente = %s", (CLIENTE_TEST,))
\ No newline at end of file
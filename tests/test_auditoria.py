@@ -0,0 +1,51 @@
+import pytest
+from bson import json_util
+from app.db import mongo
+from app.db.auditoria import BufferAuditoria
+
+CONFIG_SIN_MONGO = {
+    'MONGO_URI': 'mongodb://127.0.0.1:1/',
+    'MONGO_MAX_POOL_SIZE': 1,
+    'MONGO_CONNECT_TIMEOUT_MS': 100,
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': 100,
+    'MONGO_SOCKET_TIMEOUT_MS': 100,
+    'MONGO_CIRCUITO_FALLOS': 1,
+    'MONGO_CIRCUITO_REINTENTO_SEG': 60,
+}
+
+@pytest.fixture
+def mongo_aislado(monkeypatch):
+    """Cliente y circuito propios del test: ni reutiliza los de otros tests
+    (con el MONGO_URI real) ni deja el circuito abierto para los siguientes"""
+    monkeypatch.setattr(mongo, '_cliente', None)
+    monkeypatch.setattr(mongo, '_cliente_pid', None)
+    monkeypatch.setattr(mongo, '_circuito', None)
+
+def test_auditoria_respalda_en_archivo_sin_mongo(tmp_path, mongo_aislado):
+    """Si Mongo no responde, los eventos quedan en el archivo local al apagar"""
+    archivo = tmp_path / 'pendiente.ndjson'
+    buffer = BufferAuditoria(CONFIG_SIN_MONGO, tam_lote=10, intervalo_seg=0.05, archivo_respaldo=str(archivo))
+
+    assert buffer.encolar({'tipo': 'PRUEBA', 'n': 1})
+    assert buffer.encolar({'tipo': 'PRUEBA', 'n': 2})
+    buffer.detener()
+
+    docs = [json_util.loads(l) for l in archivo.read_text().splitlines()]
+    assert sorted(d['n'] for d in docs) == [1, 2]
+    assert buffer.estadisticas()['en_cola'] == 0
+    assert buffer.estadisticas()['respaldados'] == 2
+
+def test_respaldo_con_lineas_corruptas_no_detiene_la_reproduccion(tmp_path, mongo_aislado):
+    """Una línea cortada se aparta en .corrupto; el resto se reinserta y no queda el archivo en curso"""
+    archivo = tmp_path / 'pendiente.ndjson'
+    archivo.write_text(json_util.dumps({'n': 1}) + '\n{"n": 2, "tip\n' + json_util.dumps({'n': 3}) + '\n')
+    buffer = BufferAuditoria(CONFIG_SIN_MONGO, tam_lote=10, archivo_respaldo=str(archivo))
+    insertados = []
+    buffer._insertar = insertados.extend
+
+    buffer._reproducir_respaldo()
+
+    assert [d['n'] for d in insertados] == [1, 3]
+    assert (tmp_path / 'pendiente.ndjson.corrupto').read_text() == '{"n": 2, "tip\n'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['pendiente.ndjson.corrupto']
+    assert buffer.estadisticas()['corruptos'] == 1
@@ -12,4 +12,20 @@ def test_login_fallido(client):
         'usuario': 'testuser',
         'contrasena': 'incorrecta'
     })
+    assert response.status_code == 401
+
+def test_sesion_revocada_es_rechazada(app, client):
+    """Al subir version_sesion la sesión abierta deja de valer (tras expirar la cache)"""
+    from app.db.database import get_db
+    from app.utils.security import get_cache_roles
+
+    client.post('/api/login', json={'usuario': 'usuario_pytest_autom', 'contrasena': '123456'})
+    assert client.post('/api/simulacion', json={'cantidad': 1, 'fecha': '2025-12-01'}).status_code == 200
+
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            cursor.execute("UPDATE usuarios SET version_sesion = version_sesion + 1 WHERE usuario = %s", ('usuario_pytest_autom',))
+        get_cache_roles().invalidar()
+
+    response = client.post('/api/simulacion', json={'cantidad': 1, 'fecha': '2025-12-01'})
     assert response.status_code == 401
\ No newline at end of file
@@ -0,0 +1,51 @@
+import threading
+import time
+import pytest
+from prometheus_client import REGISTRY
+from app.services.cache_simulacion import CacheSimulaciones
+
+def test_llamadas_simultaneas_calculan_una_vez():
+    """Single-flight: las peticiones idénticas en curso esperan el mismo cálculo"""
+    cache = CacheSimulaciones(ttl_seg=30)
+    llamadas, origenes = [], []
+
+    def calcular():
+        llamadas.append(1)
+        time.sleep(0.05)
+        return {'dias': 12}
+
+    hilos = [threading.Thread(target=lambda: origenes.append(cache.obtener_o_calcular(('a', 1), calcular)[1]))
+             for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert len(llamadas) == 1
+    assert sorted(origenes) == ['calculado'] + ['compartido'] * 7
+    assert cache.obtener_o_calcular(('a', 1), calcular) == ({'dias': 12}, 'cache')
+
+def test_ttl_lru_y_errores():
+    cache = CacheSimulaciones(ttl_seg=0.05, max_entradas=2)
+    for llave in ('a', 'b', 'c'):
+        cache.obtener_o_calcular(llave, lambda: llave)
+    assert cache.obtener_o_calcular('a', lambda: 'nuevo') == ('nuevo', 'calculado')  # Salió por LRU
+    time.sleep(0.06)
+    assert cache.obtener_o_calcular('c', lambda: 'otra vez')[1] == 'calculado'     # Venció
+
+    def fallar():
+        raise ValueError('sin datos')
+    with pytest.raises(ValueError):
+        cache.obtener_o_calcular('x', fallar)
+    assert cache.obtener_o_calcular('x', lambda: 1) == (1, 'calculado')            # El error no se guarda
+
+def test_simulacion_repetida_sale_de_cache(client):
+    """La segunda cotización idéntica no recalcula y responde lo mismo"""
+    client.post('/api/login', json={'usuario': 'usuario_pytest_autom', 'contrasena': '123456'})
+    cuerpo = {'cantidad': 13.7, 'fecha': '2031-03-03'}
+    antes = REGISTRY.get_sample_value('algatrack_simulacion_cache_total', {'origen': 'cache'}) or 0
+
+    primera = client.post('/api/simulacion', json=cuerpo)
+    segunda = client.post('/api/simulacion', json=cuerpo)
+    assert primera.status_code == segunda.status_code == 200
+    assert primera.json == segunda.json
+    assert REGISTRY.get_sample_value('algatrack_simulacion_cache_total', {'origen': 'cache'}) == antes + 1
\ No newline at end of file
@@ -0,0 +1,36 @@
+def test_calendario_filtra_por_ventana(client, app):
+    """Solo se devuelven eventos dentro de desde/hasta, ya formateados"""
+    from app.db.database import get_db
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            cursor.execute("DELETE FROM pedidos WHERE cliente = 'Cliente_Pytest_Cal'")
+            cursor.execute(
+                "INSERT INTO pedidos (cliente, producto, cantidad_ton, fecha_entrega, estado) VALUES "
+                "('Cliente_Pytest_Cal', 'Harina', 12.5, '2031-03-10', 'pendiente'), "
+                "('Cliente_Pytest_Cal', 'Harina', 3, '2031-04-10', 'pendiente'), "
+                "('Cliente_Pytest_Cal', 'Harina', 7, '2031-03-11', 'cancelado')"
+            )
+    try:
+        client.post('/api/login', json={
+            'usuario': 'usuario_pytest_autom',
+            'contrasena': '123456'
+        })
+        response = client.get('/api/calendario?desde=2031-03-01&hasta=2031-03-31')
+        assert response.status_code == 200
+        assert response.json == [{
+            'title': '🚚 Entrega: Cliente_Pytest_Cal (12.50 Ton)',
+            'date': '2031-03-10',
+            'backgroundColor': '#0d6efd',
+            'borderColor': '#0d6efd',
+            'extendedProps': {'tipo': 'pedido', 'producto': 'Harina'}
+        }]
+        assert client.get('/api/calendario?desde=2031-05-01&hasta=2031-05-31').json == []
+        # Parámetros de FullCalendar: end es exclusivo
+        fullcalendar = '/api/calendario?start=2031-03-01T00:00:00-03:00&end={}T00:00:00-03:00'
+        assert len(client.get(fullcalendar.format('2031-04-11')).json) == 2
+        assert len(client.get(fullcalendar.format('2031-04-10')).json) == 1
+        assert client.get('/api/calendario?desde=2031-05-01&hasta=2031-04-01').status_code == 400
+    finally:
+        with app.app_context():
+            with get_db().cursor() as cursor:
+                cursor.execute("DELETE FROM pedidos WHERE cliente = 'Cliente_Pytest_Cal'")
\ No newline at end of file
@@ -0,0 +1,60 @@
+import pytest
+from app.db.database import get_db
+from app.db.versiones import incrementar_version
+from app.services.config_simulacion import obtener_configuracion, invalidar_configuracion
+
+def test_configuracion_es_inmutable_y_compartida(app):
+    """Mientras no cambie la versión se reutiliza la misma foto"""
+    with app.app_context():
+        config = obtener_configuracion()
+        invalidar_configuracion()
+        assert obtener_configuracion() is config
+        with pytest.raises(TypeError):
+            config.parametros['precio_kwh'] = 1.0
+        with pytest.raises(AttributeError):
+            config.version = (0, 0)
+
+def test_configuracion_se_recarga_al_cambiar_version(app, client):
+    """Otro worker cambia parametros_sistema y sube la versión: se relee"""
+    client.post('/api/login', json={'usuario': 'usuario_pytest_autom', 'contrasena': '123456'})
+    with app.app_context():
+        original = obtener_configuracion().parametros['precio_kwh']
+        with get_db().cursor() as cursor:
+            cursor.execute("UPDATE parametros_sistema SET valor = %s WHERE clave = 'precio_kwh'", (original + 1,))
+            incrementar_version(cursor, 'parametros_sistema')
+    try:
+        with app.app_context():
+            invalidar_configuracion()
+        data = client.get('/api/config/sistema').json
+        assert {f['clave']: f['valor'] for f in data}['precio_kwh'] == original + 1
+    finally:
+        with app.app_context():
+            with get_db().cursor() as cursor:
+                cursor.execute("UPDATE parametros_sistema SET valor = %s WHERE clave = 'precio_kwh'", (original,))
+                incrementar_version(cursor, 'parametros_sistema')
+
+def test_get_condicional_responde_304_hasta_que_cambia_la_version(app, client):
+    """Mismo ETag => 304 sin cuerpo; al subir la versión cambia el ETag"""
+    client.post('/api/login', json={'usuario': 'usuario_pytest_autom', 'contrasena': '123456'})
+    primera = client.get('/api/config/estaciones')
+    etag = primera.headers['ETag']
+    assert primera.status_code == 200 and etag
+
+    segunda = client.get('/api/config/estaciones', headers={'If-None-Match': etag})
+    assert segunda.status_code == 304
+    assert segunda.data == b''
+
+    app.config['CONFIG_CHEQUEO_SEG'] = 3600
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            incrementar_version(cursor, 'configuracion_estacional')
+    # La foto del worker todavía no ve el cambio: el ETag es el de lo que se sirve
+    atrasada = client.get('/api/config/estaciones', headers={'If-None-Match': etag})
+    assert atrasada.status_code == 304
+
+    with app.app_context():
+        invalidar_configuracion()
+    tercera = client.get('/api/config/estaciones', headers={'If-None-Match': etag})
+    assert tercera.status_code == 200
+    assert tercera.headers['ETag'] != etag
+    assert tercera.json == primera.json
\ No newline at end of file
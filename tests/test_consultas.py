@@ -0,0 +1,70 @@
+import psycopg2
+import psycopg2.extras
+import pytest
+from app.db.database import get_db, transaccion, instantanea
+from app.db.consultas import ejecutar
+from app.db.versiones import incrementar_version, leer_versiones
+
+def _preparadas(cursor):
+    cursor.execute("SELECT name FROM pg_prepared_statements")
+    return {fila['name'] for fila in cursor.fetchall()}
+
+def test_preparada_una_vez_y_se_recupera(app):
+    """PREPARE en el primer uso; si la sesión la pierde se vuelve a preparar sola"""
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            ejecutar(cursor, 'rol_usuario', (-1,))
+            assert cursor.fetchall() == []
+            assert 'rol_usuario' in _preparadas(cursor)
+
+            cursor.execute("DEALLOCATE ALL")  # Como un proxy que reinicia la sesión
+            cursor.execute("SELECT id FROM usuarios WHERE usuario = 'usuario_pytest_autom'")
+            ejecutar(cursor, 'rol_usuario', (cursor.fetchone()['id'],))
+            assert cursor.fetchone()['rol'] == 'Comercial'
+            assert 'rol_usuario' in _preparadas(cursor)
+
+def test_preparada_dentro_de_transaccion_y_desactivado(app):
+    with app.app_context():
+        get_db().cursor().execute("DEALLOCATE ALL")
+        with transaccion() as cursor:
+            ejecutar(cursor, 'versiones', (['lotes'],))
+            assert cursor.fetchone()['tabla'] == 'lotes'
+            assert 'versiones' in _preparadas(cursor)
+        get_db().cursor().execute("DEALLOCATE ALL")
+        get_db().preparadas.clear()
+        app.config['POSTGRES_PREPARADAS'] = False
+        with get_db().cursor() as cursor:
+            ejecutar(cursor, 'versiones', (['lotes'],))
+            assert cursor.fetchone()['tabla'] == 'lotes'
+            assert _preparadas(cursor) == set()
+def test_sentencia_perdida_en_transaccion_se_recupera_despues(app):
+    """En una transacción el error sube; la siguiente ejecución en autocommit limpia la sesión"""
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            ejecutar(cursor, 'versiones', (['lotes'],))
+            cursor.execute("DEALLOCATE ALL")
+        with pytest.raises(psycopg2.errors.InvalidSqlStatementName):
+            with transaccion() as cursor:
+                ejecutar(cursor, 'versiones', (['lotes'],))
+        with transaccion() as cursor:  # SQL normal mientras la sesión está desincronizada
+            ejecutar(cursor, 'versiones', (['lotes'],))
+            assert cursor.fetchone()['tabla'] == 'lotes'
+        with get_db().cursor() as cursor:
+            ejecutar(cursor, 'versiones', (['lotes'],))
+            assert cursor.fetchone()['tabla'] == 'lotes'
+            assert _preparadas(cursor) == {'versiones'}
+
+def test_instantanea_no_ve_escrituras_confirmadas_entre_medio(app):
+    with app.app_context():
+        with instantanea() as cursor:
+            antes = leer_versiones(cursor, 'lotes')['lotes']
+            otra = psycopg2.connect(app.config['POSTGRES_URI'], cursor_factory=psycopg2.extras.RealDictCursor)
+            try:
+                with otra, otra.cursor() as externo:
+                    incrementar_version(externo, 'lotes')
+            finally:
+                otra.close()
+            assert leer_versiones(cursor, 'lotes')['lotes'] == antes
+        with get_db().cursor() as cursor:
+            assert leer_versiones(cursor, 'lotes')['lotes'] == antes + 1
+            assert get_db().autocommit and not get_db().readonly
@@ -0,0 +1,65 @@
+from app.db.database import get_db
+
+CLIENTE = 'Cliente_Pytest_Dash'
+
+def _resumen_vs_recalculo(cursor):
+    cursor.execute("SELECT mes, estado, total_ton, pedidos FROM resumen_pedidos_mensual WHERE pedidos <> 0 ORDER BY 1, 2")
+    mantenido = cursor.fetchall()
+    cursor.execute("""
+        SELECT date_trunc('month', fecha_entrega)::date AS mes, COALESCE(estado, 'sin_estado') AS estado,
+               SUM(cantidad_ton) AS total_ton, COUNT(*) AS pedidos
+        FROM pedidos GROUP BY 1, 2 ORDER BY 1, 2
+    """)
+    return mantenido, cursor.fetchall()
+
+def test_resumen_se_mantiene_con_cada_escritura(app):
+    """Los triggers dejan el resumen igual a recalcularlo desde pedidos"""
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            try:
+                cursor.execute(
+                    "INSERT INTO pedidos (cliente, producto, cantidad_ton, fecha_entrega, estado) "
+                    "SELECT %s, 'Harina', 1.5 * g, DATE '2030-01-15' + g * 20, 'pendiente' FROM generate_series(1, 30) g",
+                    (CLIENTE,)
+                )
+                cursor.execute("UPDATE pedidos SET estado = 'entregado' WHERE cliente = %s AND cantidad_ton > 20", (CLIENTE,))
+                cursor.execute("UPDATE pedidos SET fecha_entrega = fecha_entrega + 45 WHERE cliente = %s AND cantidad_ton < 6", (CLIENTE,))
+                cursor.execute("DELETE FROM pedidos WHERE cliente = %s AND cantidad_ton BETWEEN 10 AND 14", (CLIENTE,))
+                mantenido, recalculado = _resumen_vs_recalculo(cursor)
+                assert mantenido == recalculado
+
+                cursor.execute("SELECT cantidad FROM conteo_estados WHERE tabla = 'pedidos' AND estado = 'pendiente'")
+                pendientes = cursor.fetchone()['cantidad']
+                cursor.execute("SELECT COUNT(*) AS c FROM pedidos WHERE estado = 'pendiente'")
+                assert pendientes == cursor.fetchone()['c']
+            finally:
+                cursor.execute("DELETE FROM pedidos WHERE cliente = %s", (CLIENTE,))
+
+def test_dashboard_rango_y_granularidad(client, app):
+    """El gráfico separa años y agrupa por la granularidad pedida"""
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO pedidos (cliente, producto, cantidad_ton, fecha_entrega, estado) VALUES "
+                "(%s, 'Harina', 10, '2031-01-10', 'pendiente'), (%s, 'Harina', 5, '2032-01-10', 'pendiente'), "
+                "(%s, 'Harina', 2, '2032-03-10', 'entregado')",
+                (CLIENTE, CLIENTE, CLIENTE)
+            )
+    try:
+        client.post('/api/login', json={
+            'usuario': 'usuario_pytest_autom',
+            'contrasena': '123456'
+        })
+        mensual = client.get('/api/dashboard?desde=2031-01&hasta=2032-03').json
+        assert len(mensual['grafico']) == 15
+        assert mensual['grafico'][0] == {'name': 'Jan 2031', 'produccion': 10.0}
+        assert mensual['grafico'][12] == {'name': 'Jan 2032', 'produccion': 5.0}
+
+        trimestral = client.get('/api/dashboard?desde=2032-01&hasta=2032-12&granularidad=trimestre&estado=pendiente').json
+        assert trimestral['grafico'][0] == {'name': '2032 T1', 'produccion': 5.0}
+        assert len(trimestral['grafico']) == 4
+        assert client.get('/api/dashboard?granularidad=semana').status_code == 400
+    finally:
+        with app.app_context():
+            with get_db().cursor() as cursor:
+                cursor.execute("DELETE FROM pedidos WHERE cliente = %s", (CLIENTE,))
\ No newline at end of file
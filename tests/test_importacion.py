@@ -0,0 +1,67 @@
+import io
+from app.db.database import get_db
+
+CLIENTE = 'Cliente_Pytest_Imp'
+
+def _login(client):
+    client.post('/api/login', json={
+        'usuario': 'usuario_pytest_autom',
+        'contrasena': '123456'
+    })
+
+def _limpiar(app):
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            cursor.execute("DELETE FROM pedidos WHERE cliente = %s", (CLIENTE,))
+            cursor.execute("DELETE FROM clientes WHERE empresa LIKE %s", (CLIENTE + '%',))
+
+def test_importar_pedidos_csv_con_errores_por_linea(client, app):
+    """Las filas válidas se cargan; las inválidas se informan con su línea"""
+    csv = (
+        "cliente,producto,cantidad_ton,fecha_entrega,estado\n"
+        f"{CLIENTE},Harina,12.5,2031-03-10,\n"
+        f"{CLIENTE},,abc,2031-13-01,pendiente\n"
+        f"{CLIENTE},Pellet,3,2031-04-01,entregado\n"
+    )
+    _login(client)
+    try:
+        response = client.post('/api/pedidos/importar', data={
+            'archivo': (io.BytesIO(csv.encode()), 'pedidos.csv')
+        }, content_type='multipart/form-data')
+        assert response.status_code == 201
+        assert response.json['insertadas'] == 2
+        assert response.json['errores'] == [{'linea': 3, 'errores': [
+            "cantidad_ton: número inválido: 'abc'",
+            "fecha_entrega: fecha inválida (YYYY-MM-DD): '2031-13-01'"
+        ]}]
+        with app.app_context():
+            with get_db().cursor() as cursor:
+                cursor.execute("SELECT producto, estado FROM pedidos WHERE cliente = %s ORDER BY fecha_entrega", (CLIENTE,))
+                assert [tuple(f.values()) for f in cursor.fetchall()] == [('Harina', 'pendiente'), ('Pellet', 'entregado')]
+    finally:
+        _limpiar(app)
+
+def test_importar_clientes_ndjson_detecta_repetidos(client, app):
+    """Empresas repetidas en el archivo se rechazan; solo_validar no escribe"""
+    ndjson = "\n".join([
+        '{"empresa": "%s A", "contacto": "Ana"}' % CLIENTE,
+        '{"empresa": "%s B"}' % CLIENTE,
+        '{"empresa": "%s A"}' % CLIENTE,
+        '[1, 2]',
+    ])
+    _login(client)
+    try:
+        validacion = client.post('/api/clientes/importar?solo_validar=1', data=ndjson,
+                                 content_type='application/x-ndjson')
+        assert validacion.status_code == 200
+        assert validacion.json['insertadas'] == 0
+        assert validacion.json['filas_validas'] == 2
+        assert [e['linea'] for e in validacion.json['errores']] == [3, 4]
+
+        carga = client.post('/api/clientes/importar', data=ndjson, content_type='application/x-ndjson')
+        assert carga.json['insertadas'] == 2
+        segunda = client.post('/api/clientes/importar', data=ndjson, content_type='application/x-ndjson')
+        assert segunda.json['insertadas'] == 0
+        assert 'ya existe' in segunda.json['errores'][0]['errores'][0]
+    finally:
+        _limpiar(app)
\ No newline at end of file
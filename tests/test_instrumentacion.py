@@ -0,0 +1,33 @@
+import json
+import logging
+
+def _eventos(caplog, tipo):
+    return [json.loads(r.getMessage()) for r in caplog.records
+            if r.name == 'algatrack.db' and r.getMessage().startswith('{') and tipo in r.getMessage()]
+
+def test_server_timing_y_log_por_peticion(client, caplog):
+    """Cada respuesta informa cuántas consultas hizo y cuánto tardó la BD"""
+    client.post('/api/login', json={'usuario': 'usuario_pytest_autom', 'contrasena': '123456'})
+    with caplog.at_level(logging.INFO, logger='algatrack.db'):
+        response = client.get('/api/lotes?limite=5')
+    assert response.status_code == 200
+    assert 'db;dur=' in response.headers['Server-Timing']
+    assert 'app;dur=' in response.headers['Server-Timing']
+
+    peticion = _eventos(caplog, '"peticion"')[-1]
+    assert peticion['ruta'] == '/api/lotes' and peticion['estado'] == 200
+    assert peticion['consultas'] >= 1 and 'lotes' in peticion['db_max_sql']
+
+def test_consulta_lenta_con_parametros_redactados(client, app, caplog):
+    """Sobre el umbral se registra la sentencia sin los valores y con su plan"""
+    app.config['DB_CONSULTA_LENTA_MS'] = 0
+    app.config['DB_EXPLAIN_LENTAS'] = True
+    with caplog.at_level(logging.INFO, logger='algatrack.db'):
+        response = client.post('/api/login', json={'usuario': 'usuario_pytest_autom', 'contrasena': '123456'})
+    assert response.status_code == 200
+
+    lentas = _eventos(caplog, 'consulta_lenta')
+    login = next(e for e in lentas if e['sql'].startswith('EXECUTE usuario_por_nombre'))
+    assert login['parametros'] == ['<str>']
+    assert 'usuario_pytest_autom' not in json.dumps(lentas)
+    assert login['plan'][0]['Plan']['Node Type']
\ No newline at end of file
@@ -0,0 +1,84 @@
+import base64
+import csv
+import io
+import json
+from app.db.database import get_db
+
+TEST_LOTE = 'Lote_Pytest_Autom'
+
+def test_lotes_paginados_con_cursor(client, app):
+    """Recorrer las páginas con el cursor da exactamente el listado completo, sin repetir"""
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            # Fechas repetidas para ejercitar el desempate por id
+            for fecha in ('2024-03-01', '2024-03-01', '2024-03-01', '2024-02-01', '2024-05-01'):
+                cursor.execute(
+                    "INSERT INTO lotes (tipo_alga, superficie, fecha_inicio, estado) VALUES (%s, 1, %s, 'cosechado')",
+                    (TEST_LOTE, fecha)
+                )
+
+    client.post('/api/login', json={
+        'usuario': 'usuario_pytest_autom',
+        'contrasena': '123456'
+    })
+    completo = client.get(f'/api/lotes?tipo_alga={TEST_LOTE}&limite=50').json
+    assert len(completo) == 6
+    # NUMERIC y DATE salen tal cual de la fila: número y fecha ISO
+    assert all(isinstance(l['superficie'], (int, float)) for l in completo)
+    assert completo[-1]['fecha_inicio'] == '2024-02-01'
+
+    vistos, cursor = [], None
+    while True:
+        url = f'/api/lotes?tipo_alga={TEST_LOTE}&limite=2&fields=id,estado'
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        assert all(set(l) == {'id', 'estado'} for l in response.json)
+        vistos.extend(l['id'] for l in response.json)
+        cursor = response.headers.get('X-Siguiente-Cursor')
+        if not cursor:
+            break
+    assert vistos == [l['id'] for l in completo]
+
+    cosechados = client.get(f'/api/lotes?tipo_alga={TEST_LOTE}&estado=cosechado&desde=2024-03-01').json
+    assert len(cosechados) == 4
+
+def test_listado_valida_parametros(client):
+    """fields, limite y cursor inválidos responden 400"""
+    client.post('/api/login', json={
+        'usuario': 'usuario_pytest_autom',
+        'contrasena': '123456'
+    })
+    assert client.get('/api/pedidos?fields=contrasena').status_code == 400
+    assert client.get('/api/pedidos?limite=0').status_code == 400
+    assert client.get('/api/clientes?cursor=no-es-un-cursor').status_code == 400
+    # Cursores alterados a mano con tipos que no calzan con las columnas de orden
+    for valores in (['abc', 1], [1.5, 1], ['2025-01-01', 'x'], [{'a': 1}, 1], [True, 1]):
+        token = base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip('=')
+        assert client.get(f'/api/lotes?cursor={token}').status_code == 400
+
+def test_exportar_lotes_en_streaming(client, app):
+    """La exportación trae todas las filas filtradas en CSV y NDJSON"""
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            for fecha in ('2024-03-01', '2024-02-01'):
+                cursor.execute(
+                    "INSERT INTO lotes (tipo_alga, superficie, fecha_inicio, estado) VALUES (%s, 2.5, %s, 'activo')",
+                    (TEST_LOTE, fecha)
+                )
+    client.post('/api/login', json={
+        'usuario': 'usuario_pytest_autom',
+        'contrasena': '123456'
+    })
+    response = client.get(f'/api/lotes/exportar?tipo_alga={TEST_LOTE}&fields=fecha_inicio,superficie')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    filas = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert filas[0] == ['fecha_inicio', 'superficie']
+    assert ['2024-03-01', '2.50'] in filas and len(filas) == 4
+
+    response = client.get(f'/api/lotes/exportar?tipo_alga={TEST_LOTE}&formato=ndjson')
+    lineas = [json.loads(l) for l in response.get_data(as_text=True).splitlines()]
+    assert len(lineas) == 3 and lineas[0]['tipo_alga'] == TEST_LOTE
+    # La conexión vuelve al pool en autocommit tras el cursor del servidor
+    assert client.get('/api/lotes?limite=1').status_code == 200
+    assert client.get('/api/lotes/exportar?formato=xml').status_code == 400
\ No newline at end of file
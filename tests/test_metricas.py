@@ -0,0 +1,28 @@
+from prometheus_client.parser import text_string_to_metric_families
+
+def _muestras(response):
+    texto = response.get_data(as_text=True)
+    return [m for familia in text_string_to_metric_families(texto) for m in familia.samples]
+
+def _peticiones(response, endpoint, estado):
+    return sum(m.value for m in _muestras(response)
+               if m.name == 'algatrack_peticiones_total'
+               and m.labels['endpoint'] == endpoint and m.labels['estado'] == estado)
+
+def test_metricas_por_endpoint(client, app):
+    """Cada petición suma al contador y al histograma de su endpoint"""
+    antes = _peticiones(client.get('/api/metrics'), 'clientes.listar_clientes', '401')
+    client.get('/api/clientes')
+    client.get('/api/clientes')
+
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    assert _peticiones(response, 'clientes.listar_clientes', '401') == antes + 2
+    nombres = {(m.name, m.labels.get('endpoint')) for m in _muestras(response)}
+    assert ('algatrack_peticion_segundos_count', 'clientes.listar_clientes') in nombres
+    assert ('algatrack_pool_conexiones', None) in nombres
+
+    app.config['METRICAS_TOKEN'] = 'secreto'
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer secreto'}).status_code == 200
\ No newline at end of file
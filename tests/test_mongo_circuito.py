@@ -0,0 +1,23 @@
+import time
+from app.db.mongo import CircuitoMongo
+
+def test_circuito_se_abre_tras_fallos():
+    """Tras N fallos seguidos deja de intentar Mongo"""
+    circuito = CircuitoMongo(umbral_fallos=2, reintento_seg=60)
+    circuito.registrar_fallo()
+    assert circuito.permite()
+    circuito.registrar_fallo()
+    assert circuito.estado() == 'abierto'
+    assert not circuito.permite()
+
+def test_circuito_se_recupera_solo():
+    """Pasado el tiempo de reintento deja pasar una prueba y se cierra si funciona"""
+    circuito = CircuitoMongo(umbral_fallos=1, reintento_seg=0.05)
+    circuito.registrar_fallo()
+    assert not circuito.permite()
+    time.sleep(0.06)
+    assert circuito.permite()       # Intento de prueba
+    assert not circuito.permite()   # Solo uno a la vez
+    circuito.registrar_exito()
+    assert circuito.estado() == 'cerrado'
+    assert circuito.permite()
\ No newline at end of file
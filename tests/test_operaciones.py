@@ -35,4 +35,54 @@ def test_simulacion_cantidad_negativa(client):
     })
 
     assert response.status_code == 400
-    assert 'error' in response.json
\ No newline at end of file
+    assert 'error' in response.json
+
+def test_simulacion_lote_igual_a_escalar(client):
+    """Cada escenario del lote devuelve lo mismo que /api/simulacion"""
+    client.post('/api/login', json={
+        'usuario': 'usuario_pytest_autom',
+        'contrasena': '123456'
+    })
+    escenarios = [
+        {'cantidad': 10, 'fecha': '2025-12-01'},
+        {'cantidad': 500, 'fecha': '2025-06-15'},
+        {'cantidad': 3.5, 'fecha': '2024-01-10'},
+    ]
+
+    response = client.post('/api/simulacion/lote', json={'escenarios': escenarios})
+    assert response.status_code == 200
+    lote = response.json['resultados']
+    assert len(lote) == 3
+
+    for escenario, resultado in zip(escenarios, lote):
+        individual = client.post('/api/simulacion', json=escenario).json
+        assert resultado == individual
+
+def test_simulacion_lote_valida_escenarios(client):
+    """Un escenario inválido rechaza el lote indicando su posición"""
+    client.post('/api/login', json={
+        'usuario': 'usuario_pytest_autom',
+        'contrasena': '123456'
+    })
+    response = client.post('/api/simulacion/lote', json={'escenarios': [
+        {'cantidad': 10, 'fecha': '2025-12-01'},
+        {'cantidad': -1, 'fecha': '2025-12-01'},
+    ]})
+    assert response.status_code == 400
+    assert 'Escenario 1' in response.json['error']
+
+def test_simulacion_riesgo_percentiles(client):
+    """Monte Carlo: percentiles ordenados y reproducibles con semilla"""
+    client.post('/api/login', json={
+        'usuario': 'usuario_pytest_autom',
+        'contrasena': '123456'
+    })
+    body = {'cantidad': 50, 'fecha': '2025-06-15', 'muestras': 5000, 'semilla': 42}
+    response = client.post('/api/simulacion/riesgo', json=body)
+    assert response.status_code == 200
+    dias = response.json['dias_totales']
+    assert dias['p10'] <= dias['p50'] <= dias['p90']
+    assert client.post('/api/simulacion/riesgo', json=body).json == response.json
+
+    response = client.post('/api/simulacion/riesgo', json=dict(body, distribuciones={'*': {'biomasa': {'tipo': 'gamma'}}}))
+    assert response.status_code == 400
\ No newline at end of file
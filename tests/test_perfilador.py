@@ -0,0 +1,38 @@
+import os
+import pstats
+
+def test_perfiles_muestreados_con_rotacion(client, app, tmp_path):
+    """Con muestreo 1.0 cada petición deja un .prof; se conservan los últimos N por endpoint"""
+    app.config.update(PERFILADOR_HABILITADO=True, PERFILADOR_MUESTREO=1.0,
+                      PERFILADOR_DIRECTORIO=str(tmp_path), PERFILADOR_MAX_ARCHIVOS=2)
+    for _ in range(3):
+        response = client.get('/')
+        assert response.headers['X-Perfil'].startswith('home/')
+
+    archivos = os.listdir(tmp_path / 'home')
+    assert len(archivos) == 2
+    assert pstats.Stats(str(tmp_path / 'home' / archivos[0])).total_calls > 0
+
+    app.config['PERFILADOR_HABILITADO'] = False
+    assert 'X-Perfil' not in client.get('/').headers
+
+def test_cabecera_solo_para_gerencia(client, app, tmp_path):
+    """X-Perfilar se ignora salvo para Gerencia; el modo muestreo deja pilas colapsadas"""
+    app.config['PERFILADOR_DIRECTORIO'] = str(tmp_path)
+    client.post('/api/login', json={'usuario': 'usuario_pytest_autom', 'contrasena': '123456'})
+    assert 'X-Perfil' not in client.get('/api/lotes', headers={'X-Perfilar': '1'}).headers
+
+    from app.db.database import get_db
+    from app.utils.security import get_cache_roles
+    with app.app_context():
+        with get_db().cursor() as cursor:
+            cursor.execute("UPDATE usuarios SET rol = 'Gerencia' WHERE usuario = 'usuario_pytest_autom'")
+        get_cache_roles().invalidar()
+
+    response = client.get('/api/lotes', headers={'X-Perfilar': 'muestreo'})
+    assert response.status_code == 200
+    archivo = tmp_path / response.headers['X-Perfil']
+    assert archivo.suffix == '.txt'
+    for linea in archivo.read_text().splitlines():
+        pila, cuenta = linea.rsplit(' ', 1)
+        assert int(cuenta) > 0 and ':' in pila
\ No newline at end of file
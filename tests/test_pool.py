@@ -0,0 +1,38 @@
+import pytest
+from app.db.pool import PoolConexiones, PoolAgotado
+
+def test_pool_reutiliza_conexion(app):
+    """La conexión devuelta se vuelve a prestar en vez de abrir otra"""
+    pool = PoolConexiones(app.config['POSTGRES_URI'], minimo=0, maximo=2)
+    c1 = pool.obtener()
+    pool.devolver(c1)
+    c2 = pool.obtener()
+    assert c1 is c2
+    assert pool.estadisticas()['total'] == 1
+    pool.devolver(c2)
+    pool.cerrar_todo()
+
+def test_pool_timeout_si_esta_agotado(app):
+    """Sin conexiones libres, obtener() falla tras el timeout"""
+    pool = PoolConexiones(app.config['POSTGRES_URI'], minimo=0, maximo=1, timeout=0.1)
+    c1 = pool.obtener()
+    with pytest.raises(PoolAgotado):
+        pool.obtener()
+    assert pool.estadisticas()['agotados'] == 1
+    pool.devolver(c1)
+    pool.cerrar_todo()
+
+def test_pool_limpia_estado_al_devolver(app):
+    """Una transacción abierta se revierte y vuelve el autocommit"""
+    pool = PoolConexiones(app.config['POSTGRES_URI'], minimo=0, maximo=1)
+    conn = pool.obtener()
+    conn.autocommit = False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    pool.devolver(conn)
+
+    conn = pool.obtener()
+    assert conn.autocommit is True
+    assert pool.estadisticas()['en_uso'] == 1
+    pool.devolver(conn)
+    pool.cerrar_todo()
\ No newline at end of file
@@ -0,0 +1,58 @@
+from app.services.predictor import MotorSimulacion, TablaEstacional, FACTORES_FALLBACK
+
+ESTACIONES = [
+    {'nombre_estacion': 'Invierno', 'meses_asociados': '5,6,7,8', 'factor_biomasa': 0.7,
+     'factor_secado': 0.6, 'factor_energia': 1.4, 'factor_crecimiento': 0.8},
+    {'nombre_estacion': 'Verano', 'meses_asociados': '1,2,12', 'factor_biomasa': 1.2,
+     'factor_secado': 1.1, 'factor_energia': 1.0, 'factor_crecimiento': 1.2},
+]
+
+def test_tabla_estacional_cubre_los_12_meses():
+    """Cada mes tiene factores; los meses sin estación usan el fallback"""
+    tabla = TablaEstacional(ESTACIONES)
+    assert len(tabla.por_mes) == 12
+    assert tabla.factores(6).nombre == 'Invierno'
+    assert tabla.factores(12).biomasa == 1.2
+    assert tabla.factores(3) is FACTORES_FALLBACK
+    assert tabla.advertencias == ()
+
+def test_tabla_estacional_detecta_errores_y_solapes():
+    """Filas malformadas y meses repetidos se reportan al compilar"""
+    estaciones = ESTACIONES + [
+        {'nombre_estacion': 'Rota', 'meses_asociados': '3,x', 'factor_biomasa': 1,
+         'factor_secado': 1, 'factor_energia': 1, 'factor_crecimiento': 1},
+        {'nombre_estacion': 'Solapada', 'meses_asociados': '8,9', 'factor_biomasa': 1,
+         'factor_secado': 1, 'factor_energia': 1, 'factor_crecimiento': 1},
+    ]
+    tabla = TablaEstacional(estaciones)
+    assert len(tabla.advertencias) == 2
+    assert tabla.factores(8).nombre == 'Invierno'   # Gana la primera
+    assert tabla.factores(9).nombre == 'Solapada'
+    assert tabla.factores(3) is FACTORES_FALLBACK
+
+def test_obtener_factores_acepta_lista_o_tabla():
+    """La lista cruda y la tabla compilada dan los mismos factores"""
+    tabla = TablaEstacional(ESTACIONES)
+    for mes in range(1, 13):
+        assert MotorSimulacion.obtener_factores_dinamicos(mes, ESTACIONES) == tabla.factores(mes)
+
+def test_simular_lote_coincide_con_simular():
+    """La versión vectorizada da exactamente los mismos resultados que la escalar"""
+    params = {
+        'precio_agua_m3': 2500.0, 'precio_kwh': 180.0, 'precio_diesel_L': 1150.0,
+        'consumo_agua_ton': 3.0, 'consumo_energia_ton': 40.0, 'consumo_diesel_ton': 12.5,
+        'horas_hombre_ton': 4.5, 'costo_hh_operario': 5500.0, 'insumos_varios_ton': 5000.0,
+        'capacidad_planta_dia': 2.5, 'dias_ciclo_base': 45.0, 'capacidad_cosecha_dia': 5.0
+    }
+    tabla = TablaEstacional(ESTACIONES)
+    cantidades, fechas, superficies = [], [], []
+    for mes in range(1, 13):
+        for cantidad in (0.5, 10.0, 33.33, 250.0):
+            for superficie in (0.0, 1.0, 4.2):
+                cantidades.append(cantidad)
+                fechas.append(f'2025-{mes:02d}-15')
+                superficies.append(superficie)
+
+    lote = MotorSimulacion.simular_lote(cantidades, fechas, superficies, params, tabla)
+    for c, f, s, resultado in zip(cantidades, fechas, superficies, lote):
+        assert resultado == MotorSimulacion.simular(c, f, s, params, tabla)
\ No newline at end of file
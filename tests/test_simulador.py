@@ -0,0 +1,81 @@
+import pytest
+from datetime import datetime
+from app.services.predictor import TablaEstacional, MotorSimulacion
+from app.services.simulador import simular_montecarlo, analizar_sensibilidad
+from tests.test_predictor import ESTACIONES
+
+PARAMS = {
+    'precio_agua_m3': 2500.0, 'precio_kwh': 180.0, 'precio_diesel_L': 1150.0,
+    'consumo_agua_ton': 3.0, 'consumo_energia_ton': 40.0, 'consumo_diesel_ton': 12.5,
+    'horas_hombre_ton': 4.5, 'costo_hh_operario': 5500.0, 'insumos_varios_ton': 5000.0,
+    'capacidad_planta_dia': 2.5, 'dias_ciclo_base': 45.0, 'capacidad_cosecha_dia': 5.0
+}
+
+def test_montecarlo_reproducible_con_semilla():
+    """Misma semilla, mismos percentiles"""
+    tabla = TablaEstacional(ESTACIONES)
+    fecha = datetime(2025, 6, 15)
+    a = simular_montecarlo(50, fecha, 2.0, PARAMS, tabla, muestras=20000, semilla=7)
+    b = simular_montecarlo(50, fecha, 2.0, PARAMS, tabla, muestras=20000, semilla=7)
+    assert a == b
+    assert a['muestras'] == 20000 and not a['truncado']
+    assert a['dias_totales']['p10'] <= a['dias_totales']['p50'] <= a['dias_totales']['p90']
+
+def test_montecarlo_sin_varianza_da_el_valor_puntual():
+    """Con distribuciones fijas todos los percentiles coinciden"""
+    tabla = TablaEstacional(ESTACIONES)
+    fijo = {f: {'tipo': 'fijo'} for f in ('biomasa', 'secado', 'energia', 'crecimiento')}
+    r = simular_montecarlo(10, datetime(2025, 1, 15), 5.0, PARAMS, tabla,
+                           distribuciones={'*': fijo}, muestras=100, semilla=1)
+    base = MotorSimulacion.simular(10, datetime(2025, 1, 15), 5.0, PARAMS, tabla)
+    assert r['dias_totales']['p10'] == r['dias_totales']['p90'] == base['operaciones']['dias_totales']
+    assert r['probabilidad_deficit'] == 0.0
+
+def test_montecarlo_respeta_presupuesto_de_tiempo():
+    """Con tiempo agotado se corta tras el primer bloque"""
+    tabla = TablaEstacional(ESTACIONES)
+    r = simular_montecarlo(10, datetime(2025, 1, 15), 5.0, PARAMS, tabla,
+                           muestras=100000, semilla=1, max_segundos=0)
+    assert r['truncado'] and r['muestras'] < 100000
+
+def test_sensibilidad_uno_a_uno_coincide_con_simular():
+    """Cada punto del tornado es la simulación escalar con ese parámetro cambiado"""
+    tabla = TablaEstacional(ESTACIONES)
+    fecha = datetime(2025, 6, 15)
+    r = analizar_sensibilidad(50, fecha, 2.0, PARAMS, tabla, {
+        'precio_diesel_L': [1150.0 * 1.2],
+        'capacidad_planta_dia': {'min': 2.0, 'max': 3.0, 'pasos': 3},
+        'factor_biomasa': [0.5, 0.9],
+    })
+    assert r['escenarios'] == 7
+    base = MotorSimulacion.simular(50, fecha, 2.0, PARAMS, tabla)
+    assert r['base']['costo_total'] == base['financiero']['costo_total']
+
+    por_parametro = {i['parametro']: i for i in r['sensibilidad']}
+    diesel = MotorSimulacion.simular(50, fecha, 2.0, dict(PARAMS, precio_diesel_L=1380.0), tabla)
+    assert por_parametro['precio_diesel_L']['costo_total'] == [diesel['financiero']['costo_total']]
+    assert por_parametro['capacidad_planta_dia']['valores'] == [2.0, 2.5, 3.0]
+    assert r['ranking_dias'][0] == 'capacidad_planta_dia'
+    assert PARAMS['precio_diesel_L'] == 1150.0
+
+def test_sensibilidad_grilla_y_validaciones():
+    """La grilla evalúa todas las combinaciones; claves y rangos se validan"""
+    tabla = TablaEstacional(ESTACIONES)
+    fecha = datetime(2025, 1, 15)
+    r = analizar_sensibilidad(10, fecha, 5.0, PARAMS, tabla,
+                              {'precio_kwh': [150, 200], 'consumo_agua_ton': [2, 3, 4]}, modo='grilla')
+    assert len(r['grilla']['combinaciones']) == 6
+    assert r['sensibilidad'][0]['parametro'] == 'consumo_agua_ton'
+
+    for rangos in ({'no_existe': [1]}, {'biomasa': [1.0]}, {'capacidad_planta_dia': [0, 1]}, {'precio_kwh': []},
+                   {'precio_kwh': {'min': 0, 'max': 1, 'pasos': 10**8}}):
+        with pytest.raises(ValueError):
+            analizar_sensibilidad(10, fecha, 5.0, PARAMS, tabla, rangos)
+    with pytest.raises(ValueError):
+        analizar_sensibilidad(10, fecha, 5.0, PARAMS, tabla, {'precio_kwh': list(range(1, 400))},
+                              modo='grilla', max_escenarios=100)
+    # 40 parámetros x 3 valores: 3**40 no cabe en int64
+    rangos = {f'p{i}': [1, 2, 3] for i in range(40)}
+    with pytest.raises(ValueError, match='Demasiados escenarios'):
+        analizar_sensibilidad(10, fecha, 5.0, dict(PARAMS, **{k: 1.0 for k in rangos}), tabla, rangos,
+                              modo='grilla')
\ No newline at end of file